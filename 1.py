@@ -1,13 +1,23 @@
-import requests
+import time
+# 尽早记录启动时间，用于统计启动到可交互的耗时
+_PROCESS_START = time.perf_counter()
+
 import math
-import json
+import os
+import sys
 import tkinter as tk
 from tkinter import ttk, messagebox, scrolledtext, filedialog
 import threading
-from io import BytesIO
-from PIL import Image, ImageTk
-import datetime
-import base64
+from batch import BatchLookup, parse_player_list, load_player_file
+from guild import GuildRoster
+from hypixel_core import HypixelClient
+from async_backend import AsyncHypixelClient, AsyncRunner
+from key_pool import build_api_key
+from profile_cache import format_age
+from history import HistoryStore, format_field
+from texture_cache import TextureCache
+from image_pipeline import ImagePipeline
+from replay import http_from_env
 
 class HoverButton(ttk.Button):
     """带有悬停效果的按钮"""
@@ -92,8 +102,136 @@ class LoadingAnimation:
         intensity = int(255 * alpha)
         return f"#{r:02x}{g:02x}{b:02x}"
 
+class ResultTree(ttk.Frame):
+    """结构化结果视图：每个分组可折叠，折叠的分组展开时才插入子行，重新渲染时只更新发生变化的行"""
+    def __init__(self, master, style=None, highlight_changes=True, **kwargs):
+        super().__init__(master, **kwargs)
+        self.highlight_changes = highlight_changes  # 刷新时短暂高亮变化的行，不影响显示速度
+        self._values = {}    # 行ID -> 当前显示的值
+        self._children = {}  # 父行ID -> 已插入的子行ID，删除旧行时只检查对应父行
+        self._pending = {}   # 尚未展开的分组行ID -> 待显示的数据
+        self._images = {}    # 行ID -> 行首图标（PhotoImage 需要保留引用才不会被回收）
+        
+        style = style or ttk.Style()
+        style.configure('Result.Treeview', font=('Consolas', 12), rowheight=26, background='#ffffff')
+        style.configure('Result.Treeview.Heading', font=('微软雅黑', 10, 'bold'))
+        
+        self.tree = ttk.Treeview(self, columns=("value",), style='Result.Treeview')
+        self.tree.heading("#0", text="项目", anchor=tk.W)
+        self.tree.heading("value", text="数值", anchor=tk.W)
+        self.tree.column("#0", width=260, stretch=True)
+        self.tree.column("value", width=240, stretch=True)
+        self.tree.tag_configure("changed", background="#fff3bf")
+        
+        scrollbar = ttk.Scrollbar(self, orient=tk.VERTICAL, command=self.tree.yview)
+        self.tree.configure(yscrollcommand=scrollbar.set)
+        self.tree.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+        scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+        self.tree.bind("<Control-c>", self._copy_selection)
+        self.tree.bind("<<TreeviewOpen>>", self._on_open)
+
+    def clear(self):
+        self.tree.delete(*self.tree.get_children())
+        self._values.clear()
+        self._children.clear()
+        self._pending.clear()
+        self._images.clear()
+
+    def render(self, data, parent="", open_depth=2):
+        """显示字典数据；parent 下已有的行会被复用，只更新变化的值"""
+        changed = []
+        self._render(data, parent, 0, open_depth, changed)
+        if self.highlight_changes and changed:
+            for iid in changed:
+                self.tree.item(iid, tags=("changed",))
+            self.after(1500, lambda: [self.tree.item(iid, tags=()) for iid in changed if self.tree.exists(iid)])
+        return len(changed)
+
+    def _render(self, data, parent, depth, open_depth, changed):
+        if parent in self._pending:
+            # 未展开的分组只替换待显示的数据
+            self._pending[parent] = data
+            return
+        children = []
+        for index, (key, value) in enumerate(data.items()):
+            iid = f"{parent}/{key}" if parent else str(key)
+            children.append(iid)
+            is_group = isinstance(value, dict)
+            shown = "" if is_group else value
+            if not self.tree.exists(iid):
+                is_open = depth < open_depth
+                self.tree.insert(parent, index, iid=iid, text=str(key), values=(shown,), open=is_open)
+                self._values[iid] = shown
+                if is_group and not is_open:
+                    self._defer(iid, value)
+                    continue
+            elif self._values.get(iid) != shown:
+                self.tree.set(iid, "value", shown)
+                self._values[iid] = shown
+                changed.append(iid)
+            if is_group:
+                self._render(value, iid, depth + 1, open_depth, changed)
+            elif iid in self._children or iid in self._pending:
+                # 分组变为普通值
+                self._forget(iid)
+                self.tree.delete(*self.tree.get_children(iid))
+        # 删除新数据中已不存在的行
+        kept = set(children)
+        for iid in self._children.get(parent, ()):
+            if iid not in kept:
+                self._values.pop(iid, None)
+                self._images.pop(iid, None)
+                self._forget(iid)
+                if self.tree.exists(iid):
+                    self.tree.delete(iid)
+        self._children[parent] = children
+
+    def _defer(self, iid, data):
+        """记下分组的数据，插入一个占位子行使其可以展开"""
+        self._pending[iid] = data
+        self.tree.insert(iid, tk.END, iid=f"{iid}//", text="…")
+
+    def _forget(self, iid):
+        """清除一行所有子行的记录"""
+        self._pending.pop(iid, None)
+        for child in self._children.pop(iid, ()):
+            self._values.pop(child, None)
+            self._forget(child)
+
+    def _on_open(self, event=None):
+        iid = self.tree.focus()
+        data = self._pending.pop(iid, None)
+        if data is not None:
+            self.tree.delete(f"{iid}//")
+            self._render(data, iid, 0, 0, [])
+
+    def add_group(self, iid, text, value="", data=None):
+        """追加一个顶层分组（批量查询时每名玩家一行），展开后才显示完整数据"""
+        self.tree.insert("", tk.END, iid=iid, text=text, values=(value,), open=False)
+        self._values[iid] = value
+        self._children.setdefault("", []).append(iid)
+        if data:
+            self._defer(iid, data)
+        self.tree.see(iid)
+
+    def set_image(self, iid, img):
+        """在行首显示图标（PIL.Image），例如批量结果中玩家的头像"""
+        if not self.tree.exists(iid):
+            return
+        from PIL import ImageTk
+        
+        photo = ImageTk.PhotoImage(img)
+        self.tree.item(iid, image=photo)
+        self._images[iid] = photo
+
+    def _copy_selection(self, event=None):
+        lines = [f"{self.tree.item(iid, 'text')}: {self.tree.set(iid, 'value')}" for iid in self.tree.selection()]
+        if lines:
+            self.clipboard_clear()
+            self.clipboard_append("\n".join(lines))
+
 class HypixelStatsApp:
-    def __init__(self, root):
+    def __init__(self, root, show_splash=True):
         self.root = root
         self.root.title("Hypixel 玩家数据查询工具 v3.4")
         self.root.geometry("790x900")
@@ -120,72 +258,109 @@ class HypixelStatsApp:
         self.skin_img = None
         self.cape_img = None
         
-        # 播放入场动画
-        self.play_entrance_animation()
+        # 数据查询客户端（共享HTTP连接池和UUID缓存）
+        self.history = HistoryStore()
+        # 设置了 HYPIXEL_FINDER_RECORD / HYPIXEL_FINDER_REPLAY 时录制或回放HTTP响应
+        self.client = HypixelClient(http=http_from_env(), history=self.history)
+        self.http = self.client.http
+        # asyncio 查询后端，事件循环运行在后台线程
+        self.async_client = AsyncHypixelClient(self.client)
+        self.async_runner = AsyncRunner()
+        self.pending_lookup = None
+        # 关注列表监控（第一次打开关注列表时创建）
+        self.watch_monitor = None
+        self.watch_log = []
+        # 本地排行榜（第一次打开排行榜时从历史数据库载入）
+        self.leaderboard = None
+        # 皮肤/披风材质缓存
+        self.texture_cache = TextureCache()
+        # 后台图像解码，只把最终显示交给界面线程
+        self.image_pipeline = ImagePipeline(
+            self.http, self.texture_cache,
+            lambda fn, *args: self.root.after(0, fn, *args),
+            singleflight=self.client.singleflight
+        )
+        
+        # 先构建真正的界面，启动动画只覆盖在结果区域上，不阻塞输入
+        self.setup_ui()
+        self.player_entry.focus_set()
+        if show_splash:
+            self.play_entrance_animation()
+        
+        # 事件循环第一次空闲时即可交互，记录启动耗时
+        self.startup_ms = None
+        self.root.after_idle(self.report_startup_time)
+
+    def report_startup_time(self):
+        """记录并显示启动到可交互的耗时"""
+        self.startup_ms = round((time.perf_counter() - _PROCESS_START) * 1000, 1)
+        self.status_bar.config(text=f"准备就绪（启动耗时 {self.startup_ms} ms）")
 
     def play_entrance_animation(self):
-        """应用启动入场动画"""
-        # 隐藏所有组件
-        for widget in self.root.winfo_children():
-            widget.pack_forget()
-        
-        # 创建动画画布
-        canvas = tk.Canvas(self.root, width=790, height=900, bg="#f5f5f5", highlightthickness=0)
-        canvas.pack(fill=tk.BOTH, expand=True)
+        """应用启动入场动画（覆盖在结果区域上，点击可跳过）"""
+        canvas = tk.Canvas(self.result_card, bg="#ffffff", highlightthickness=0)
+        canvas.place(relx=0, rely=0, relwidth=1, relheight=1)
+        self.splash = canvas
         
         # 创建标题文本
-        title = canvas.create_text(395, 450, text="Hypixel 玩家数据查询工具", 
+        title = canvas.create_text(0, 0, text="Hypixel 玩家数据查询工具", 
                                  font=("微软雅黑", 24, "bold"), fill="#3498db")
         
-        version = canvas.create_text(395, 490, text="v3.4", 
+        version = canvas.create_text(0, 0, text="v3.4", 
                                    font=("微软雅黑", 12), fill="#7f8c8d")
         
         # 创建一个简单的加载动画
-        dots = []
-        for i in range(5):
-            x = 395 - 40 + i * 20
-            dot = canvas.create_oval(x-5, 530-5, x+5, 530+5, fill="#3498db", outline="")
-            dots.append(dot)
+        dots = [canvas.create_oval(0, 0, 0, 0, fill="#3498db", outline="") for i in range(5)]
+        
+        def center():
+            return canvas.winfo_width() / 2, canvas.winfo_height() / 2 - 40
         
         # 动画帧函数
         def animate_dot(dot_idx=0, frame=0):
+            if not canvas.winfo_exists():
+                return
+            cx, cy = center()
+            canvas.coords(title, cx, cy)
+            canvas.coords(version, cx, cy + 40)
             # 重置所有点的大小
             for i, dot in enumerate(dots):
                 size = 5 if i != dot_idx else 8
-                x = 395 - 40 + i * 20
-                canvas.coords(dot, x-size, 530-size, x+size, 530+size)
+                x = cx - 40 + i * 20
+                canvas.coords(dot, x-size, cy+80-size, x+size, cy+80+size)
             
             # 下一帧
-            if frame < 10:  # 每个点动画10帧
+            if frame < 4:  # 每个点动画4帧
                 self.root.after(50, lambda: animate_dot(dot_idx, frame+1))
             elif dot_idx < len(dots)-1:  # 移动到下一个点
                 self.root.after(50, lambda: animate_dot(dot_idx+1, 0))
-            else:  # 动画结束，显示应用
+            else:  # 动画结束
                 fade_out()
         
-        # 淡出动画
-        def fade_out():
-            # 渐变隐藏画布
-            for i in range(10):
-                alpha = 1 - i/10
-                # 修改透明度...这里简化处理
-                canvas.itemconfig(title, fill=f"#{int(52*(1-alpha)):02x}{int(152*(1-alpha)):02x}{int(219*(1-alpha)):02x}")
-                for dot in dots:
-                    canvas.itemconfig(dot, fill=f"#{int(52*(1-alpha)):02x}{int(152*(1-alpha)):02x}{int(219*(1-alpha)):02x}")
-                self.root.update()
-                self.root.after(50)
-            
-            # 移除画布，显示实际界面
-            canvas.destroy()
-            
-            # 重新显示所有组件
-            main_frame = ttk.Frame(self.root)
-            main_frame.pack(fill=tk.BOTH, expand=True, padx=10, pady=10)
-            self.setup_ui_components(main_frame)  # 将原来setup_ui方法的内容移到这个方法
+        # 淡出动画，每一步都交回事件循环
+        def fade_out(step=0):
+            if not canvas.winfo_exists():
+                return
+            if step >= 10:
+                self.dismiss_splash()
+                return
+            alpha = step / 10
+            # 从主题色渐变到背景色
+            color = "#%02x%02x%02x" % tuple(int(c + (255 - c) * alpha) for c in (52, 152, 219))
+            canvas.itemconfig(title, fill=color)
+            for dot in dots:
+                canvas.itemconfig(dot, fill=color)
+            self.root.after(50, lambda: fade_out(step + 1))
         
-        # 开始动画
+        canvas.bind("<Button-1>", lambda e: self.dismiss_splash())
         animate_dot()
 
+    def dismiss_splash(self):
+        """移除启动动画"""
+        splash = getattr(self, 'splash', None)
+        if splash is not None:
+            splash.destroy()
+            self.splash = None
+
     # ---------- 界面初始化 ----------
     def setup_ui_components(self, main_frame):
         # 输入区域卡片
@@ -210,25 +385,35 @@ class HypixelStatsApp:
         self.search_btn = HoverButton(input_frame, text="查询", command=self.start_search, style=self.style)
         self.search_btn.pack(side=tk.LEFT, padx=10)
         
+        self.batch_btn = HoverButton(input_frame, text="批量查询", command=self.open_batch_dialog, style=self.style)
+        self.batch_btn.pack(side=tk.LEFT)
+        
+        self.history_btn = HoverButton(input_frame, text="历史变化", command=self.open_history_dialog, style=self.style)
+        self.history_btn.pack(side=tk.LEFT, padx=(10, 0))
+        
+        self.guild_btn = HoverButton(input_frame, text="公会成员", command=self.open_guild_dialog, style=self.style)
+        self.guild_btn.pack(side=tk.LEFT, padx=(10, 0))
+        
+        self.watch_btn = HoverButton(input_frame, text="关注列表", command=self.open_watch_dialog, style=self.style)
+        self.watch_btn.pack(side=tk.LEFT, padx=(10, 0))
+        
+        self.rank_btn = HoverButton(input_frame, text="排行榜", command=self.open_leaderboard_dialog, style=self.style)
+        self.rank_btn.pack(side=tk.LEFT, padx=(10, 0))
+        
         # 结果显示卡片
         result_card = ttk.Frame(main_frame, style='Card.TFrame')
         result_card.pack(fill=tk.BOTH, expand=True, pady=5, padx=5)
+        self.result_card = result_card
+        
+        # 缓存提示
+        self.cache_label = ttk.Label(result_card, foreground="#7f8c8d")
+        self.cache_label.pack(anchor=tk.W, padx=15, pady=(10, 0))
         
         result_frame = ttk.Frame(result_card)
         result_frame.pack(fill=tk.BOTH, expand=True, padx=15, pady=15)
         
         # 数据面板
-        self.data_panel = scrolledtext.ScrolledText(
-            result_frame, 
-            wrap=tk.WORD,
-            font=("Consolas", 20),
-            width=60,
-            bg="#ffffff",  # 白色背景
-            relief=tk.FLAT,  # 扁平外观
-            padx=10,  # 内边距
-            pady=10,
-            bd=1  # 边框宽度
-        )
+        self.data_panel = ResultTree(result_frame, style=self.style)
         self.data_panel.pack(side=tk.LEFT, fill=tk.BOTH, expand=True, padx=5, pady=5)
         
         # 自定义滚动条样式
@@ -257,10 +442,97 @@ class HypixelStatsApp:
         self.cape_label.pack()
         self.cape_label.bind("<Button-3>", self.save_image)
         
+        # 性能面板（默认折叠）
+        self.setup_perf_panel(main_frame)
+        
         # 状态栏
         self.status_bar = ttk.Label(self.root, relief=tk.SUNKEN, anchor=tk.W)
         self.status_bar.pack(side=tk.BOTTOM, fill=tk.X)
 
+    def setup_perf_panel(self, main_frame):
+        """可折叠的性能面板：各阶段耗时分位数、缓存命中率和重试次数"""
+        perf_card = ttk.Frame(main_frame, style='Card.TFrame')
+        perf_card.pack(fill=tk.X, pady=5, padx=5)
+        
+        header = ttk.Frame(perf_card)
+        header.pack(fill=tk.X, padx=15, pady=5)
+        self.perf_toggle = ttk.Label(header, text="▸ 性能统计", cursor="hand2")
+        self.perf_toggle.pack(side=tk.LEFT)
+        self.perf_toggle.bind("<Button-1>", lambda e: self.toggle_perf_panel())
+        HoverButton(header, text="导出", command=self.export_metrics, style=self.style).pack(side=tk.RIGHT)
+        
+        self.perf_body = ttk.Frame(perf_card)
+        columns = ("次数", "平均", "p50", "p90", "p99", "最大")
+        self.perf_tree = ttk.Treeview(self.perf_body, columns=columns, height=8)
+        self.perf_tree.heading("#0", text="阶段（毫秒）")
+        self.perf_tree.column("#0", width=140)
+        for column in columns:
+            self.perf_tree.heading(column, text=column)
+            self.perf_tree.column(column, width=80, anchor=tk.E)
+        self.perf_tree.pack(fill=tk.X)
+        self.perf_label = ttk.Label(self.perf_body, foreground="#7f8c8d", wraplength=720)
+        self.perf_label.pack(anchor=tk.W, pady=(5, 0))
+        self.perf_visible = False
+
+    def toggle_perf_panel(self):
+        self.perf_visible = not self.perf_visible
+        if self.perf_visible:
+            self.perf_body.pack(fill=tk.X, padx=15, pady=(0, 10))
+            self.perf_toggle.config(text="▾ 性能统计")
+            self.refresh_perf_panel()
+        else:
+            self.perf_body.pack_forget()
+            self.perf_toggle.config(text="▸ 性能统计")
+
+    def refresh_perf_panel(self):
+        """展开时每秒刷新一次"""
+        if not self.perf_visible:
+            return
+        snapshot = self.client.metrics.snapshot()
+        rows = snapshot["阶段耗时(毫秒)"]
+        for iid in self.perf_tree.get_children():
+            if iid not in rows:
+                self.perf_tree.delete(iid)
+        for phase, summary in rows.items():
+            values = tuple(summary.values())
+            if self.perf_tree.exists(phase):
+                self.perf_tree.item(phase, values=values)
+            else:
+                self.perf_tree.insert("", tk.END, iid=phase, text=phase, values=values)
+        components = snapshot["组件"]
+        counters = snapshot["计数"]
+        parts = [f"{name} 命中率 {values['hit_rate']:.0%}"
+                 for name, values in components.items() if "hit_rate" in values]
+        scheduler = components.get("scheduler", {})
+        resilience = components.get("resilience", {})
+        retries = (scheduler.get('retries', 0) + resilience.get('retries', 0)
+                   + sum(v for k, v in counters.items() if k.startswith('retries')))
+        parts.append(f"限流 {scheduler.get('throttled', 0)} 次，重试 {retries} 次，"
+                     f"对冲 {resilience.get('hedged', 0)} 次，熔断 {resilience.get('open_circuits', 0)} 个主机")
+        parts.append(f"排队等待 共 {scheduler.get('total_wait_seconds', 0.0)} 秒，"
+                     f"最长 {scheduler.get('max_wait_seconds', 0.0)} 秒")
+        errors = sum(v for k, v in counters.items() if k.startswith("errors"))
+        parts.append(f"错误 {errors} 次")
+        parts.append(f"合并重复请求 {components.get('singleflight', {}).get('coalesced', 0)} 次")
+        images = components.get("image_pipeline", {})
+        parts.append(f"图像显示卡顿 平均 {images.get('ui_stall_avg_ms', 0.0)} ms，最大 {images.get('ui_stall_max_ms', 0.0)} ms")
+        self.perf_label.config(text=" | ".join(parts))
+        self.root.after(1000, self.refresh_perf_panel)
+
+    def export_metrics(self):
+        """导出性能统计为 JSON 或 Prometheus 文本"""
+        filename = filedialog.asksaveasfilename(
+            title="导出性能统计",
+            defaultextension=".json",
+            filetypes=[("JSON", "*.json"), ("Prometheus 文本", "*.prom"), ("所有文件", "*.*")]
+        )
+        if filename:
+            try:
+                self.client.metrics.export(filename)
+                self.status_bar.config(text=f"性能统计已导出至: {filename}")
+            except Exception as e:
+                messagebox.showerror("导出失败", str(e))
+
     def setup_ui(self):
         main_frame = ttk.Frame(self.root)
         main_frame.pack(fill=tk.BOTH, expand=True, padx=10, pady=10)
@@ -268,7 +540,7 @@ class HypixelStatsApp:
 
     # ---------- 核心功能 ----------
     def start_search(self):
-        api_key = self.api_key_entry.get().strip()
+        api_key = self.get_api_key()
         player_name = self.player_entry.get().strip()
         
         if not api_key:
@@ -278,11 +550,20 @@ class HypixelStatsApp:
             messagebox.showwarning("警告", "请输入玩家ID")
             return
             
+        self.dismiss_splash()
         self.search_btn.config(state=tk.DISABLED)
         self.animate_search_button()  # 添加动画效果
         self.animate_status_bar("正在查询数据...", highlight=False)
         self.loading_anim.start()  # 启动加载动画
-        threading.Thread(target=lambda: self.fetch_data(api_key, player_name)).start()
+        self.fetch_data(api_key, player_name)
+
+    def get_api_key(self):
+        """读取API密钥；输入多个密钥（逗号分隔）时使用密钥池，输入不变时复用同一个池"""
+        text = self.api_key_entry.get().strip()
+        if text != getattr(self, '_api_key_text', None):
+            self._api_key_text = text
+            self._api_key = build_api_key(text, self.client.scheduler)
+        return self._api_key
 
     def animate_search_button(self):
         """搜索按钮动画效果"""
@@ -323,165 +604,562 @@ class HypixelStatsApp:
             self.root.after(1000, lambda: self.status_bar.config(background=original_bg))
 
     def fetch_data(self, api_key, player_name):
+        """在后台事件循环中查询，完成后回到界面线程显示"""
+        def on_refresh(processed_data, skin_data):
+            self.root.after(0, self.on_profile_refreshed, processed_data, skin_data)
+        
+        future = self.async_runner.submit(
+            self.async_client.lookup_cached(api_key, player_name, on_refresh, allow_stale=True)
+        )
+        self.pending_lookup = future
+        future.add_done_callback(lambda f: self.root.after(0, self.on_fetch_done, f))
+
+    def on_fetch_done(self, future):
+        """查询完成回调（界面线程）"""
         try:
-            uuid, error = self.get_uuid(player_name)
-            if error: 
-                raise Exception(error)
-            
-            hypixel_data = {}
-            skin_data = {}
-            
-            # 多线程获取数据
-            def get_hypixel():
-                nonlocal hypixel_data
-                data, err = self.get_hypixel_data(api_key, uuid)
-                if err: 
-                    raise Exception(err)
-                hypixel_data = data
-                
-            def get_skin():
-                nonlocal skin_data
-                skin_data = self.get_skin_data(uuid)
-            
-            t1 = threading.Thread(target=get_hypixel)
-            t2 = threading.Thread(target=get_skin)
-            t1.start()
-            t2.start()
-            t1.join()
-            t2.join()
-            
-            processed_data = self.process_data(hypixel_data, uuid, skin_data)
-            self.root.after(0, self.display_results, processed_data)
-            self.root.after(0, self.update_images, skin_data)
-            
+            if future.cancelled():
+                return
+            error = future.exception()
+            if error is not None:
+                self.show_error(str(error))
+                return
+            processed_data, skin_data, cache_age = future.result()
+            self.current_uuid = processed_data["UUID"]
+            if cache_age is None:
+                self.cache_label.config(text="")
+            else:
+                refreshing = cache_age > self.client.profile_cache.fresh_ttl
+                self.cache_label.config(
+                    text=f"显示缓存数据（{format_age(cache_age)}）" + ("，正在后台刷新..." if refreshing else "")
+                )
+            self.display_results(processed_data)
+            self.update_images(skin_data)
+        finally:
+            self.pending_lookup = None
+            self.reset_ui()
+
+    def on_profile_refreshed(self, processed_data, skin_data):
+        """后台刷新完成后更新显示（界面线程）"""
+        if processed_data["UUID"] != getattr(self, 'current_uuid', None):
+            return
+        self.cache_label.config(text="数据已刷新")
+        self.display_results(processed_data)
+        self.update_images(skin_data)
+
+    # ---------- 批量查询 ----------
+    def open_batch_dialog(self):
+        """打开批量查询窗口"""
+        dialog = tk.Toplevel(self.root)
+        dialog.title("批量查询")
+        dialog.geometry("420x480")
+        dialog.configure(bg='#f5f5f5')
+        
+        ttk.Label(dialog, text="玩家列表（每行一个，也可用逗号分隔）:").pack(anchor=tk.W, padx=10, pady=(10, 0))
+        names_text = scrolledtext.ScrolledText(dialog, font=("Consolas", 11), height=18)
+        names_text.pack(fill=tk.BOTH, expand=True, padx=10, pady=5)
+        
+        options = ttk.Frame(dialog)
+        options.pack(fill=tk.X, padx=10)
+        ttk.Label(options, text="并发数:").pack(side=tk.LEFT)
+        workers_var = tk.IntVar(value=8)
+        ttk.Spinbox(options, from_=1, to=64, width=5, textvariable=workers_var).pack(side=tk.LEFT, padx=5)
+        export_var = tk.BooleanVar(value=False)
+        ttk.Checkbutton(options, text="同时导出", variable=export_var).pack(side=tk.LEFT, padx=5)
+        
+        def import_file():
+            filename = filedialog.askopenfilename(
+                parent=dialog,
+                title="导入玩家列表",
+                filetypes=[("文本文件", "*.txt"), ("所有文件", "*.*")]
+            )
+            if filename:
+                try:
+                    names_text.insert(tk.END, "\n".join(load_player_file(filename)) + "\n")
+                except Exception as e:
+                    messagebox.showerror("导入失败", str(e), parent=dialog)
+        
+        def start():
+            names = parse_player_list(names_text.get(1.0, tk.END))
+            if not names:
+                messagebox.showwarning("警告", "请输入至少一个玩家ID", parent=dialog)
+                return
+            export_path = None
+            if export_var.get():
+                export_path = self.ask_export_path(dialog)
+                if not export_path:
+                    return
+            dialog.destroy()
+            self.start_batch_search(names, workers_var.get(), export_path)
+        
+        HoverButton(options, text="从文件导入", command=import_file, style=self.style).pack(side=tk.LEFT, padx=5)
+        HoverButton(options, text="开始", command=start, style=self.style).pack(side=tk.RIGHT)
+
+    def ask_export_path(self, parent):
+        return filedialog.asksaveasfilename(
+            parent=parent,
+            title="导出结果",
+            defaultextension=".csv",
+            filetypes=[("CSV文件", "*.csv"), ("NDJSON文件", "*.ndjson"), ("Parquet文件", "*.parquet")]
+        )
+
+    def start_batch_search(self, names, max_workers=8, export_path=None):
+        """启动批量查询，结果逐个显示；指定 export_path 时每条结果同时写入文件"""
+        api_key = self.get_api_key()
+        if not api_key:
+            messagebox.showwarning("警告", "请输入有效的API密钥")
+            return
+        
+        self.dismiss_splash()
+        self.search_btn.config(state=tk.DISABLED)
+        self.batch_btn.config(state=tk.DISABLED)
+        self.data_panel.clear()
+        self.image_pipeline.begin_lookup()  # 丢弃上一次查询尚未显示的图像
+        self._displayed_uuid = None
+        self.batch_done = 0
+        self.animate_status_bar(f"正在批量查询 {len(names)} 名玩家...", highlight=False)
+        self.loading_anim.start()
+        
+        self.batch = BatchLookup(self.client, api_key, max_workers=max_workers)
+        threading.Thread(target=lambda: self.run_batch(names, export_path), daemon=True).start()
+
+    def run_batch(self, names, export_path=None):
+        """在后台线程中执行批量查询"""
+        from export import open_exporter
+        
+        total = len(names)
+        exporter = None
+        
+        def on_result(result):
+            if exporter is not None:
+                exporter.write(result)
+            # 只计数，不保留结果，导出时内存占用与玩家数无关
+            self.batch_done += 1
+            done = self.batch_done
+            self.root.after(0, self.append_batch_result, result, done, total)
+        
+        try:
+            if export_path:
+                exporter = open_exporter(export_path)
+            stats = self.batch.run(names, on_result=on_result)
+            self.root.after(0, self.finish_batch, stats)
+            if exporter is not None:
+                self.root.after(0, self.data_panel.add_group, "batch_export", "导出",
+                                f"已导出 {exporter.rows} 条结果至: {export_path}")
         except Exception as e:
             self.root.after(0, self.show_error, str(e))
         finally:
+            if exporter is not None:
+                exporter.close()
             self.root.after(0, self.reset_ui)
 
-    # ---------- 数据处理方法 ----------
-    def get_uuid(self, player_name):
-        """获取玩家UUID"""
-        try:
-            response = requests.get(
-                f"https://api.mojang.com/users/profiles/minecraft/{player_name}",
-                timeout=10
-            )
-            if response.status_code == 204:
-                return None, "玩家不存在"
-            data = response.json()
-            return data.get("id"), None
-        except Exception as e:
-            return None, f"获取UUID失败: {str(e)}"
+    def append_batch_result(self, result, done, total):
+        """追加一条批量查询结果"""
+        if result["error"]:
+            self.data_panel.add_group(f"batch{done}", f"[{done}/{total}] {result['player']}",
+                                      f"失败 - {result['error']}")
+        else:
+            data = result["data"]
+            games = data["游戏数据"]
+            summary = (f"等级 {data['基础信息']['等级']} | "
+                       f"床战争 {games['床战争']['等级']}星 KD {games['床战争']['KD']} | "
+                       f"决斗胜场 {games['决斗模式']['总统计']['总胜场']}")
+            self.data_panel.add_group(f"batch{done}",
+                                      f"[{done}/{total}] {data['基础信息']['显示名称'] or result['player']}",
+                                      summary, data)
+            if result["skin"].get("skin"):
+                # 头像缩略图（8x8 像素放大3倍，不超过行高）
+                self.image_pipeline.submit(result["skin"]["skin"], (24, 24), True,
+                                           lambda img: self.data_panel.set_image(f"batch{done}", img),
+                                           head=True)
+        self.status_bar.config(text=f"批量查询中... {done}/{total}")
+
+    def finish_batch(self, stats):
+        """批量查询结束，显示吞吐量"""
+        summary = (f"共 {stats['总数']} 名玩家，成功 {stats['成功']}，失败 {stats['失败']}，"
+                   f"耗时 {stats['耗时']} 秒，吞吐量 {stats['吞吐量']} 玩家/秒")
+        self.data_panel.add_group("batch_summary", "汇总", summary)
+        self.animate_status_bar("批量查询完成", highlight=True)
 
-    def get_hypixel_data(self, api_key, uuid):
-        """获取Hypixel数据"""
+    # ---------- 公会 ----------
+    def open_guild_dialog(self):
+        """按公会名称或成员ID查询公会成员"""
+        dialog = tk.Toplevel(self.root)
+        dialog.title("公会成员")
+        dialog.geometry("380x150")
+        dialog.configure(bg='#f5f5f5')
+        
+        by_var = tk.StringVar(value="name")
+        modes = ttk.Frame(dialog)
+        modes.pack(fill=tk.X, padx=10, pady=(10, 0))
+        ttk.Radiobutton(modes, text="公会名称", variable=by_var, value="name").pack(side=tk.LEFT)
+        ttk.Radiobutton(modes, text="成员玩家ID", variable=by_var, value="player").pack(side=tk.LEFT, padx=10)
+        query_entry = ttk.Entry(dialog, width=40)
+        query_entry.pack(fill=tk.X, padx=10, pady=10)
+        query_entry.focus_set()
+        
+        def start():
+            query = query_entry.get().strip()
+            if not query:
+                messagebox.showwarning("警告", "请输入公会名称或玩家ID", parent=dialog)
+                return
+            dialog.destroy()
+            self.start_guild_search(query, by_var.get() == "player")
+        
+        query_entry.bind("<Return>", lambda e: start())
+        HoverButton(dialog, text="开始", command=start, style=self.style).pack(side=tk.RIGHT, padx=10)
+
+    def start_guild_search(self, query, by_player=False):
+        """加载公会成员列表并并发查询成员，结果逐个显示"""
+        api_key = self.get_api_key()
+        if not api_key:
+            messagebox.showwarning("警告", "请输入有效的API密钥")
+            return
+        
+        self.dismiss_splash()
+        self.search_btn.config(state=tk.DISABLED)
+        self.batch_btn.config(state=tk.DISABLED)
+        self.guild_btn.config(state=tk.DISABLED)
+        self.data_panel.clear()
+        self.image_pipeline.begin_lookup()  # 丢弃上一次查询尚未显示的图像
+        self._displayed_uuid = None
+        self.animate_status_bar(f"正在加载公会 {query}...", highlight=False)
+        self.loading_anim.start()
+        
+        roster = GuildRoster(self.client, api_key, allow_stale=True)
+        threading.Thread(target=lambda: self.run_guild(roster, query, by_player), daemon=True).start()
+
+    def run_guild(self, roster, query, by_player):
+        """在后台线程中加载公会并查询成员"""
         try:
-            response = requests.get(
-                f"https://api.hypixel.net/player?key={api_key}&uuid={uuid}",
-                timeout=15
-            )
-            data = response.json()
-            if not data.get("success"):
-                return None, data.get("cause", "未知API错误")
-            return data.get("player"), None
+            guild = roster.load(query, by_player)
+            total = len(guild["成员"])
+            self.root.after(0, self.show_guild_header, guild)
+            done = [0]
+            
+            def on_result(result):
+                done[0] += 1
+                self.root.after(0, self.append_batch_result, result, done[0], total)
+            
+            _, summary = roster.run(guild, on_result=on_result)
+            self.root.after(0, self.finish_guild, summary, roster.stats)
         except Exception as e:
-            return None, f"API请求失败: {str(e)}"
-
-    def process_data(self, data, uuid, skin_data):
-        """整合处理所有数据"""
-        return {
-            "UUID": uuid,
-            "最后登录": self.format_timestamp(data.get("lastLogin")),
-            "首次登录": self.format_timestamp(data.get("firstLogin")),
-            "基础信息": {
-                "显示名称": data.get("displayname"),
-                "等级": self.calculate_level(data.get("networkExp", 0)),
-                "社交点数": data.get("karma", 0),
-                "当前披风": "有" if skin_data.get("cape") else "无"
-            },
-            "社交": {
-                "好友数量": len(data.get("friends", [])),
-                "公会": self.get_guild_info(data)
-            },
-            "游戏数据": {
-                "床战争": self.process_bedwars(data.get("stats", {}).get("Bedwars", {})),
-                "决斗模式": self.process_duels(data.get("stats", {}).get("Duels", {})),
-                "空岛战争": self.process_skywars(data.get("stats", {}).get("SkyWars", {}))
-            }
-        }
+            self.root.after(0, self.show_error, str(e))
+        finally:
+            self.root.after(0, self.reset_ui)
 
-    def process_duels(self, stats):
-        """处理决斗模式数据"""
-        modes = {
-            'bridge_duel': "搭桥决斗",
-            'uhc_duel': "UHC决斗",
-            'sw_duel': "空岛战争决斗",
-            'classic_duel': "经典决斗",
-            'op_duel': "超强装备决斗",
-            'parkour_eight_duel': "八人跑酷",
-            'mw_duel': "超级战墙决斗",
-            'bow_duel': "弓箭对决",
-            'blitz_duel': "闪电决斗",
-            'sumo_duel': "相扑对决",
-            'boxing_duel': "拳击对决",
-            'skywars_two_v_two': "双人空岛"
-        }
+    def show_guild_header(self, guild):
+        info = {key: value for key, value in guild.items() if key != "成员"}
+        self.data_panel.add_group("guild", f"公会 {guild['名称']} [{guild['标签']}]",
+                                  f"等级 {guild['等级']}，{len(guild['成员'])} 名成员", info)
+        self.status_bar.config(text=f"正在查询 {len(guild['成员'])} 名公会成员...")
 
-        duel_data = {
-            "总统计": {
-                "总胜场": stats.get("wins", 0),
-                "总击杀": stats.get("kills", 0),
-                "总死亡": stats.get("deaths", 0),
-                "总KD": self.calculate_kd(stats.get("kills", 0), stats.get("deaths", 0)),
-                "当前连胜": stats.get("current_winstreak", 0),
-                "最高连胜": stats.get("best_overall_winstreak", 0)
-            }
+    def finish_guild(self, summary, stats):
+        """公会成员查询结束，显示汇总"""
+        # 排行榜显示为 "1. 玩家名: 值"
+        shown = {
+            key: {f"{i}. {item['玩家']}": item["值"] for i, item in enumerate(value, 1)}
+            if isinstance(value, list) else value
+            for key, value in summary.items()
         }
+        self.data_panel.add_group("guild_summary", "汇总",
+                                  f"平均等级 {summary['平均等级']}，床战争平均星级 {summary['床战争平均星级']}",
+                                  shown)
+        self.animate_status_bar(
+            f"公会查询完成：成功 {stats['成功']}，失败 {stats['失败']}，缓存复用 {stats['缓存复用']}，"
+            f"耗时 {stats['耗时']} 秒", highlight=True)
 
-        for mode_key, mode_name in modes.items():
-            duel_data[mode_name] = {
-                "胜场": stats.get(f"{mode_key}_wins", 0),
-                "击杀": stats.get(f"{mode_key}_kills", 0),
-                "死亡": stats.get(f"{mode_key}_deaths", 0),
-                "KD": self.calculate_kd(
-                    stats.get(f"{mode_key}_kills", 0),
-                    stats.get(f"{mode_key}_deaths", 0)
-                ),
-                "当前连胜": stats.get(f"{mode_key}_winstreak", 0),
-                "最高连胜": stats.get(f"{mode_key}_best_winstreak", 0)
-            }
-
-        if 'parkour_eight_duel' in modes:
-            duel_data["八人跑酷"].update({
-                "最快记录": f"{stats.get('parkour_eight_duel_best_time', 0):.2f}秒",
-                "平均时间": f"{stats.get('parkour_eight_duel_average_time', 0):.2f}秒"
-            })
-
-        return duel_data
+    # ---------- 历史数据 ----------
+    def open_history_dialog(self):
+        """显示当前玩家在一段时间内的数据变化（只读本地历史，不发起请求）"""
+        uuid = getattr(self, 'current_uuid', None)
+        if not uuid:
+            messagebox.showwarning("警告", "请先查询一名玩家")
+            return
+        
+        dialog = tk.Toplevel(self.root)
+        dialog.title("历史变化")
+        dialog.geometry("460x520")
+        dialog.configure(bg='#f5f5f5')
+        
+        periods = {"1天": 1, "7天": 7, "30天": 30, "90天": 90, "全部": None}
+        options = ttk.Frame(dialog)
+        options.pack(fill=tk.X, padx=10, pady=10)
+        ttk.Label(options, text="时间范围:").pack(side=tk.LEFT)
+        period_var = tk.StringVar(value="7天")
+        period_box = ttk.Combobox(options, textvariable=period_var, values=list(periods),
+                                  state="readonly", width=8)
+        period_box.pack(side=tk.LEFT, padx=5)
+        
+        text = scrolledtext.ScrolledText(dialog, font=("Consolas", 11), wrap=tk.WORD)
+        text.pack(fill=tk.BOTH, expand=True, padx=10, pady=(0, 10))
+        
+        def refresh(event=None):
+            days = periods[period_var.get()]
+            since = time.time() - days * 86400 if days else 0
+            delta = self.history.delta(uuid, since)
+            count = len(self.history.snapshots(uuid, since))
+            text.delete(1.0, tk.END)
+            text.insert(tk.END, f"{period_var.get()}内共 {count} 次记录\n\n")
+            if not delta:
+                text.insert(tk.END, "没有数值变化\n")
+            for field, (before, after, diff) in sorted(delta.items()):
+                sign = "+" if diff > 0 else ""
+                text.insert(tk.END, f"{sign}{diff}  {format_field(field)}  ({before} → {after})\n")
+        
+        period_box.bind("<<ComboboxSelected>>", refresh)
+        refresh()
 
-    # ---------- 辅助方法 ----------
-    def get_skin_data(self, uuid):
-        """获取皮肤数据"""
+    # ---------- 排行榜 ----------
+    def open_leaderboard_dialog(self):
+        """按统计项对本地查询过的所有玩家排名（只读本地数据，不发起请求）"""
+        from leaderboard import LeaderboardIndex, parse_condition
+        
+        dialog = tk.Toplevel(self.root)
+        dialog.title("排行榜")
+        dialog.geometry("560x620")
+        dialog.configure(bg='#f5f5f5')
+        
+        options = ttk.Frame(dialog)
+        options.pack(fill=tk.X, padx=10, pady=(10, 0))
+        ttk.Label(options, text="统计项:").pack(side=tk.LEFT)
+        column_var = tk.StringVar(value="床战争.KD")
+        column_box = ttk.Combobox(options, textvariable=column_var, state="readonly", width=24)
+        column_box.pack(side=tk.LEFT, padx=5)
+        ttk.Label(options, text="前").pack(side=tk.LEFT)
+        top_var = tk.StringVar(value="50")
+        top_box = ttk.Combobox(options, textvariable=top_var, values=["10", "50", "100", "500"],
+                               state="readonly", width=5)
+        top_box.pack(side=tk.LEFT, padx=5)
+        ttk.Label(options, text="名").pack(side=tk.LEFT)
+        ascending_var = tk.BooleanVar(value=False)
+        ttk.Checkbutton(options, text="从小到大", variable=ascending_var,
+                        command=lambda: refresh()).pack(side=tk.LEFT, padx=10)
+        
+        filters = ttk.Frame(dialog)
+        filters.pack(fill=tk.X, padx=10, pady=10)
+        ttk.Label(filters, text="筛选:").pack(side=tk.LEFT)
+        where_entry = ttk.Entry(filters, width=40)
+        where_entry.pack(side=tk.LEFT, padx=5)
+        ttk.Label(filters, text="如 床战争.等级>=100, 床战争.KD>2", foreground="#7f8c8d").pack(side=tk.LEFT)
+        
+        tree = ttk.Treeview(dialog, columns=("玩家", "值"), height=18)
+        tree.heading("#0", text="名次")
+        tree.column("#0", width=70)
+        tree.heading("玩家", text="玩家")
+        tree.column("玩家", width=240)
+        tree.heading("值", text="值")
+        tree.column("值", width=150)
+        tree.pack(fill=tk.BOTH, expand=True, padx=10)
+        
+        summary_label = ttk.Label(dialog, text="正在载入本地数据...", wraplength=530)
+        summary_label.pack(fill=tk.X, padx=10, pady=10)
+        
+        def refresh(event=None):
+            index = self.leaderboard
+            if index is None or not dialog.winfo_exists():
+                return
+            try:
+                where = [parse_condition(text) for text in where_entry.get().replace("，", ",").split(",")
+                         if text.strip()]
+                start = time.perf_counter()
+                ranking = index.top(column_var.get(), int(top_var.get()), where, ascending_var.get())
+                percentiles = index.percentiles(column_var.get(), where=where)
+                elapsed = (time.perf_counter() - start) * 1000
+            except (KeyError, ValueError) as e:
+                summary_label.config(text=e.args[0])
+                return
+            tree.delete(*tree.get_children())
+            for item in ranking:
+                tree.insert("", tk.END, iid=item["UUID"], text=str(item["名次"]),
+                            values=(item["玩家"] or item["UUID"], item["值"]))
+            shown = "，".join(f"{name} {value}" for name, value in percentiles.items())
+            summary_label.config(text=(
+                f"共 {len(index)} 名玩家 | 分位数: {shown or '无数据'} | 查询耗时 {elapsed:.1f} 毫秒"
+            ))
+        
+        def on_loaded(index):
+            self.leaderboard = index
+            column_box.config(values=index.columns)
+            refresh()
+        
+        def load():
+            # 历史数据较多时载入需要一段时间，放到后台线程
+            index = LeaderboardIndex()
+            index.load_history(self.history)
+            # 之后每次从网络获取的数据都会更新到索引
+            self.client.leaderboard = index
+            self.root.after(0, on_loaded, index)
+        
+        def search_selected(event=None):
+            selection = tree.selection()
+            if not selection:
+                return
+            self.player_entry.delete(0, tk.END)
+            self.player_entry.insert(0, tree.item(selection[0], "values")[0])
+            self.start_search()
+        
+        column_box.bind("<<ComboboxSelected>>", refresh)
+        top_box.bind("<<ComboboxSelected>>", refresh)
+        where_entry.bind("<Return>", refresh)
+        tree.bind("<Double-1>", search_selected)
+        def export_all():
+            path = self.ask_export_path(dialog)
+            if not path:
+                return
+            summary_label.config(text="正在导出...")
+            threading.Thread(target=lambda: self.export_history(path, summary_label), daemon=True).start()
+        
+        HoverButton(filters, text="刷新", command=refresh, style=self.style).pack(side=tk.RIGHT)
+        HoverButton(options, text="导出全部", command=export_all, style=self.style).pack(side=tk.RIGHT)
+        if self.leaderboard is None:
+            threading.Thread(target=load, daemon=True).start()
+        else:
+            on_loaded(self.leaderboard)
+
+    def export_history(self, path, label):
+        """在后台线程中把本地历史中所有玩家的最新数据导出到文件"""
+        from export import history_rows, open_exporter
+        
         try:
-            profile = requests.get(
-                f"https://sessionserver.mojang.com/session/minecraft/profile/{uuid}",
-                timeout=10
-            ).json()
-            
-            for prop in profile.get("properties", []):
-                if prop.get("name") == "textures":
-                    decoded = base64.b64decode(prop.get("value", ""))
-                    textures = json.loads(decoded).get("textures", {})
-                    return {
-                        "skin": textures.get("SKIN", {}).get("url"),
-                        "cape": textures.get("CAPE", {}).get("url")
-                    }
-            return {}
+            with open_exporter(path) as exporter:
+                exporter.write_rows(history_rows(self.history))
+            text = f"已导出 {exporter.rows} 名玩家至: {path}"
         except Exception as e:
-            print(f"皮肤数据获取失败: {str(e)}")
-            return {}
+            text = f"导出失败: {str(e)}"
+        self.root.after(0, lambda: label.winfo_exists() and label.config(text=text))
+
+    # ---------- 关注列表 ----------
+    def open_watch_dialog(self):
+        """管理关注列表并查看在线状态；关闭窗口后监控仍在后台运行"""
+        from watchlist import WatchlistMonitor
+        
+        if self.watch_monitor is None:
+            api_key = self.get_api_key()
+            if not api_key:
+                messagebox.showwarning("警告", "请输入有效的API密钥")
+                return
+            self.watch_monitor = WatchlistMonitor(
+                self.client, api_key,
+                on_event=lambda event: self.root.after(0, self.on_watch_event, event)
+            )
+            self.watch_monitor.load()
+        monitor = self.watch_monitor
+        
+        dialog = tk.Toplevel(self.root)
+        dialog.title("关注列表")
+        dialog.geometry("560x620")
+        dialog.configure(bg='#f5f5f5')
+        
+        options = ttk.Frame(dialog)
+        options.pack(fill=tk.X, padx=10, pady=10)
+        ttk.Label(options, text="玩家:").pack(side=tk.LEFT)
+        names_entry = ttk.Entry(options, width=22)
+        names_entry.pack(side=tk.LEFT, padx=5)
+        ttk.Label(options, text="游戏:").pack(side=tk.LEFT)
+        games_entry = ttk.Entry(options, width=12)
+        games_entry.pack(side=tk.LEFT, padx=5)
+        
+        columns = ("状态", "游戏", "间隔")
+        tree = ttk.Treeview(dialog, columns=columns, height=12)
+        tree.heading("#0", text="玩家")
+        tree.column("#0", width=180)
+        for column in columns:
+            tree.heading(column, text=column)
+            tree.column(column, width=110)
+        tree.pack(fill=tk.BOTH, expand=True, padx=10)
+        
+        stats_label = ttk.Label(dialog, text="", wraplength=530)
+        stats_label.pack(fill=tk.X, padx=10, pady=5)
+        log_text = scrolledtext.ScrolledText(dialog, font=("Consolas", 10), height=8, wrap=tk.WORD)
+        log_text.pack(fill=tk.BOTH, padx=10, pady=(0, 10))
+        log_text.insert(tk.END, "".join(line + "\n" for line in self.watch_log))
+        dialog.log_text = log_text
+        self.watch_dialog = dialog
+        shown = {}  # 行ID -> 当前显示的值
+        
+        def add():
+            games = [game for game in games_entry.get().replace("，", ",").split(",") if game.strip()]
+            for name in parse_player_list(names_entry.get()):
+                monitor.add(name, [game.strip() for game in games] or None)
+            names_entry.delete(0, tk.END)
+            monitor.save()
+            refresh(reschedule=False)
+        
+        def remove():
+            for iid in tree.selection():
+                monitor.remove(iid)
+            monitor.save()
+            refresh(reschedule=False)
+        
+        def toggle():
+            if monitor.running:
+                monitor.stop()
+            else:
+                monitor.start()
+            toggle_btn.config(text="停止监控" if monitor.running else "开始监控")
+        
+        def refresh(reschedule=True):
+            if not dialog.winfo_exists():
+                return
+            # 按 iid 原地更新行，只插入新增的玩家、删除已移除的玩家，不影响当前选中的行
+            rows = monitor.snapshot()
+            listed = set()
+            for index, row in enumerate(rows):
+                iid = row["player"].lower()
+                listed.add(iid)
+                status = "未知" if row["online"] is None else ("在线" if row["online"] else "离线")
+                if row["online"] is None and row["error"]:
+                    status = row["error"]
+                values = (status, row["game"] or "", f"{row['interval']:.0f}秒")
+                if not tree.exists(iid):
+                    tree.insert("", index, iid=iid, text=row["player"], values=values)
+                    shown[iid] = (row["player"], values)
+                    continue
+                if shown.get(iid) != (row["player"], values):
+                    tree.item(iid, text=row["player"], values=values)
+                    shown[iid] = (row["player"], values)
+                if tree.index(iid) != index:
+                    tree.move(iid, "", index)
+            stale = [iid for iid in tree.get_children() if iid not in listed]
+            if stale:
+                tree.delete(*stale)
+                for iid in stale:
+                    shown.pop(iid, None)
+            stats = monitor.stats()
+            stats_label.config(text=(
+                f"关注 {stats['关注人数']} 人，在线 {stats['在线人数']} 人 | "
+                f"最近一分钟请求 {stats['最近一分钟请求']}/{stats['每分钟预算']} | "
+                f"预计需求 {stats['预计每分钟需求']}/分钟 | 平均延迟 {stats['平均延迟(秒)']} 秒"
+            ))
+            if reschedule:
+                dialog.after(2000, refresh)
+        
+        names_entry.bind("<Return>", lambda e: add())
+        HoverButton(options, text="添加", command=add, style=self.style).pack(side=tk.LEFT, padx=5)
+        HoverButton(options, text="移除", command=remove, style=self.style).pack(side=tk.LEFT)
+        toggle_btn = HoverButton(options, text="停止监控" if monitor.running else "开始监控",
+                                 command=toggle, style=self.style)
+        toggle_btn.pack(side=tk.RIGHT)
+        refresh()
 
+    def on_watch_event(self, event):
+        """处理监控事件（界面线程）"""
+        detail = event["detail"]
+        if isinstance(detail, dict):
+            detail = "，".join(f"{format_field(field)} {'+' if diff > 0 else ''}{diff}"
+                              for field, diff in sorted(detail.items()))
+        line = f"{time.strftime('%H:%M:%S', time.localtime(event['time']))} {event['player']} {event['type']}"
+        if detail:
+            line += f"：{detail}"
+        self.watch_log = (self.watch_log + [line])[-200:]
+        dialog = getattr(self, 'watch_dialog', None)
+        if dialog is not None and dialog.winfo_exists():
+            dialog.log_text.insert(tk.END, line + "\n")
+            dialog.log_text.see(tk.END)
+        if event["type"] != "错误":
+            self.animate_status_bar(line, highlight=True)
+
+    # ---------- 辅助方法 ----------
     def fade_in_image(self, label, final_image, steps=10):
         """图像淡入效果"""
         if not hasattr(label, 'image') or not label.image:
@@ -509,40 +1187,27 @@ class HypixelStatsApp:
             self.root.after(50 * i, show_frame)
 
     def update_images(self, skin_data):
-        """更新皮肤显示"""
-        def load_image(url, label, size, is_skin=True):
-            try:
-                response = requests.get(url, timeout=10)
-                img = Image.open(BytesIO(response.content))
-                
-                # 处理透明背景
-                if img.mode in ('RGBA', 'LA'):
-                    bg = Image.new('RGB', img.size, (255,255,255))
-                    bg.paste(img, mask=img.split()[-1])
-                    img = bg
-                
-                # 智能缩放
-                w, h = img.size
-                target_w, target_h = size
-                scale = min(target_w/w, target_h/h)
-                img = img.resize((int(w*scale), int(h*scale)), Image.Resampling.LANCZOS)
-                
-                # 皮肤裁剪
-                if is_skin and img.height > img.width:
-                    img = img.crop((0, 0, img.width, img.height//2))
-                
-                photo = ImageTk.PhotoImage(img)
-                
-                # 使用淡入效果
-                self.fade_in_image(label, photo)
-                
-            except Exception as e:
-                print(f"图像加载失败: {str(e)}")
-
+        """更新皮肤显示（下载和解码在后台线程完成）"""
+        self.image_pipeline.begin_lookup()
+        
+        from PIL import ImageTk
+        
+        def show_image(img, label):
+            photo = ImageTk.PhotoImage(img)
+            # 使用淡入效果
+            self.fade_in_image(label, photo)
+        
+        def on_error(e):
+            print(f"图像加载失败: {str(e)}")
+        
         if skin_data.get("skin"):
-            self.root.after(0, load_image, skin_data["skin"], self.skin_label, (200, 400), True)
+            # 正面全身图（16x32 像素）按整数倍放大
+            self.image_pipeline.submit(skin_data["skin"], (150, 300), True,
+                                       lambda img: show_image(img, self.skin_label), on_error,
+                                       slim=skin_data.get("slim", False))
         if skin_data.get("cape"):
-            self.root.after(0, load_image, skin_data["cape"], self.cape_label, (200, 100), False)
+            self.image_pipeline.submit(skin_data["cape"], (200, 100), False,
+                                       lambda img: show_image(img, self.cape_label), on_error)
 
     def save_image(self, event):
         """保存图像到本地"""
@@ -571,23 +1236,13 @@ class HypixelStatsApp:
                         "3. 文件未被其他程序占用")
 
     def display_results(self, data):
-        """显示查询结果，带有渐变效果"""
-        self.data_panel.delete(1.0, tk.END)
-        formatted = json.dumps(data, indent=4, ensure_ascii=False)
-        
-        # 分段显示文本，创建渐变效果
-        def add_text(text, index=0, chunk_size=300):
-            if index < len(text):
-                end_index = min(index + chunk_size, len(text))
-                chunk = text[index:end_index]
-                self.data_panel.insert(tk.END, chunk)
-                self.data_panel.see(tk.END)
-                self.root.update_idletasks()
-                self.root.after(30, lambda: add_text(text, end_index, chunk_size))
-            else:
-                self.animate_status_bar("查询完成", highlight=True)
-        
-        add_text(formatted)
+        """显示查询结果；同一玩家刷新时只更新变化的行"""
+        if data.get("UUID") != getattr(self, '_displayed_uuid', None):
+            self.data_panel.clear()
+        self._displayed_uuid = data.get("UUID")
+        with self.client.metrics.time("render"):
+            self.data_panel.render(data)
+        self.animate_status_bar("查询完成", highlight=True)
 
     def show_error(self, message):
         """显示错误信息"""
@@ -599,54 +1254,11 @@ class HypixelStatsApp:
         if hasattr(self.search_btn, '_animation_id'):
             self.root.after_cancel(self.search_btn._animation_id)
         self.search_btn.config(state=tk.NORMAL)
+        self.batch_btn.config(state=tk.NORMAL)
+        self.guild_btn.config(state=tk.NORMAL)
         self.loading_anim.stop()  # 停止加载动画
         self.status_bar.config(text="准备就绪")
 
-    @staticmethod
-    def calculate_level(exp):
-        """计算玩家等级"""
-        if exp >= 14609081:
-            return round(200 + (exp - 14609081) / 96000, 2)
-        return round((math.sqrt(exp + 15312.5) - 125/math.sqrt(2)) / (25 * math.sqrt(2)), 2)
-
-    @staticmethod
-    def calculate_kd(kills, deaths):
-        """计算KD值"""
-        return round(kills / deaths, 2) if deaths > 0 else kills
-
-    @staticmethod
-    def format_timestamp(timestamp):
-        """格式化时间戳"""
-        if not timestamp:
-            return "未知"
-        return datetime.datetime.fromtimestamp(timestamp/1000).strftime("%Y-%m-%d %H:%M:%S")
-
-    def get_guild_info(self, data):
-        """获取公会信息"""
-        if "guild" not in data:
-            return "无"
-        return f"{data['guild'].get('name')} (等级: {data['guild'].get('guildLevel', 0)})"
-
-    def process_bedwars(self, stats):
-        """处理床战争数据"""
-        return {
-            "等级": stats.get("level", 0),
-            "最终击杀": stats.get("final_kills_bedwars", 0),
-            "最终死亡": stats.get("final_deaths_bedwars", 0),
-            "KD": self.calculate_kd(stats.get("final_kills_bedwars", 0), 
-                                  stats.get("final_deaths_bedwars", 0)),
-            "胜场": stats.get("wins_bedwars", 0)
-        }
-
-    def process_skywars(self, stats):
-        """处理空岛战争数据"""
-        return {
-            "等级": stats.get("level", 0),
-            "击杀": stats.get("kills", 0),
-            "死亡": stats.get("deaths", 0),
-            "KD": self.calculate_kd(stats.get("kills", 0), stats.get("deaths", 0))
-        }
-
 if __name__ == "__main__":
     root = tk.Tk()
     try:
@@ -654,5 +1266,7 @@ if __name__ == "__main__":
         windll.shcore.SetProcessDpiAwareness(1)
     except:
         pass
-    app = HypixelStatsApp(root)
+    # --no-splash 或环境变量 HYPIXEL_FINDER_NO_SPLASH 跳过启动动画
+    show_splash = "--no-splash" not in sys.argv and not os.environ.get("HYPIXEL_FINDER_NO_SPLASH")
+    app = HypixelStatsApp(root, show_splash=show_splash)
     root.mainloop()
@@ -0,0 +1,300 @@
+import asyncio
+import json
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from itertools import islice
+from urllib.parse import urlsplit
+
+from batch import upcoming_names
+from hypixel_core import HypixelClient, PLAYER_URL, PROFILE_URL, UUID_URL, parse_uuid_response
+from key_pool import KeyPool
+from player_parse import parse_player_response
+from profile_cache import ProfileCache
+from singleflight import name_key, uuid_key
+
+
+def _load_aiohttp():
+    try:
+        import aiohttp
+        return aiohttp
+    except ImportError:
+        return None
+
+
+class AsyncHypixelClient:
+    """基于 asyncio 的查询后端
+
+    Hypixel 与 sessionserver 请求并发执行，任一请求出错时取消其余请求并抛出异常。
+    安装了 aiohttp 时所有请求都在事件循环内完成，不再为每个请求占用线程；
+    否则退回到有限大小的线程池执行同步请求。UUID缓存、限流和数据处理与 HypixelClient 共用。
+    """
+    def __init__(self, client=None, max_concurrency=200, executor_workers=16):
+        self.client = client or HypixelClient()
+        self.scheduler = self.client.scheduler
+        self.uuid_cache = self.client.uuid_cache
+        self.metrics = self.client.metrics
+        self.max_concurrency = max_concurrency
+        self.executor_workers = executor_workers
+        self._aiohttp = None
+        self._aiohttp_checked = False
+        self._session = None
+        self._executor = None
+        self._semaphore = None
+        self._refresh_tasks = set()
+
+    # ---------- 网络请求 ----------
+    def _parse_player(self, body):
+        return parse_player_response(body, self.client.player_spec)
+
+    def _fetch_sync(self, url, timeout):
+        response = self.client.http.get(url, timeout=timeout)
+        return response.status_code, response.headers, response.content
+
+    async def _fetch(self, url, timeout):
+        """发出一次 GET 请求，返回 (状态码, 响应头, 原始响应体)"""
+        if not self._aiohttp_checked:
+            # 第一次请求时才导入 aiohttp，避免拖慢启动
+            self._aiohttp = _load_aiohttp()
+            self._aiohttp_checked = True
+        # 录制/回放时所有请求都要经过 client.http
+        if self._aiohttp is not None and not getattr(self.client.http, "intercepts", False):
+            if self._session is None:
+                connector = self._aiohttp.TCPConnector(limit=self.max_concurrency)
+                self._session = self._aiohttp.ClientSession(connector=connector)
+            async with self._session.get(url, timeout=self._aiohttp.ClientTimeout(total=timeout)) as response:
+                return response.status, response.headers, await response.read()
+
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self.executor_workers, thread_name_prefix="async-http")
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, self._fetch_sync, url, timeout)
+
+    async def _request(self, url, timeout, key=None, parse=json.loads, retry_throttled=True):
+        """经过限流和容错处理的 GET 请求，返回 (状态码, 解析后的响应)
+
+        响应体在重试结束后才解析，5xx 的网关错误页不会被当作解析错误而跳过重试；
+        retry_throttled 为 False 时遇到 429 直接返回，由调用方处理。
+        """
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+
+        async def acquire():
+            await self.scheduler.acquire_async(url, key)
+
+        async def send():
+            async with self._semaphore:
+                return await self._fetch(url, timeout)
+
+        retries = self.scheduler.max_throttle_retries if retry_throttled else 0
+        for attempt in range(retries + 1):
+            status, headers, content = await self.scheduler.resilience.call_async(
+                urlsplit(url).netloc, send, acquire=acquire, can_hedge=lambda: self.scheduler.has_capacity(url, key)
+            )
+            if not self.scheduler.observe(url, key, status, headers):
+                break
+            if attempt < retries:
+                self.scheduler.count_retry()
+        return status, parse(content) if status != 204 else None
+
+    # ---------- 数据获取 ----------
+    async def get_uuid(self, player_name):
+        """获取玩家UUID，失败时抛出异常"""
+        batcher = self.client.uuid_batcher
+        # prefetch 提交的名字已经计入缓存统计
+        hit, uuid = self.uuid_cache.get(player_name, count=batcher is None or not batcher.take_prefetched(player_name))
+        if hit:
+            if not uuid:
+                raise Exception("玩家不存在")
+            return uuid
+        if batcher is not None:
+            # 批量请求在后台线程中完成，这里只等待结果
+            try:
+                uuid = await asyncio.wrap_future(batcher.submit(player_name))
+            except Exception as e:
+                message = str(e)
+                raise Exception(message if message.startswith("获取UUID失败") else f"获取UUID失败: {message}") from e
+            if not uuid:
+                raise Exception("玩家不存在")
+            return uuid
+
+        async def fetch():
+            # 与 HypixelClient.get_uuid 返回相同的 (UUID, 错误信息)，以便与同步调用方共享结果
+            try:
+                with self.metrics.time("uuid"):
+                    status, content = await self._request(UUID_URL.format(name=player_name), 10, parse=bytes)
+                uuid, error = parse_uuid_response(status, content)
+            except Exception as e:
+                return None, f"获取UUID失败: {str(e)}"
+            if uuid or error == "玩家不存在":
+                self.uuid_cache.put(player_name, uuid)
+            return uuid, error
+
+        uuid, error = await self.client.singleflight.do_async(name_key("uuid", player_name), fetch)
+        if error:
+            raise Exception(error)
+        return uuid
+
+    async def get_hypixel_data(self, api_key, uuid):
+        """获取Hypixel数据；api_key 可以是单个密钥或 KeyPool，失败时抛出异常"""
+        pool = api_key if isinstance(api_key, KeyPool) else None
+        attempts = len(pool) + 1 if pool else self.scheduler.max_throttle_retries + 1
+
+        async def fetch():
+            # 与 HypixelClient.get_hypixel_data 返回相同的 (玩家数据, 错误信息)，以便与同步调用方共享结果
+            error = "未知API错误"
+            for attempt in range(attempts):
+                if attempt:
+                    self.metrics.incr("retries", reason="key_switch" if pool else "throttled")
+                key = pool.acquire() if pool else api_key
+                status, cause = None, None
+                try:
+                    with self.metrics.time("hypixel"):
+                        status, data = await self._request(
+                            PLAYER_URL.format(key=key, uuid=uuid), 15, key, parse=self._parse_player,
+                            retry_throttled=False
+                        )
+                    if data.get("success"):
+                        return data.get("player"), None
+                    cause = error = data.get("cause", "未知API错误")
+                    self.metrics.incr("errors", phase="hypixel")
+                except Exception as e:
+                    return None, f"API请求失败: {str(e)}"
+                finally:
+                    if pool:
+                        pool.release(key, status, cause)
+                # 密钥池可换用其他密钥重试；单个密钥只在被限流时等待后重试
+                if status != 429 and not (pool and status == 403):
+                    break
+            return None, error
+
+        player, error = await self.client.singleflight.do_async(uuid_key("player", uuid), fetch)
+        if error:
+            raise Exception(error)
+        return player
+
+    async def get_skin_data(self, uuid):
+        """获取皮肤数据，失败时返回空字典（不影响主查询）"""
+        async def fetch():
+            try:
+                with self.metrics.time("skin_profile"):
+                    status, profile = await self._request(PROFILE_URL.format(uuid=uuid), 10)
+                return self.client.parse_textures(profile or {})
+            except Exception as e:
+                print(f"皮肤数据获取失败: {str(e)}", file=sys.stderr)
+                return {}
+
+        return await self.client.singleflight.do_async(uuid_key("skin", uuid), fetch)
+
+    async def lookup(self, api_key, player_name, on_refresh=None, allow_stale=False):
+        """完整查询一名玩家，返回 (整合后的数据, 皮肤数据)"""
+        processed_data, skin_data, _ = await self.lookup_cached(api_key, player_name, on_refresh, allow_stale)
+        return processed_data, skin_data
+
+    async def lookup_cached(self, api_key, player_name, on_refresh=None, allow_stale=False):
+        """查询玩家，优先使用缓存，返回 (整合后的数据, 皮肤数据, 缓存年龄秒数)
+
+        缓存已过期时：allow_stale 为 True 先返回旧数据，同时在后台刷新，完成后调用
+        on_refresh(整合后的数据, 皮肤数据)；否则直接重新获取（与 HypixelClient.lookup_cached 相同）。
+        """
+        uuid = await self.get_uuid(player_name)
+        cache = self.client.profile_cache
+        state, entry = cache.lookup(uuid)
+        if state == ProfileCache.MISS or (state == ProfileCache.STALE and not allow_stale):
+            processed_data, skin_data = await self.fetch_profile(api_key, uuid)
+            return processed_data, skin_data, None
+        if state == ProfileCache.STALE and cache.begin_refresh(uuid):
+            task = asyncio.ensure_future(self._refresh_profile(api_key, uuid, on_refresh))
+            # 保留引用，避免任务被回收
+            self._refresh_tasks.add(task)
+            task.add_done_callback(self._refresh_tasks.discard)
+        return entry["data"], entry["skin"], cache.age(entry)
+
+    async def fetch_profile(self, api_key, uuid):
+        """并发获取 Hypixel 数据和皮肤数据，处理后写入缓存；同一UUID同时只获取一次（与同步客户端共享）"""
+        async def fetch():
+            hypixel_task = asyncio.ensure_future(self.get_hypixel_data(api_key, uuid))
+            skin_task = asyncio.ensure_future(self.get_skin_data(uuid))
+            try:
+                hypixel_data, skin_data = await asyncio.gather(hypixel_task, skin_task)
+            except BaseException:
+                # 出错或被取消时不留下悬空的请求
+                hypixel_task.cancel()
+                skin_task.cancel()
+                raise
+            if not hypixel_data:
+                raise Exception("该玩家没有Hypixel数据")
+            with self.metrics.time("process_data"):
+                processed_data = self.client.process_data(hypixel_data, uuid, skin_data)
+            self.client.store_profile(uuid, processed_data, skin_data)
+            return processed_data, skin_data
+
+        return await self.client.singleflight.do_async(uuid_key("profile", uuid), fetch)
+
+    async def _refresh_profile(self, api_key, uuid, on_refresh):
+        """后台刷新过期的缓存"""
+        try:
+            processed_data, skin_data = await self.fetch_profile(api_key, uuid)
+            if on_refresh:
+                on_refresh(processed_data, skin_data)
+        except Exception as e:
+            print(f"后台刷新失败: {str(e)}", file=sys.stderr)
+        finally:
+            self.client.profile_cache.end_refresh(uuid)
+
+    async def lookup_many(self, api_key, player_names):
+        """并发查询多名玩家，按完成顺序逐个产出结果"""
+        async def lookup_one(player_name):
+            result = {"player": player_name, "uuid": None, "data": None, "skin": {}, "cache_age": None,
+                      "error": None}
+            try:
+                result["data"], result["skin"], result["cache_age"] = await self.lookup_cached(
+                    api_key, player_name
+                )
+                result["uuid"] = result["data"]["UUID"]
+            except Exception as e:
+                result["error"] = str(e)
+            return result
+
+        window = self.max_concurrency * 2
+        names = upcoming_names(self.client, player_names, window)
+        pending = set()
+        try:
+            while True:
+                for name in islice(names, window - len(pending)):
+                    pending.add(asyncio.ensure_future(lookup_one(name)))
+                if not pending:
+                    break
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    yield task.result()
+        finally:
+            for task in pending:
+                task.cancel()
+
+    async def close(self):
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+
+class AsyncRunner:
+    """在后台线程中运行事件循环，同步代码（如 Tk 界面）通过 submit 提交协程而不阻塞"""
+    def __init__(self):
+        self.loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._run, name="asyncio-loop", daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        asyncio.set_event_loop(self.loop)
+        self.loop.run_forever()
+
+    def submit(self, coro):
+        """提交协程，返回 concurrent.futures.Future（可调用 cancel 取消）"""
+        return asyncio.run_coroutine_threadsafe(coro, self.loop)
+
+    def stop(self):
+        self.loop.call_soon_threadsafe(self.loop.stop)
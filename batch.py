@@ -0,0 +1,120 @@
+import re
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from itertools import islice
+
+
+def parse_player_list(text):
+    """解析玩家列表文本（支持换行、逗号、空白分隔），去重并保持原有顺序"""
+    names = []
+    seen = set()
+    # 去掉以 # 开头的注释
+    text = re.sub(r"#.*", "", text or "")
+    for name in re.split(r"[\s,;，；]+", text):
+        if not name:
+            continue
+        key = name.lower()
+        if key in seen:
+            continue
+        seen.add(key)
+        names.append(name)
+    return names
+
+
+def load_player_file(path):
+    """从文本文件读取玩家列表"""
+    with open(path, "r", encoding="utf-8-sig") as f:
+        return parse_player_list(f.read())
+
+
+def run_stats(total, succeeded, elapsed, **extra):
+    """批量查询的统计：总数、成功、失败、耗时和吞吐量（玩家/秒），extra 为附加的统计项"""
+    stats = {"总数": total, "成功": succeeded, "失败": total - succeeded}
+    stats.update(extra)
+    stats["耗时"] = round(elapsed, 3)
+    stats["吞吐量"] = round(total / elapsed, 2) if elapsed > 0 else 0.0
+    return stats
+
+
+def upcoming_names(client, player_names, window):
+    """逐个产出待查询的玩家名
+
+    调用方同时排队的任务数不超过 window，已产出的结果不再被引用，内存占用与玩家总数无关；
+    客户端有批量UUID解析时，即将查询的玩家名会提前交给它，每10个名字只需一次 Mojang 请求。
+    """
+    batcher = getattr(client, "uuid_batcher", None)
+    if batcher is None:
+        return iter(player_names)
+    return batcher.prefetch_ahead(player_names, window)
+
+
+class BatchLookup:
+    """批量查询引擎：使用有限大小的线程池并发查询玩家，每完成一个就立即回调"""
+    def __init__(self, client, api_key, max_workers=8):
+        self.client = client
+        self.api_key = api_key
+        self.max_workers = max(1, int(max_workers))
+        self._cancelled = threading.Event()
+        self.stats = {}
+
+    def cancel(self):
+        """取消尚未开始的查询"""
+        self._cancelled.set()
+
+    @property
+    def cancelled(self):
+        return self._cancelled.is_set()
+
+    def lookup_one(self, player_name):
+        """查询单个玩家：UUID -> Hypixel数据 / 皮肤数据 -> 整合处理"""
+        # cache_age 为使用的缓存数据的年龄（秒），None 表示刚从网络获取
+        result = {"player": player_name, "uuid": None, "data": None, "skin": {}, "cache_age": None,
+                  "error": None}
+        if self.cancelled:
+            result["error"] = "已取消"
+            return result
+        try:
+            result["data"], result["skin"], result["cache_age"] = self.client.lookup_cached(
+                self.api_key, player_name
+            )
+            result["uuid"] = result["data"]["UUID"]
+        except Exception as e:
+            result["error"] = str(e)
+        return result
+
+    def iter_results(self, player_names):
+        """按完成顺序逐个产出查询结果"""
+        self._cancelled.clear()
+        start = time.perf_counter()
+        total = succeeded = 0
+
+        window = self.max_workers * 4
+        names = upcoming_names(self.client, player_names, window)
+        pending = set()
+        with ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="batch") as pool:
+            try:
+                while True:
+                    for name in islice(names, window - len(pending)):
+                        pending.add(pool.submit(self.lookup_one, name))
+                    if not pending:
+                        break
+                    done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        result = future.result()
+                        total += 1
+                        if not result["error"]:
+                            succeeded += 1
+                        yield result
+            finally:
+                # 提前退出时不再执行排队中的任务
+                for future in pending:
+                    future.cancel()
+                self.stats = run_stats(total, succeeded, time.perf_counter() - start)
+
+    def run(self, player_names, on_result=None):
+        """执行批量查询，返回统计信息（含每秒查询玩家数）"""
+        for result in self.iter_results(player_names):
+            if on_result:
+                on_result(result)
+        return self.stats
@@ -0,0 +1,61 @@
+"""对比直接 requests.get 与共享连接池的单次查询延迟
+
+一次查询 = UUID + Hypixel + 皮肤档案 + 材质 共4个请求。
+用法: python benchmarks/bench_http_pool.py [查询次数] [响应延迟毫秒] [握手延迟毫秒]
+"""
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+import requests
+
+from benchmarks.stub_server import FAKE_UUID, start_stub_server
+from http_pool import HttpPool
+
+
+def lookup(get, base_url):
+    get(f"{base_url}/users/profiles/minecraft/Stub", timeout=10).json()
+    get(f"{base_url}/player?key=test&uuid={FAKE_UUID}", timeout=15).json()
+    get(f"{base_url}/session/minecraft/profile/{FAKE_UUID}", timeout=10).json()
+    get(f"{base_url}/texture/skin", timeout=10).content
+
+
+def measure(get, base_url, rounds):
+    samples = []
+    for _ in range(rounds):
+        start = time.perf_counter()
+        lookup(get, base_url)
+        samples.append((time.perf_counter() - start) * 1000)
+    samples.sort()
+    return {
+        "平均": statistics.mean(samples),
+        "p50": samples[len(samples) // 2],
+        "p99": samples[min(len(samples) - 1, int(len(samples) * 0.99))],
+    }
+
+
+def main():
+    rounds = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    latency = float(sys.argv[2]) / 1000 if len(sys.argv) > 2 else 0.0
+    handshake = float(sys.argv[3]) / 1000 if len(sys.argv) > 3 else 30.0 / 1000
+    server, base_url = start_stub_server(latency=latency, handshake_latency=handshake)
+    pool = HttpPool(pool_size=4)
+    try:
+        results = {
+            "requests.get": measure(requests.get, base_url, rounds),
+            "HttpPool": measure(pool.get, base_url, rounds),
+        }
+    finally:
+        pool.close()
+        server.shutdown()
+
+    print(f"{rounds} 次查询, 每次4个请求, 响应延迟 {latency * 1000:.0f}ms, 握手延迟 {handshake * 1000:.0f}ms")
+    for name, r in results.items():
+        print(f"{name:>14}: 平均 {r['平均']:.2f}ms  p50 {r['p50']:.2f}ms  p99 {r['p99']:.2f}ms")
+
+
+if __name__ == "__main__":
+    main()
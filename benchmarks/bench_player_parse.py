@@ -0,0 +1,75 @@
+"""对比完整 json.loads 与白名单解析 /player 响应的耗时和峰值内存
+
+用法:
+    python benchmarks/bench_player_parse.py                 # 使用生成的大型档案
+    python benchmarks/bench_player_parse.py a.json b.json   # 使用录制的 /player 响应
+"""
+import json
+import os
+import random
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from player_parse import parse_player_response
+
+GAMES = ["Bedwars", "Duels", "SkyWars", "Arcade", "HungerGames", "MurderMystery", "BuildBattle",
+         "UHC", "Walls3", "TNTGames", "Paintball", "Quake", "VampireZ", "MCGO", "SuperSmash",
+         "SpeedUHC", "Pit", "Housing", "Legacy", "SkyBlock", "WoolGames", "Battleground"]
+
+
+def make_profile(stats_per_game=1500, achievements=3000, seed=0):
+    """生成一个接近活跃玩家体量的 /player 响应"""
+    rng = random.Random(seed)
+    stats = {
+        game: {f"{game.lower()}_stat_{i}": rng.randint(0, 100000) for i in range(stats_per_game)}
+        for game in GAMES
+    }
+    stats["Duels"].update({"wins": 1200, "kills": 3400, "deaths": 1100, "bridge_duel_wins": 321})
+    player = {
+        "uuid": "069a79f444e94726a5befca90e38aaf5",
+        "displayname": "Recorded",
+        "firstLogin": 1400000000000,
+        "lastLogin": 1700000000000,
+        "networkExp": 12345678,
+        "karma": 987654,
+        "achievements": {f"general_achievement_{i}": rng.randint(0, 5000) for i in range(achievements)},
+        "achievementsOneTime": [f"one_time_{i}" for i in range(achievements)],
+        "quests": {f"quest_{i}": {"completions": [{"time": 1600000000000 + j} for j in range(5)]}
+                   for i in range(500)},
+        "stats": stats,
+    }
+    return json.dumps({"success": True, "player": player}).encode("utf-8")
+
+
+def measure(parse, payload, rounds):
+    tracemalloc.start()
+    parse(payload)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    start = time.perf_counter()
+    for _ in range(rounds):
+        parse(payload)
+    return (time.perf_counter() - start) / rounds * 1000, peak / 1024 / 1024
+
+
+def main():
+    if len(sys.argv) > 1:
+        payloads = {os.path.basename(p): open(p, "rb").read() for p in sys.argv[1:]}
+    else:
+        payloads = {"生成档案": make_profile()}
+
+    for name, payload in payloads.items():
+        assert parse_player_response(payload)["player"]["stats"].get("Duels") == \
+            json.loads(payload)["player"]["stats"].get("Duels")
+        print(f"{name}: {len(payload) / 1024:.0f} KB")
+        for label, parse in (("json.loads", json.loads), ("白名单解析", parse_player_response)):
+            elapsed, peak = measure(parse, payload, rounds=20)
+            print(f"  {label:>10}: {elapsed:8.2f} ms/次  峰值内存 {peak:7.2f} MB")
+
+
+if __name__ == "__main__":
+    main()
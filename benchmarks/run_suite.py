@@ -0,0 +1,244 @@
+"""端到端基准测试：单次查询延迟、批量查询吞吐量、process_data 耗时和材质解码耗时
+
+所有请求都经 replay.HostRewriteHttp 发往本地桩服务器，可回放录制的夹具并注入延迟和错误。
+结果保存到 benchmarks/results/<标签>.json，指定 --compare 时与之前的结果对比，
+任一指标变差超过阈值时以退出码 1 结束。
+
+录制夹具:
+    python cli.py Notch jeb_ -k <API密钥> --record benchmarks/fixtures/live.json
+
+用法:
+    python benchmarks/run_suite.py --label baseline
+    python benchmarks/run_suite.py --compare benchmarks/results/baseline.json
+    python benchmarks/run_suite.py --fixtures benchmarks/fixtures/live.json --latency 40 --error-rate 0.02
+"""
+import argparse
+import datetime
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, ROOT)
+
+RESULTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "results")
+
+# 指标 -> 是否越大越好
+METRICS = {
+    "单次查询.平均(ms)": False,
+    "单次查询.p50(ms)": False,
+    "单次查询.p99(ms)": False,
+    "批量查询.吞吐量(玩家/秒)": True,
+    "process_data(微秒/次)": False,
+    "材质解码(毫秒/次)": False,
+}
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="端到端基准测试")
+    parser.add_argument("--fixtures", help="回放的夹具文件（未录制的请求使用模拟响应）")
+    parser.add_argument("--latency", type=float, default=20.0, help="每个请求的响应延迟（毫秒）")
+    parser.add_argument("--jitter", type=float, default=0.0, help="额外随机延迟上限（毫秒）")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="返回 503 的请求比例")
+    parser.add_argument("--rounds", type=int, default=50, help="单次查询的次数")
+    parser.add_argument("--players", type=int, default=300, help="批量查询的玩家数")
+    parser.add_argument("--workers", type=int, default=16, help="批量查询并发数")
+    parser.add_argument("--label", help="结果文件名（默认使用当前时间）")
+    parser.add_argument("--compare", metavar="文件", help="与之前保存的结果对比")
+    parser.add_argument("--threshold", type=float, default=0.1, help="判定为性能回退的变化比例")
+    return parser
+
+
+def make_client(base_url, directory):
+    """创建所有请求都发往桩服务器、不限流的客户端
+
+    UUID缓存放在本次运行的临时目录中，按正常有效期复用；玩家数据缓存立即过期，每次查询都会请求。
+    """
+    from http_pool import HttpPool
+    from hypixel_core import HypixelClient
+    from profile_cache import ProfileCache
+    from rate_limit import RequestScheduler
+    from replay import HostRewriteHttp
+    from uuid_cache import UUIDCache
+
+    http = HostRewriteHttp(HttpPool(pool_size=32), base_url)
+    unlimited = (10 ** 9, 1)
+    scheduler = RequestScheduler(
+        http,
+        host_limits={"api.mojang.com": unlimited, "sessionserver.mojang.com": unlimited},
+        key_limit=unlimited
+    )
+    return HypixelClient(
+        http=http,
+        scheduler=scheduler,
+        uuid_cache=UUIDCache(os.path.join(directory, "uuid_cache.json")),
+        profile_cache=ProfileCache(os.path.join(directory, "profiles"), fresh_ttl=0, max_age=0)
+    )
+
+
+def player_names(fixtures, count, prefix):
+    """优先使用夹具中录制过的玩家名"""
+    if fixtures:
+        from replay import FixtureStore
+        names = sorted(name for name, uuid in FixtureStore(fixtures).known_uuids().items() if uuid)
+        if names:
+            return [names[i % len(names)] for i in range(count)]
+    return [f"{prefix}{i}" for i in range(count)]
+
+
+def summarize_ms(samples):
+    samples = sorted(samples)
+    return {
+        "平均(ms)": round(statistics.mean(samples), 2),
+        "p50(ms)": round(samples[len(samples) // 2], 2),
+        "p99(ms)": round(samples[min(len(samples) - 1, int(len(samples) * 0.99))], 2),
+    }
+
+
+def bench_single(client, names):
+    samples = []
+    failures = 0
+    for name in names:
+        start = time.perf_counter()
+        try:
+            client.lookup("bench", name)
+        except Exception:
+            failures += 1
+        samples.append((time.perf_counter() - start) * 1000)
+    return dict(summarize_ms(samples), 失败=failures)
+
+
+def bench_batch(client, names, workers):
+    from batch import BatchLookup
+
+    stats = BatchLookup(client, "bench", max_workers=workers).run(names)
+    return {"吞吐量(玩家/秒)": stats["吞吐量"], "耗时(秒)": stats["耗时"], "失败": stats["失败"]}
+
+
+def bench_process_data(client, rounds=2000):
+    from benchmarks.stub_server import make_player, stub_uuid
+
+    uuid = stub_uuid("bench")
+    data = make_player(uuid)
+    skin = {"skin": "http://textures.minecraft.net/texture/stub", "cape": None}
+    start = time.perf_counter()
+    for _ in range(rounds):
+        client.process_data(data, uuid, skin)
+    return round((time.perf_counter() - start) / rounds * 1e6, 2)
+
+
+def bench_image_decode(rounds=200):
+    """材质解码和缩放耗时；没有安装 PIL 时跳过"""
+    try:
+        from imaging import render_texture
+    except ImportError:
+        return None
+    from benchmarks.stub_server import make_png
+
+    data = make_png()
+    start = time.perf_counter()
+    for _ in range(rounds):
+        render_texture(data, (150, 300), is_skin=True)
+    return round((time.perf_counter() - start) / rounds * 1000, 3)
+
+
+def git_revision():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True,
+                              text=True, timeout=5).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+def flatten(results):
+    flat = {}
+    for section, value in results.items():
+        if isinstance(value, dict):
+            for key, item in value.items():
+                flat[f"{section}.{key}"] = item
+        else:
+            flat[section] = value
+    return flat
+
+
+def compare(current, baseline, threshold):
+    """打印与基准结果的对比，返回变差超过阈值的指标"""
+    new, old = flatten(current["结果"]), flatten(baseline["结果"])
+    regressions = []
+    print(f"\n与 {baseline.get('标签')} ({baseline.get('版本') or '未知版本'}) 对比:")
+    for metric, higher_is_better in METRICS.items():
+        if not isinstance(new.get(metric), (int, float)) or not isinstance(old.get(metric), (int, float)):
+            continue
+        if old[metric] == 0:
+            continue
+        change = (new[metric] - old[metric]) / old[metric]
+        worse = -change if higher_is_better else change
+        flag = "  <-- 回退" if worse > threshold else ""
+        if flag:
+            regressions.append(metric)
+        print(f"  {metric:<24} {old[metric]:>10} -> {new[metric]:>10}  ({change:+.1%}){flag}")
+    return regressions
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    from benchmarks.stub_server import start_stub_server
+
+    server, base_url = start_stub_server(
+        latency=args.latency / 1000, jitter=args.jitter / 1000, fixtures=args.fixtures,
+        error_rate=args.error_rate, seed=0
+    )
+    with tempfile.TemporaryDirectory() as directory:
+        os.environ["HYPIXEL_FINDER_HOME"] = directory
+        client = make_client(base_url, directory)
+        try:
+            results = {
+                "单次查询": bench_single(client, player_names(args.fixtures, args.rounds, "single")),
+                "批量查询": bench_batch(client, player_names(args.fixtures, args.players, "batch"), args.workers),
+                "process_data(微秒/次)": bench_process_data(client),
+                "材质解码(毫秒/次)": bench_image_decode(),
+            }
+            phases = client.metrics.snapshot()["阶段耗时(毫秒)"]
+        finally:
+            # 临时目录删除前写入缓存，避免退出时再保存失败
+            client.uuid_cache.flush()
+            client.http.close()
+            server.shutdown()
+
+    label = args.label or datetime.datetime.now().strftime("%Y%m%d-%H%M%S")
+    report = {
+        "标签": label,
+        "版本": git_revision(),
+        "时间": datetime.datetime.now().isoformat(timespec="seconds"),
+        "Python": platform.python_version(),
+        "平台": platform.platform(),
+        "参数": {"延迟(ms)": args.latency, "抖动(ms)": args.jitter, "错误率": args.error_rate,
+                 "夹具": args.fixtures, "单次查询次数": args.rounds, "批量人数": args.players,
+                 "并发数": args.workers},
+        "桩服务器": dict(server.counters),
+        "结果": results,
+        "阶段耗时(毫秒)": phases,
+    }
+    print(json.dumps(report["结果"], indent=4, ensure_ascii=False))
+
+    os.makedirs(RESULTS_DIR, exist_ok=True)
+    path = os.path.join(RESULTS_DIR, f"{label}.json")
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=4, ensure_ascii=False)
+    print(f"结果已保存至: {path}")
+
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+        if compare(report, baseline, args.threshold):
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
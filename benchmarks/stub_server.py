@@ -0,0 +1,225 @@
+"""本地桩服务器，模拟 Mojang / sessionserver / Hypixel / 材质接口，供基准测试和离线回放使用
+
+请求路径可以带原始主机名前缀（/api.mojang.com/users/...，由 replay.HostRewriteHttp 生成）。
+提供夹具文件时优先回放录制的响应，没有录制的请求使用内置的模拟响应。
+支持固定延迟、随机抖动以及按比例注入错误响应或直接断开连接。
+"""
+import base64
+import hashlib
+import json
+import random
+import struct
+import threading
+import time
+import zlib
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qsl, urlsplit
+
+from replay import FixtureStore, request_key
+
+FAKE_UUID = "069a79f444e94726a5befca90e38aaf5"
+TEXTURE_URL = "http://textures.minecraft.net/texture/stub"
+
+
+def stub_uuid(name):
+    """模拟的玩家UUID：同一玩家名总是得到同一个UUID"""
+    return hashlib.md5(name.lower().encode("utf-8")).hexdigest()
+
+
+def _texture_property():
+    value = {"textures": {"SKIN": {"url": TEXTURE_URL}}}
+    return base64.b64encode(json.dumps(value).encode()).decode()
+
+
+def make_png(width=64, height=64):
+    """生成一张 RGBA PNG（不依赖 PIL），用于模拟皮肤材质"""
+    def chunk(kind, data):
+        return struct.pack(">I", len(data)) + kind + data + struct.pack(">I", zlib.crc32(kind + data))
+
+    rows = b"".join(
+        b"\x00" + b"".join(bytes((x * 4 % 256, y * 4 % 256, 128, 255 if y < height // 2 else 0))
+                           for x in range(width))
+        for y in range(height)
+    )
+    header = struct.pack(">IIBBBBB", width, height, 8, 6, 0, 0, 0)
+    return b"\x89PNG\r\n\x1a\n" + chunk(b"IHDR", header) + chunk(b"IDAT", zlib.compress(rows)) + chunk(b"IEND", b"")
+
+
+def make_player(uuid, name="Stub"):
+    """生成包含 stat_schema.json 中各游戏统计的 /player 数据"""
+    rng = random.Random(uuid)
+    return {
+        "uuid": uuid,
+        "displayname": name,
+        "firstLogin": 1400000000000,
+        "lastLogin": 1700000000000,
+        "networkExp": rng.randint(100000, 20000000),
+        "karma": rng.randint(0, 1000000),
+        "achievements": {f"general_achievement_{i}": rng.randint(0, 5000) for i in range(300)},
+        "stats": {
+            "Bedwars": {
+                "level": rng.randint(0, 1000),
+                "final_kills_bedwars": rng.randint(0, 20000),
+                "final_deaths_bedwars": rng.randint(0, 10000),
+                "wins_bedwars": rng.randint(0, 5000),
+                **{f"bedwars_stat_{i}": rng.randint(0, 1000) for i in range(200)}
+            },
+            "Duels": {
+                "wins": rng.randint(0, 10000), "kills": rng.randint(0, 20000), "deaths": rng.randint(0, 10000),
+                "bridge_duel_wins": rng.randint(0, 3000), "bridge_duel_kills": rng.randint(0, 3000),
+                **{f"duels_stat_{i}": rng.randint(0, 1000) for i in range(200)}
+            },
+            "SkyWars": {"wins": rng.randint(0, 3000), "kills": rng.randint(0, 10000),
+                        "deaths": rng.randint(0, 10000)},
+        },
+    }
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    # HTTP/1.1 才能保持长连接
+    protocol_version = "HTTP/1.1"
+    # 头部与正文分开写出，关闭 Nagle 避免与延迟 ACK 叠加
+    disable_nagle_algorithm = True
+
+    def setup(self):
+        # 模拟新连接的 TCP+TLS 握手开销
+        time.sleep(self.server.handshake_latency)
+        super().setup()
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send(self, status, body=b"", content_type="application/json", headers=None):
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        for name, value in (headers or {}).items():
+            if name.lower() not in ("content-type", "content-length"):
+                self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _send_json(self, obj, status=200):
+        self._send(status, json.dumps(obj).encode())
+
+    def do_GET(self):
+        self._handle("GET", None)
+
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        try:
+            payload = json.loads(body) if body else None
+        except ValueError:
+            payload = body
+        self._handle("POST", payload)
+
+    def _handle(self, method, payload):
+        server = self.server
+        server.count("requests")
+        time.sleep(server.latency + (server.rng.uniform(0, server.jitter) if server.jitter else 0.0))
+
+        # 去掉主机名前缀
+        host, path = None, self.path
+        first = path.split("?", 1)[0][1:].split("/", 1)[0]
+        if "." in first:
+            host, path = first, path[len(first) + 1:] or "/"
+
+        if server.drop_rate and server.rng.random() < server.drop_rate:
+            server.count("dropped")
+            self.close_connection = True
+            return
+        if server.error_rate and server.rng.random() < server.error_rate:
+            server.count("errors")
+            self._send_json({"success": False, "cause": "Injected error"}, status=server.error_status)
+            return
+        if server.fixtures is not None and host:
+            matched = server.fixtures.match(request_key(method, f"https://{host}{path}", payload))
+            if matched is not None:
+                server.count("replayed")
+                status, headers, content = matched
+                self._send(status, content, headers.get("Content-Type", "application/json"), headers)
+                return
+        if method == "POST":
+            self._route_post(path, payload)
+        else:
+            self._route_get(path)
+
+    def _uuid_for(self, name):
+        """按名字回答UUID请求（分组方式可能与录制时不同）
+
+        录制中有该玩家时使用录制的结果；名字以 "missing" 开头的玩家视为不存在。
+        """
+        known = self.server.known_uuids
+        if name.lower() in known:
+            return known[name.lower()]
+        return None if name.lower().startswith("missing") else stub_uuid(name)
+
+    def _route_get(self, path):
+        query = dict(parse_qsl(urlsplit(path).query))
+        if path.startswith("/users/profiles/minecraft/"):
+            name = path.rsplit("/", 1)[-1]
+            uuid = self._uuid_for(name)
+            if uuid is None:
+                self._send(204)
+            else:
+                self._send_json({"id": uuid, "name": name})
+        elif path.startswith("/session/minecraft/profile/"):
+            uuid = path.rsplit("/", 1)[-1]
+            self._send_json({"id": uuid, "properties": [{"name": "textures", "value": _texture_property()}]})
+        elif path.startswith("/player"):
+            self._send_json({"success": True, "player": make_player(query.get("uuid", FAKE_UUID))})
+        elif path.startswith("/guild"):
+            members = [{"uuid": f"{i:032x}", "rank": "Member", "joined": 0} for i in range(self.server.guild_size)]
+            self._send_json({"success": True, "guild": {"name": "Stub", "tag": "STB", "exp": 1234567,
+                                                        "members": members}})
+        elif path.startswith("/status"):
+            self._send_json({"success": True, "session": {"online": True, "gameType": "BEDWARS", "mode": "EIGHT_ONE"}})
+        elif path.startswith("/texture/"):
+            self._send(200, self.server.texture, "image/png")
+        else:
+            self._send_json({"success": False, "cause": "Not found"}, status=404)
+
+    def _route_post(self, path, payload):
+        if path.startswith("/profiles/minecraft"):
+            # 批量UUID接口：名字以 "missing" 开头的玩家视为不存在
+            profiles = [{"id": self._uuid_for(name), "name": name} for name in payload or []]
+            self._send_json([profile for profile in profiles if profile["id"]])
+        else:
+            self._send_json({"success": False, "cause": "Not found"}, status=404)
+
+
+class StubServer(ThreadingHTTPServer):
+    daemon_threads = True
+    # 大量并发连接时避免监听队列溢出
+    request_queue_size = 1024
+    # /guild 返回的成员数
+    guild_size = 100
+
+    def count(self, name):
+        with self.lock:
+            self.counters[name] = self.counters.get(name, 0) + 1
+
+
+def start_stub_server(latency=0.0, handshake_latency=0.0, host="127.0.0.1", port=0, fixtures=None,
+                      jitter=0.0, error_rate=0.0, error_status=503, drop_rate=0.0, seed=None):
+    """在后台线程启动桩服务器，返回 (server, base_url)
+
+    latency 为每个请求的响应延迟，jitter 为额外的随机延迟上限，handshake_latency 为每个新连接的
+    额外延迟（秒）；fixtures 为夹具文件路径或 FixtureStore；error_rate 比例的请求返回 error_status，
+    drop_rate 比例的请求不响应直接断开。
+    """
+    server = StubServer((host, port), StubHandler)
+    server.latency = latency
+    server.jitter = jitter
+    server.handshake_latency = handshake_latency
+    server.fixtures = FixtureStore(fixtures) if isinstance(fixtures, str) else fixtures
+    server.known_uuids = server.fixtures.known_uuids() if server.fixtures is not None else {}
+    server.error_rate = error_rate
+    server.error_status = error_status
+    server.drop_rate = drop_rate
+    server.rng = random.Random(seed)
+    server.texture = make_png()
+    server.counters = {}
+    server.lock = threading.Lock()
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://{host}:{server.server_address[1]}"
@@ -0,0 +1,324 @@
+"""命令行查询入口（无界面）
+
+示例:
+    python cli.py Notch jeb_ -k <API密钥>
+    python cli.py -f players.txt --format ndjson > results.ndjson
+    python cli.py --watch Notch jeb_ -k <API密钥>
+    python cli.py --guild "公会名" -k <API密钥>
+    python cli.py --rank 床战争.KD --top 50 --where "床战争.等级>=100"
+    python cli.py -f players.txt -k <API密钥> --export results.parquet
+"""
+import argparse
+import asyncio
+import atexit
+import json
+import os
+import re
+import shutil
+import sys
+import tempfile
+import time
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="Hypixel 玩家数据查询（命令行）")
+    parser.add_argument("players", nargs="*", help="玩家ID")
+    parser.add_argument("-f", "--file", help="玩家列表文件，每行一个")
+    parser.add_argument("-k", "--key", default=os.environ.get("HYPIXEL_API_KEY"),
+                        help="Hypixel API 密钥，多个密钥用逗号分隔（默认读取环境变量 HYPIXEL_API_KEY）")
+    parser.add_argument("--format", choices=["json", "ndjson"], default="json",
+                        help="输出格式：json 在结束后一次输出，ndjson 每完成一名玩家输出一行")
+    parser.add_argument("-w", "--workers", type=int, default=8, help="并发数")
+    parser.add_argument("--async", dest="use_async", action="store_true",
+                        help="使用 asyncio 后端（适合成百上千名玩家同时查询）")
+    parser.add_argument("--no-history", action="store_true", help="不把查询结果写入本地历史数据库")
+    parser.add_argument("--delta", type=float, metavar="天数",
+                        help="不发起请求，只输出本地历史中最近若干天的数据变化")
+    parser.add_argument("--watch", action="store_true",
+                        help="持续监控玩家（连同已保存的关注列表）的在线状态，每个事件输出一行JSON")
+    parser.add_argument("--games", help="--watch 时只通知进入这些游戏（逗号分隔，如 BEDWARS,DUELS）")
+    parser.add_argument("--budget", type=float, help="--watch 时每分钟最多使用的请求数（默认为密钥限额的一半）")
+    parser.add_argument("--rank", metavar="统计项",
+                        help="按统计项（如 床战争.KD、搭桥决斗.胜场）输出本地排行榜；提供玩家ID时先查询这些玩家")
+    parser.add_argument("--top", type=int, default=50, help="--rank 时输出的名次数")
+    parser.add_argument("--where", action="append", default=[], metavar="条件",
+                        help="--rank 时的筛选条件，可重复，如 \"床战争.等级>=100\"")
+    parser.add_argument("--ascending", action="store_true", help="--rank 时按从小到大排名")
+    parser.add_argument("--export", metavar="文件",
+                        help="把结果逐条导出为 .csv / .ndjson / .parquet（不在标准输出打印）；未提供玩家ID时导出本地历史")
+    parser.add_argument("--export-format", choices=["csv", "ndjson", "parquet"], help="导出格式（默认由扩展名决定）")
+    parser.add_argument("--metrics", metavar="文件",
+                        help="结束后导出各阶段耗时统计：.json 结尾为 JSON，否则为 Prometheus 文本")
+    mode = parser.add_mutually_exclusive_group()
+    mode.add_argument("--record", metavar="文件", help="把本次所有HTTP响应录制到夹具文件（不读写本地缓存和历史）")
+    mode.add_argument("--replay", metavar="文件", help="不访问网络，只回放夹具文件中录制的响应（不读写本地缓存和历史）")
+    guild = parser.add_mutually_exclusive_group()
+    guild.add_argument("--guild", metavar="公会名", help="查询公会所有成员并输出汇总")
+    guild.add_argument("--guild-of", metavar="玩家ID", help="查询该玩家所在公会的所有成员")
+    return parser
+
+
+async def run_async(client, api_key, names, concurrency, handle):
+    """使用 asyncio 后端查询，返回与 BatchLookup.stats 相同格式的统计"""
+    from async_backend import AsyncHypixelClient
+
+    from batch import run_stats
+
+    backend = AsyncHypixelClient(client, max_concurrency=concurrency)
+    start = time.perf_counter()
+    total = succeeded = 0
+    try:
+        async for result in backend.lookup_many(api_key, names):
+            total += 1
+            if not result["error"]:
+                succeeded += 1
+            handle(result)
+    finally:
+        await backend.close()
+    return run_stats(total, succeeded, time.perf_counter() - start)
+
+
+def print_deltas(names, days):
+    """输出本地历史中的数据变化"""
+    from history import HistoryStore
+    from uuid_cache import UUIDCache
+
+    history = HistoryStore()
+    uuid_cache = UUIDCache()
+    since = time.time() - days * 86400
+    output = []
+    for name in names:
+        hit, uuid = uuid_cache.get(name)
+        uuid = uuid or history.find_uuid(name)
+        if not uuid:
+            output.append({"player": name, "error": "没有该玩家的历史记录"})
+            continue
+        delta = history.delta(uuid, since)
+        output.append({
+            "player": name,
+            "uuid": uuid,
+            "记录次数": len(history.snapshots(uuid, since)),
+            "变化": {field: {"旧值": old, "新值": new, "差值": diff}
+                     for field, (old, new, diff) in sorted(delta.items())}
+        })
+    print(json.dumps(output[0] if len(output) == 1 else output, indent=4, ensure_ascii=False))
+    return 0
+
+
+def print_leaderboard(index, column, top, conditions, ascending=False):
+    """输出排行榜、分位数和满足条件的人数"""
+    from leaderboard import parse_condition
+
+    try:
+        where = [parse_condition(condition) for condition in conditions]
+        column = index.resolve(column)
+        ranking = index.top(column, top, where, ascending)
+    except (KeyError, ValueError) as e:
+        print(f"错误: {e.args[0]}", file=sys.stderr)
+        return 2
+    print(json.dumps({
+        "统计项": column,
+        "总人数": len(index),
+        "符合条件": len(index.select(where)) if where else len(index),
+        "分位数": index.percentiles(column, where=where),
+        "排行": ranking
+    }, indent=4, ensure_ascii=False))
+    return 0
+
+
+def export_history(path, format=None):
+    """把本地历史中每名玩家的最新数据导出到文件"""
+    from export import history_rows, open_exporter
+    from history import HistoryStore
+
+    try:
+        with open_exporter(path, format) as exporter:
+            exporter.write_rows(history_rows(HistoryStore()))
+    except (ValueError, RuntimeError, OSError) as e:
+        print(f"错误: {str(e)}", file=sys.stderr)
+        return 2
+    print(f"已导出 {exporter.rows} 名玩家至: {path}", file=sys.stderr)
+    return 0
+
+
+def watch(client, api_key, names, games=None, budget=None, report_interval=300):
+    """无界面运行关注列表监控，直到按 Ctrl+C"""
+    from watchlist import WatchlistMonitor
+
+    def on_event(event):
+        sys.stdout.write(json.dumps(event, ensure_ascii=False) + "\n")
+        sys.stdout.flush()
+
+    monitor = WatchlistMonitor(client, api_key, on_event=on_event, budget=budget)
+    monitor.load()
+    for name in names:
+        monitor.add(name, games)
+    if not len(monitor):
+        print("错误: 关注列表为空，请提供至少一个玩家ID", file=sys.stderr)
+        return 2
+    monitor.save()
+    print(f"正在监控 {len(monitor)} 名玩家，按 Ctrl+C 停止", file=sys.stderr)
+    monitor.start()
+    try:
+        while monitor.running:
+            time.sleep(report_interval)
+            print(json.dumps(monitor.stats(), ensure_ascii=False), file=sys.stderr)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        monitor.stop()
+    print(json.dumps(monitor.stats(), ensure_ascii=False), file=sys.stderr)
+    return 0
+
+
+def lookup_guild(client, api_key, query, by_player, workers, handle):
+    """查询公会成员并逐个交给 handle，返回 (公会信息和汇总, 统计)，失败时返回 (None, 退出码)"""
+    from guild import GuildRoster
+
+    roster = GuildRoster(client, api_key, max_workers=workers)
+    try:
+        guild = roster.load(query, by_player)
+    except Exception as e:
+        print(f"错误: {str(e)}", file=sys.stderr)
+        return None, 1
+    print(f"公会 {guild['名称']} [{guild['标签']}] 等级 {guild['等级']}，共 {len(guild['成员'])} 名成员",
+          file=sys.stderr)
+    _, summary = roster.run(guild, on_result=handle)
+    info = {key: value for key, value in guild.items() if key != "成员"}
+    return {"公会": info, "汇总": summary}, roster.stats
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    if args.delta is not None:
+        from batch import load_player_file, parse_player_list
+
+        from_file = load_player_file(args.file) if args.file else []
+        return print_deltas(parse_player_list("\n".join(args.players + from_file)), args.delta)
+    if args.export and not (args.players or args.file or args.guild or args.guild_of):
+        return export_history(args.export, args.export_format)
+    if args.rank and not (args.players or args.file):
+        # 只读本地历史，不发起请求
+        from history import HistoryStore
+        from leaderboard import LeaderboardIndex
+
+        index = LeaderboardIndex()
+        index.load_history(HistoryStore())
+        return print_leaderboard(index, args.rank, args.top, args.where, args.ascending)
+    if not args.key:
+        print("错误: 请通过 -k 或环境变量 HYPIXEL_API_KEY 提供API密钥", file=sys.stderr)
+        return 2
+
+    # 仅在真正查询时才导入网络相关模块
+    from batch import BatchLookup, load_player_file, parse_player_list
+    from hypixel_core import HypixelClient
+    from key_pool import build_api_key
+
+    from_file = load_player_file(args.file) if args.file else []
+    names = parse_player_list("\n".join(args.players + from_file))
+    if not names and not (args.watch or args.guild or args.guild_of):
+        print("错误: 请提供至少一个玩家ID", file=sys.stderr)
+        return 2
+
+    http = None
+    if args.replay or args.record:
+        from http_pool import get_pool
+        from replay import RecordingHttp, ReplayHttp
+        # 使用临时数据目录：回放的数据不写入本地缓存和历史，录制时也不会因命中缓存而漏录请求
+        state = tempfile.mkdtemp(prefix="hypixel_finder_")
+        atexit.register(shutil.rmtree, state, True)
+        os.environ["HYPIXEL_FINDER_HOME"] = state
+        http = ReplayHttp(args.replay) if args.replay else RecordingHttp(get_pool(), args.record)
+    history = None
+    if not args.no_history:
+        from history import HistoryStore
+        history = HistoryStore()
+    leaderboard = None
+    if args.rank:
+        from leaderboard import LeaderboardIndex, parse_condition
+        leaderboard = LeaderboardIndex()
+        try:
+            # 查询前先检查统计项和筛选条件
+            leaderboard.resolve(args.rank)
+            for condition in args.where:
+                parse_condition(condition)
+        except (KeyError, ValueError) as e:
+            print(f"错误: {e.args[0]}", file=sys.stderr)
+            return 2
+        if history is not None:
+            leaderboard.load_history(history)
+    exporter = None
+    if args.export:
+        from export import open_exporter
+        try:
+            exporter = open_exporter(args.export, args.export_format)
+        except (ValueError, RuntimeError, OSError) as e:
+            print(f"错误: {str(e)}", file=sys.stderr)
+            return 2
+    client = HypixelClient(http=http, history=history)
+    api_key = build_api_key(args.key, client.scheduler)
+    if args.watch:
+        games = [game for game in re.split(r"[\s,，]+", args.games or "") if game]
+        return watch(client, api_key, names, games or None, args.budget)
+    results = []
+
+    def handle(result):
+        if leaderboard is not None and result.get("data"):
+            # 缓存命中的玩家也计入排行榜
+            leaderboard.add(result["data"])
+        if exporter is not None:
+            exporter.write(result)
+        if leaderboard is not None or exporter is not None:
+            # 只输出排行榜或导出文件，不保留结果，内存占用与人数无关
+            return
+        if args.format == "ndjson":
+            sys.stdout.write(json.dumps(result, ensure_ascii=False) + "\n")
+            sys.stdout.flush()
+        else:
+            results.append(result)
+
+    try:
+        if args.guild or args.guild_of:
+            summary, stats = lookup_guild(client, api_key, args.guild or args.guild_of, bool(args.guild_of),
+                                         args.workers, handle)
+            if summary is None:
+                return stats
+            # 输出排行榜时不打印公会汇总
+            if not args.rank:
+                if args.format == "json" or args.export:
+                    # 导出时成员写入文件，标准输出只打印汇总
+                    if not args.export:
+                        summary["成员"] = results
+                    print(json.dumps(summary, indent=4, ensure_ascii=False))
+                else:
+                    handle(summary)
+        elif args.use_async:
+            stats = asyncio.run(run_async(client, api_key, names, args.workers, handle))
+        else:
+            batch = BatchLookup(client, api_key, max_workers=args.workers)
+            for result in batch.iter_results(names):
+                handle(result)
+            stats = batch.stats
+    finally:
+        if exporter is not None:
+            exporter.close()
+
+    if args.rank:
+        print_leaderboard(leaderboard, args.rank, args.top, args.where, args.ascending)
+    elif args.format == "json" and not (args.guild or args.guild_of or args.export):
+        order = {name.lower(): i for i, name in enumerate(names)}
+        results.sort(key=lambda r: order[r["player"].lower()])
+        output = results[0] if len(results) == 1 else results
+        print(json.dumps(output, indent=4, ensure_ascii=False))
+
+    print(f"共 {stats['总数']} 名玩家，成功 {stats['成功']}，失败 {stats['失败']}，"
+          f"耗时 {stats['耗时']} 秒，吞吐量 {stats['吞吐量']} 玩家/秒", file=sys.stderr)
+    if exporter is not None:
+        print(f"已导出 {exporter.rows} 条结果至: {args.export}", file=sys.stderr)
+    if args.metrics:
+        client.metrics.export(args.metrics)
+    return 0 if stats["失败"] == 0 else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
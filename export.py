@@ -0,0 +1,168 @@
+"""流式导出查询结果：CSV / NDJSON / Parquet
+
+列由 process_data 的结构和 stat_schema 的统计项决定，嵌套的 "游戏数据" 展开为
+"游戏数据.床战争.KD" 形式的列。每条结果到达时立即写出（Parquet 按行组写出），
+内存占用与导出人数无关，可以直接接在批量查询或本地历史数据库后面。
+"""
+import csv
+import json
+import os
+
+from hypixel_core import flatten_data
+from stat_schema import get_extractor
+
+# 查询结果中 "游戏数据" 以外的列：(列名, 是否为数值)
+BASE_COLUMNS = [
+    ("玩家", False),
+    ("UUID", False),
+    ("错误", False),
+    ("最后登录", False),
+    ("首次登录", False),
+    ("基础信息.显示名称", False),
+    ("基础信息.等级", True),
+    ("基础信息.社交点数", True),
+    ("基础信息.当前披风", False),
+    ("社交.好友数量", True),
+    ("社交.公会", False),
+]
+
+FORMATS = {".csv": "csv", ".ndjson": "ndjson", ".jsonl": "ndjson", ".parquet": "parquet"}
+
+
+def export_columns(extractor=None):
+    """导出的所有列 [(列名, 是否为数值)]"""
+    extractor = extractor or get_extractor()
+    numeric = set(extractor.columns(numeric=True))
+    return BASE_COLUMNS + [(f"游戏数据.{name}", name in numeric) for name in extractor.columns()]
+
+
+def result_row(result):
+    """把 BatchLookup 的一条结果展开为 {列名: 值}"""
+    row = flatten_data(result["data"]) if result.get("data") else {}
+    row["玩家"] = result.get("player")
+    row["UUID"] = result.get("uuid") or row.get("UUID")
+    row["错误"] = result.get("error")
+    return row
+
+
+def history_rows(history):
+    """本地历史数据库中每名玩家的最新数据，逐行返回 {列名: 值}"""
+    for uuid, name, fields in history.latest_all():
+        fields["玩家"] = name
+        fields["UUID"] = uuid
+        yield fields
+
+
+def _load_pyarrow():
+    try:
+        import pyarrow
+        import pyarrow.parquet
+        return pyarrow
+    except ImportError:
+        return None
+
+
+class _Exporter:
+    def __init__(self, path, columns=None):
+        self.path = path
+        self.columns = columns or export_columns()
+        self.names = [name for name, _ in self.columns]
+        self.rows = 0
+
+    def write(self, result):
+        """写出一条 BatchLookup 结果"""
+        self.write_row(result_row(result))
+
+    def write_row(self, row):
+        self._write(row)
+        self.rows += 1
+
+    def write_rows(self, rows):
+        for row in rows:
+            self.write_row(row)
+        return self.rows
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class CsvExporter(_Exporter):
+    """CSV（带 BOM 的 UTF-8，Excel 可直接打开中文列名）"""
+    def __init__(self, path, columns=None):
+        super().__init__(path, columns)
+        self._file = open(path, "w", encoding="utf-8-sig", newline="")
+        self._writer = csv.writer(self._file)
+        self._writer.writerow(self.names)
+        self._file.flush()
+
+    def _write(self, row):
+        self._writer.writerow(["" if row.get(name) is None else row[name] for name in self.names])
+        self._file.flush()
+
+    def close(self):
+        self._file.close()
+
+
+class NdjsonExporter(_Exporter):
+    """每行一个 JSON 对象，键为展开后的列名"""
+    def __init__(self, path, columns=None):
+        super().__init__(path, columns)
+        self._file = open(path, "w", encoding="utf-8")
+
+    def _write(self, row):
+        self._file.write(json.dumps({name: row.get(name) for name in self.names}, ensure_ascii=False) + "\n")
+        self._file.flush()
+
+    def close(self):
+        self._file.close()
+
+
+class ParquetExporter(_Exporter):
+    """Parquet（需要 pyarrow）：攒满 row_group_size 行写出一个行组，数值列为 float64"""
+    def __init__(self, path, columns=None, row_group_size=5000):
+        super().__init__(path, columns)
+        pa = _load_pyarrow()
+        if pa is None:
+            raise RuntimeError("导出 Parquet 需要安装 pyarrow（pip install pyarrow）")
+        self._pa = pa
+        self._numeric = [numeric for _, numeric in self.columns]
+        self._schema = pa.schema([(name, pa.float64() if numeric else pa.string())
+                                  for name, numeric in self.columns])
+        self._writer = pa.parquet.ParquetWriter(path, self._schema)
+        self.row_group_size = row_group_size
+        self._buffer = [[] for _ in self.names]
+
+    def _write(self, row):
+        for values, name, numeric in zip(self._buffer, self.names, self._numeric):
+            value = row.get(name)
+            if numeric:
+                value = float(value) if isinstance(value, (int, float)) and not isinstance(value, bool) else None
+            elif value is not None:
+                value = str(value)
+            values.append(value)
+        if len(self._buffer[0]) >= self.row_group_size:
+            self._flush()
+
+    def _flush(self):
+        if not self._buffer[0]:
+            return
+        self._writer.write_table(self._pa.Table.from_arrays(self._buffer, schema=self._schema))
+        self._buffer = [[] for _ in self.names]
+
+    def close(self):
+        self._flush()
+        self._writer.close()
+
+
+_EXPORTERS = {"csv": CsvExporter, "ndjson": NdjsonExporter, "parquet": ParquetExporter}
+
+
+def open_exporter(path, format=None, columns=None):
+    """按格式（默认由扩展名决定）创建导出器"""
+    format = format or FORMATS.get(os.path.splitext(path)[1].lower())
+    if format not in _EXPORTERS:
+        raise ValueError(f"无法识别的导出格式: {path}（支持 .csv / .ndjson / .parquet）")
+    return _EXPORTERS[format](path, columns)
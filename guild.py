@@ -0,0 +1,155 @@
+"""公会成员列表：从 /guild 获取成员，再并发查询所有成员的数据并汇总"""
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from batch import run_stats
+from profile_cache import ProfileCache
+from stat_schema import ratio
+
+# 公会等级所需经验：前15级逐级增加，之后每级固定
+_GUILD_LEVEL_EXP = [100000, 150000, 250000, 500000, 750000, 1000000, 1250000, 1500000,
+                    2000000, 2500000, 2500000, 2500000, 2500000, 2500000, 3000000]
+
+
+def guild_level(exp):
+    """根据公会经验计算等级（保留两位小数）"""
+    level = 0
+    for need in _GUILD_LEVEL_EXP:
+        if exp < need:
+            return round(level + exp / need, 2)
+        exp -= need
+        level += 1
+    return round(level + exp / _GUILD_LEVEL_EXP[-1], 2)
+
+
+def _number(value):
+    return value if isinstance(value, (int, float)) and not isinstance(value, bool) else 0
+
+
+def summarize(results, top=5):
+    """汇总成员数据：平均等级、床战争平均星级、KD 排行等"""
+    members = [r["data"] for r in results if r["data"]]
+    count = len(members)
+
+    def average(get):
+        return round(sum(_number(get(data)) for data in members) / count, 2) if count else 0.0
+
+    def ranking(get):
+        ranked = sorted(members, key=lambda data: _number(get(data)), reverse=True)[:top]
+        return [{"玩家": data["基础信息"]["显示名称"], "值": get(data)} for data in ranked]
+
+    bedwars = lambda data: data["游戏数据"]["床战争"]
+    duels = lambda data: data["游戏数据"]["决斗模式"]["总统计"]
+    return {
+        "成员数": len(results),
+        "已加载": count,
+        "失败": sum(1 for r in results if r["error"]),
+        "平均等级": average(lambda data: data["基础信息"]["等级"]),
+        "床战争平均星级": average(lambda data: bedwars(data)["等级"]),
+        "床战争总KD": ratio(sum(_number(bedwars(d)["最终击杀"]) for d in members),
+                         sum(_number(bedwars(d)["最终死亡"]) for d in members)),
+        "床战争KD排行": ranking(lambda data: bedwars(data)["KD"]),
+        "床战争星级排行": ranking(lambda data: bedwars(data)["等级"]),
+        "决斗胜场排行": ranking(lambda data: duels(data)["总胜场"]),
+    }
+
+
+class GuildRoster:
+    """公会成员查询：按公会名或成员ID加载成员列表，并发获取每名成员的数据
+
+    本地缓存中未过期的成员直接复用，不再发起请求；allow_stale 为 True（交互界面）时
+    已过期但仍可用的缓存也直接复用。
+    """
+    def __init__(self, client, api_key, max_workers=16, allow_stale=False):
+        self.client = client
+        self.api_key = api_key
+        self.max_workers = max_workers
+        self.allow_stale = allow_stale
+        self.stats = {}
+        self._cancelled = threading.Event()
+
+    def cancel(self):
+        """取消尚未开始的成员查询"""
+        self._cancelled.set()
+
+    def load(self, query, by_player=False):
+        """获取公会信息和成员列表；by_player 为 True 时 query 为成员的玩家ID"""
+        if by_player:
+            uuid, error = self.client.get_uuid(query)
+            if error:
+                raise Exception(error)
+            guild, error = self.client.get_guild(self.api_key, player_uuid=uuid)
+        else:
+            guild, error = self.client.get_guild(self.api_key, name=query)
+        if error:
+            raise Exception(error)
+        exp = guild.get("exp", 0)
+        return {
+            "名称": guild.get("name"),
+            "标签": guild.get("tag") or "无",
+            "等级": guild_level(exp),
+            "经验": exp,
+            "创建时间": self.client.format_timestamp(guild.get("created")),
+            "成员": [
+                {"uuid": m.get("uuid"), "rank": m.get("rank"), "joined": m.get("joined")}
+                for m in guild.get("members", []) if m.get("uuid")
+            ]
+        }
+
+    def fetch_member(self, member, guild_name=None):
+        """获取一名成员的数据，优先使用本地缓存"""
+        uuid = member["uuid"]
+        result = {"player": uuid, "uuid": uuid, "rank": member.get("rank"), "data": None, "skin": {},
+                  "cached": False, "cache_age": None, "error": None}
+        if self._cancelled.is_set():
+            result["error"] = "已取消"
+            return result
+        try:
+            state, entry = self.client.profile_cache.lookup(uuid)
+            if state == ProfileCache.MISS or (state == ProfileCache.STALE and not self.allow_stale):
+                data, result["skin"] = self.client.fetch_profile(self.api_key, uuid)
+            else:
+                data, result["skin"] = entry["data"], entry["skin"]
+                result["cached"] = True
+                result["cache_age"] = self.client.profile_cache.age(entry)
+            if guild_name:
+                # /player 不返回公会信息，这里用公会查询的结果补上（复制一份，不改动缓存）
+                data = dict(data, 社交=dict(data["社交"], 公会=guild_name))
+            result["data"] = data
+            result["player"] = data["基础信息"]["显示名称"] or uuid
+        except Exception as e:
+            result["error"] = str(e)
+        return result
+
+    def iter_members(self, guild):
+        """按完成顺序逐个产出成员结果"""
+        self._cancelled.clear()
+        start = time.perf_counter()
+        total = succeeded = cached = 0
+        guild_name = f"{guild['名称']} (等级: {guild['等级']})"
+
+        with ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="guild") as pool:
+            futures = [pool.submit(self.fetch_member, member, guild_name) for member in guild["成员"]]
+            try:
+                for future in as_completed(futures):
+                    result = future.result()
+                    total += 1
+                    if not result["error"]:
+                        succeeded += 1
+                    if result["cached"]:
+                        cached += 1
+                    yield result
+            finally:
+                for future in futures:
+                    future.cancel()
+                self.stats = run_stats(total, succeeded, time.perf_counter() - start, 缓存复用=cached)
+
+    def run(self, guild, on_result=None):
+        """查询所有成员，返回 (成员结果列表, 汇总)"""
+        results = []
+        for result in self.iter_members(guild):
+            results.append(result)
+            if on_result:
+                on_result(result)
+        return results, summarize(results)
@@ -0,0 +1,181 @@
+import sqlite3
+import threading
+import time
+
+from hypixel_core import flatten_data
+from paths import data_path
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS players (
+    uuid TEXT PRIMARY KEY,
+    name TEXT,
+    last_seen REAL
+);
+CREATE INDEX IF NOT EXISTS idx_players_name ON players (name COLLATE NOCASE);
+
+-- 每次查询一条快照记录
+CREATE TABLE IF NOT EXISTS snapshots (
+    uuid TEXT NOT NULL,
+    ts REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_snapshots_uuid_ts ON snapshots (uuid, ts);
+
+-- 只记录与上一次快照相比发生变化的字段
+CREATE TABLE IF NOT EXISTS changes (
+    uuid TEXT NOT NULL,
+    field TEXT NOT NULL,
+    ts REAL NOT NULL,
+    value
+);
+CREATE INDEX IF NOT EXISTS idx_changes_uuid_field_ts ON changes (uuid, field, ts);
+CREATE INDEX IF NOT EXISTS idx_changes_uuid_ts ON changes (uuid, ts);
+
+-- 每名玩家各字段的最新值，用于去重和快速计算变化
+CREATE TABLE IF NOT EXISTS latest (
+    uuid TEXT NOT NULL,
+    field TEXT NOT NULL,
+    value,
+    PRIMARY KEY (uuid, field)
+) WITHOUT ROWID;
+"""
+
+# 不记录历史的字段
+_SKIP_FIELDS = {"UUID"}
+
+
+def format_field(field):
+    """把字段路径转换为显示名称，例如 "游戏数据.床战争.最终击杀" -> "床战争 最终击杀" """
+    if field.startswith("游戏数据."):
+        field = field[len("游戏数据."):]
+    return field.replace(".", " ")
+
+
+class HistoryStore:
+    """本地历史数据库（SQLite）：按UUID和时间保存每次查询的快照，未变化的字段不重复存储"""
+    def __init__(self, path=None):
+        self.path = path or data_path("history.db")
+        self._conn = sqlite3.connect(self.path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(_SCHEMA)
+        self._lock = threading.Lock()
+
+    def record(self, data, ts=None):
+        """记录一次查询结果，返回发生变化的字段数"""
+        uuid = data["UUID"]
+        ts = ts if ts is not None else time.time()
+        flat = {k: v for k, v in flatten_data(data).items() if k not in _SKIP_FIELDS}
+        with self._lock, self._conn:
+            previous = dict(self._conn.execute(
+                "SELECT field, value FROM latest WHERE uuid = ?", (uuid,)
+            ))
+            changed = [(field, value) for field, value in flat.items()
+                       if field not in previous or previous[field] != value]
+            self._conn.execute("INSERT INTO snapshots (uuid, ts) VALUES (?, ?)", (uuid, ts))
+            self._conn.execute(
+                "INSERT INTO players (uuid, name, last_seen) VALUES (?, ?, ?) "
+                "ON CONFLICT(uuid) DO UPDATE SET name = excluded.name, last_seen = excluded.last_seen",
+                (uuid, flat.get("基础信息.显示名称"), ts)
+            )
+            self._conn.executemany(
+                "INSERT INTO changes (uuid, field, ts, value) VALUES (?, ?, ?, ?)",
+                [(uuid, field, ts, value) for field, value in changed]
+            )
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO latest (uuid, field, value) VALUES (?, ?, ?)",
+                [(uuid, field, value) for field, value in changed]
+            )
+        return len(changed)
+
+    def find_uuid(self, name):
+        """根据最近一次记录的显示名称查找UUID"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT uuid FROM players WHERE name = ? COLLATE NOCASE ORDER BY last_seen DESC LIMIT 1",
+                (name,)
+            ).fetchone()
+        return row[0] if row else None
+
+    def latest(self, uuid):
+        """玩家各字段的最新值"""
+        with self._lock:
+            return dict(self._conn.execute("SELECT field, value FROM latest WHERE uuid = ?", (uuid,)))
+
+    def latest_all(self, prefix="", page_size=500):
+        """所有玩家以 prefix 开头的字段的最新值，逐个返回 (UUID, 显示名称, {字段: 值})
+
+        按UUID分页读取，内存占用与玩家总数无关。
+        """
+        after = ""
+        while True:
+            with self._lock:
+                players = self._conn.execute(
+                    "SELECT uuid, name FROM players WHERE uuid > ? ORDER BY uuid LIMIT ?", (after, page_size)
+                ).fetchall()
+                if not players:
+                    return
+                after = players[-1][0]
+                rows = self._conn.execute(
+                    "SELECT uuid, field, value FROM latest WHERE uuid BETWEEN ? AND ? AND substr(field, 1, ?) = ?",
+                    (players[0][0], after, len(prefix), prefix)
+                ).fetchall()
+            fields = {uuid: {} for uuid, _ in players}
+            for uuid, field, value in rows:
+                fields[uuid][field[len(prefix):]] = value
+            for uuid, name in players:
+                yield uuid, name, fields[uuid]
+
+    def state_at(self, uuid, ts):
+        """玩家在某个时间点的各字段值（该时间点之前最后一次记录的值）"""
+        with self._lock:
+            # SQLite 中与 MAX() 一起查询的普通列取自最大值所在的行
+            rows = self._conn.execute(
+                "SELECT field, value, MAX(ts) FROM changes WHERE uuid = ? AND ts <= ? GROUP BY field",
+                (uuid, ts)
+            ).fetchall()
+        return {field: value for field, value, _ in rows}
+
+    def snapshots(self, uuid, start=0, end=None):
+        """时间范围内的快照时间列表"""
+        with self._lock:
+            return [row[0] for row in self._conn.execute(
+                "SELECT ts FROM snapshots WHERE uuid = ? AND ts BETWEEN ? AND ? ORDER BY ts",
+                (uuid, start, end if end is not None else time.time())
+            )]
+
+    def series(self, uuid, field, start=0, end=None):
+        """某字段在时间范围内的变化序列 [(时间, 值)]"""
+        with self._lock:
+            return self._conn.execute(
+                "SELECT ts, value FROM changes WHERE uuid = ? AND field = ? AND ts BETWEEN ? AND ? ORDER BY ts",
+                (uuid, field, start, end if end is not None else time.time())
+            ).fetchall()
+
+    def delta(self, uuid, since, until=None):
+        """两个时间点之间数值字段的变化，返回 {字段: (旧值, 新值, 差值)}
+
+        since 之前没有记录时，以 since 之后的第一次快照为起点。
+        """
+        old = self.state_at(uuid, since)
+        if not old:
+            with self._lock:
+                first = self._conn.execute(
+                    "SELECT MIN(ts) FROM snapshots WHERE uuid = ? AND ts >= ?", (uuid, since)
+                ).fetchone()[0]
+            if first is not None:
+                old = self.state_at(uuid, first)
+        new = self.state_at(uuid, until) if until is not None else self.latest(uuid)
+        result = {}
+        for field, value in new.items():
+            before = old.get(field)
+            if isinstance(value, bool) or not isinstance(value, (int, float)):
+                continue
+            if not isinstance(before, (int, float)) or before == value:
+                continue
+            diff = value - before
+            result[field] = (before, value, round(diff, 2) if isinstance(diff, float) else diff)
+        return result
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
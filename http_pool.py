@@ -0,0 +1,81 @@
+import threading
+from urllib.parse import urlsplit
+
+
+class HttpPool:
+    """按主机共享的HTTP连接池，复用 keep-alive 连接，线程安全"""
+    def __init__(self, pool_size=16, timeout=10, connect_timeout=5):
+        self.pool_size = pool_size
+        self.timeout = timeout
+        self.connect_timeout = connect_timeout
+        self._sessions = {}
+        self._lock = threading.Lock()
+
+    def _new_session(self):
+        # 延迟导入，命令行启动时不加载 requests
+        import requests
+        from requests.adapters import HTTPAdapter
+
+        session = requests.Session()
+        # 连接数用完时等待空闲连接，而不是额外新建再丢弃
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.pool_size, pool_block=True)
+        session.mount("https://", adapter)
+        session.mount("http://", adapter)
+        session.headers["Connection"] = "keep-alive"
+        return session
+
+    def session_for(self, url):
+        """获取URL所属主机的会话"""
+        parts = urlsplit(url)
+        host = f"{parts.scheme}://{parts.netloc}"
+        session = self._sessions.get(host)
+        if session is None:
+            with self._lock:
+                session = self._sessions.get(host)
+                if session is None:
+                    session = self._sessions[host] = self._new_session()
+        return session
+
+    def request(self, method, url, timeout=None, **kwargs):
+        """发送请求，timeout 为读取超时，连接超时使用连接池配置"""
+        read_timeout = timeout if timeout is not None else self.timeout
+        return self.session_for(url).request(
+            method, url, timeout=(self.connect_timeout, read_timeout), **kwargs
+        )
+
+    def get(self, url, timeout=None, **kwargs):
+        return self.request("GET", url, timeout=timeout, **kwargs)
+
+    def post(self, url, timeout=None, **kwargs):
+        return self.request("POST", url, timeout=timeout, **kwargs)
+
+    def close(self):
+        """关闭所有连接"""
+        with self._lock:
+            for session in self._sessions.values():
+                session.close()
+            self._sessions.clear()
+
+
+_default_pool = None
+_default_lock = threading.Lock()
+
+
+def get_pool():
+    """获取全局共享连接池"""
+    global _default_pool
+    if _default_pool is None:
+        with _default_lock:
+            if _default_pool is None:
+                _default_pool = HttpPool()
+    return _default_pool
+
+
+def configure_pool(pool_size=16, timeout=10, connect_timeout=5):
+    """重新配置全局连接池（会关闭旧连接）"""
+    global _default_pool
+    with _default_lock:
+        if _default_pool is not None:
+            _default_pool.close()
+        _default_pool = HttpPool(pool_size=pool_size, timeout=timeout, connect_timeout=connect_timeout)
+    return _default_pool
@@ -0,0 +1,353 @@
+"""Hypixel 玩家数据查询核心逻辑，不依赖 tkinter，可用于命令行和服务端"""
+import base64
+import datetime
+import json
+import math
+import queue
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import quote
+
+from http_pool import get_pool
+from key_pool import KeyPool
+from metrics import (cache_collector, get_metrics, resilience_collector, scheduler_collector,
+                     singleflight_collector, uuid_batch_collector)
+from player_parse import build_spec, parse_player_response
+from profile_cache import ProfileCache
+from rate_limit import RequestScheduler
+from singleflight import SingleFlight, name_key, uuid_key
+from stat_schema import get_extractor, ratio
+from uuid_batch import UUIDBatcher
+from uuid_cache import UUIDCache
+
+UUID_URL = "https://api.mojang.com/users/profiles/minecraft/{name}"
+PLAYER_URL = "https://api.hypixel.net/player?key={key}&uuid={uuid}"
+STATUS_URL = "https://api.hypixel.net/status?key={key}&uuid={uuid}"
+GUILD_NAME_URL = "https://api.hypixel.net/guild?key={key}&name={name}"
+GUILD_PLAYER_URL = "https://api.hypixel.net/guild?key={key}&player={uuid}"
+PROFILE_URL = "https://sessionserver.mojang.com/session/minecraft/profile/{uuid}"
+
+# 后台刷新过期缓存的线程数（批量查询大量过期玩家时排队刷新）
+REFRESH_WORKERS = 4
+# 与 Hypixel 请求并发获取皮肤数据的线程数
+SKIN_WORKERS = 16
+
+
+def parse_uuid_response(status_code, content):
+    """解析单个玩家名的UUID响应，返回 (UUID, 错误信息)
+
+    只有 204 和 404 "Couldn't find ..." 表示玩家不存在（错误信息为 "玩家不存在"），
+    其他状态码（重试后仍为 429 或 5xx 等）视为请求失败。
+    """
+    if status_code == 204 or (status_code == 404 and b"Couldn't find" in (content or b"")):
+        return None, "玩家不存在"
+    if status_code != 200:
+        return None, f"获取UUID失败: HTTP {status_code}"
+    uuid = json.loads(content).get("id")
+    return (uuid, None) if uuid else (None, "获取UUID失败: 响应中没有UUID")
+
+
+def flatten_data(data, prefix=""):
+    """把嵌套的查询结果展开为 {"游戏数据.床战争.KD": 值} 形式"""
+    flat = {}
+    for key, value in data.items():
+        path = f"{prefix}{key}"
+        if isinstance(value, dict):
+            flat.update(flatten_data(value, path + "."))
+        else:
+            flat[path] = value
+    return flat
+
+
+class HypixelClient:
+    """玩家数据查询客户端"""
+    def __init__(self, http=None, uuid_cache=None, scheduler=None, profile_cache=None, extractor=None,
+                 history=None, metrics=None, batch_uuids=True, leaderboard=None):
+        # 共享HTTP连接池
+        self.http = http or get_pool()
+        # 玩家名 -> UUID 缓存
+        self.uuid_cache = uuid_cache if uuid_cache is not None else UUIDCache()
+        # 按主机/密钥限流的请求调度器
+        self.scheduler = scheduler or RequestScheduler(self.http)
+        # 玩家数据缓存（过期后先返回旧数据再后台刷新）
+        self.profile_cache = profile_cache if profile_cache is not None else ProfileCache()
+        # 声明式统计提取规则，/player 响应只解析规则用到的游戏
+        self.extractor = extractor or get_extractor()
+        self.player_spec = build_spec(self.extractor.games)
+        # 可选的历史数据库（HistoryStore），每次从网络获取的数据都会记录一次快照
+        self.history = history
+        # 可选的本地排行榜（LeaderboardIndex），每次获取的数据都会更新到索引中
+        self.leaderboard = leaderboard
+        # 合并同时进行的UUID查询，使用 Mojang 批量接口
+        self.uuid_batcher = UUIDBatcher(self) if batch_uuids else None
+        # 同一玩家名/UUID的相同请求同时只发出一次，其余调用方共享结果
+        self.singleflight = SingleFlight()
+        # 后台刷新过期缓存的队列（同一UUID由 ProfileCache.begin_refresh 去重），由少量守护线程处理
+        self._refresh_queue = queue.Queue()
+        self._refresh_threads = []
+        self._refresh_lock = threading.Lock()
+        # 皮肤数据与 Hypixel 数据并发获取
+        self._skin_executor = ThreadPoolExecutor(max_workers=SKIN_WORKERS, thread_name_prefix="skin")
+        # 各阶段耗时和缓存命中率统计
+        self.metrics = metrics or get_metrics()
+        self.metrics.register("uuid_cache", cache_collector(self.uuid_cache))
+        self.metrics.register("profile_cache", cache_collector(self.profile_cache))
+        self.metrics.register("scheduler", scheduler_collector(self.scheduler))
+        self.metrics.register("resilience", resilience_collector(self.scheduler.resilience))
+        if self.uuid_batcher is not None:
+            self.metrics.register("uuid_batch", uuid_batch_collector(self.uuid_batcher))
+        self.metrics.register("singleflight", singleflight_collector(self.singleflight))
+
+    def lookup(self, api_key, player_name, on_refresh=None, allow_stale=False):
+        """完整查询一名玩家，返回 (整合后的数据, 皮肤数据)，失败时抛出异常"""
+        processed_data, skin_data, _ = self.lookup_cached(api_key, player_name, on_refresh, allow_stale)
+        return processed_data, skin_data
+
+    def lookup_cached(self, api_key, player_name, on_refresh=None, allow_stale=False):
+        """查询玩家，优先使用缓存，返回 (整合后的数据, 皮肤数据, 缓存年龄秒数)
+
+        缓存年龄为 None 表示数据刚从网络获取。缓存已过期时：allow_stale 为 True（交互界面）
+        先返回旧数据，同时在后台刷新，刷新完成后调用 on_refresh(整合后的数据, 皮肤数据)；
+        否则（命令行、批量查询）直接重新获取，进程退出前不会留下未完成的刷新。
+        """
+        uuid, error = self.get_uuid(player_name)
+        if error:
+            raise Exception(error)
+        state, entry = self.profile_cache.lookup(uuid)
+        if state == ProfileCache.MISS or (state == ProfileCache.STALE and not allow_stale):
+            processed_data, skin_data = self.fetch_profile(api_key, uuid)
+            return processed_data, skin_data, None
+        if state == ProfileCache.STALE and self.profile_cache.begin_refresh(uuid):
+            self._schedule_refresh(api_key, uuid, on_refresh)
+        return entry["data"], entry["skin"], self.profile_cache.age(entry)
+
+    def fetch_profile(self, api_key, uuid):
+        """从网络并发获取 Hypixel 数据和皮肤数据，处理后写入缓存；同一UUID同时只获取一次"""
+        def fetch():
+            skin_future = self._skin_executor.submit(self.get_skin_data, uuid)
+            hypixel_data, error = self.get_hypixel_data(api_key, uuid)
+            if error:
+                raise Exception(error)
+            if not hypixel_data:
+                raise Exception("该玩家没有Hypixel数据")
+            skin_data = skin_future.result()
+            with self.metrics.time("process_data"):
+                processed_data = self.process_data(hypixel_data, uuid, skin_data)
+            self.store_profile(uuid, processed_data, skin_data)
+            return processed_data, skin_data
+
+        return self.singleflight.do(uuid_key("profile", uuid), fetch)
+
+    def store_profile(self, uuid, processed_data, skin_data):
+        """写入缓存、历史数据库和排行榜"""
+        self.profile_cache.put(uuid, processed_data, skin_data)
+        if self.leaderboard is not None:
+            self.leaderboard.add(processed_data)
+        if self.history is not None:
+            try:
+                self.history.record(processed_data)
+            except Exception as e:
+                print(f"历史记录保存失败: {str(e)}", file=sys.stderr)
+
+    def _schedule_refresh(self, api_key, uuid, on_refresh):
+        self._refresh_queue.put((api_key, uuid, on_refresh))
+        with self._refresh_lock:
+            if len(self._refresh_threads) < REFRESH_WORKERS:
+                thread = threading.Thread(target=self._refresh_worker, name="profile-refresh", daemon=True)
+                self._refresh_threads.append(thread)
+                thread.start()
+
+    def _refresh_worker(self):
+        while True:
+            self._refresh_profile(*self._refresh_queue.get())
+
+    def _refresh_profile(self, api_key, uuid, on_refresh):
+        """后台刷新过期的缓存"""
+        try:
+            processed_data, skin_data = self.fetch_profile(api_key, uuid)
+            if on_refresh:
+                on_refresh(processed_data, skin_data)
+        except Exception as e:
+            print(f"后台刷新失败: {str(e)}", file=sys.stderr)
+        finally:
+            self.profile_cache.end_refresh(uuid)
+
+    # ---------- 数据获取 ----------
+    def get_uuid(self, player_name):
+        """获取玩家UUID（优先使用缓存，多个查询同时进行时合并为批量请求）"""
+        batcher = self.uuid_batcher
+        # prefetch 提交的名字已经计入缓存统计
+        hit, uuid = self.uuid_cache.get(player_name, count=batcher is None or not batcher.take_prefetched(player_name))
+        if hit:
+            return (uuid, None) if uuid else (None, "玩家不存在")
+        if batcher is not None:
+            resolve = batcher.resolve
+        else:
+            resolve = self.fetch_uuid
+        return self.singleflight.do(name_key("uuid", player_name), lambda: resolve(player_name))
+
+    def fetch_uuid(self, player_name):
+        """单独请求一个玩家的UUID并写入缓存"""
+        try:
+            with self.metrics.time("uuid"):
+                response = self.scheduler.get(
+                    UUID_URL.format(name=player_name),
+                    timeout=10
+                )
+            uuid, error = parse_uuid_response(response.status_code, response.content)
+        except Exception as e:
+            return None, f"获取UUID失败: {str(e)}"
+        if uuid or error == "玩家不存在":
+            self.uuid_cache.put(player_name, uuid)
+        return uuid, error
+
+    def hypixel_get(self, api_key, url, parse=json.loads, phase="hypixel", **params):
+        """请求 Hypixel 接口，返回 (响应数据, 错误信息)
+
+        url 为带 {key} 占位符的地址模板；api_key 可以是单个密钥或 KeyPool，
+        使用密钥池时密钥被限流或失效会换用下一个重试；耗时计入 phase 阶段。
+        """
+        pool = api_key if isinstance(api_key, KeyPool) else None
+        error = "未知API错误"
+        for attempt in range(len(pool) + 1 if pool else 1):
+            try:
+                key = pool.acquire() if pool else api_key
+            except Exception as e:
+                return None, str(e)
+            if attempt:
+                self.metrics.incr("retries", reason="key_switch")
+            status_code, cause = None, None
+            try:
+                with self.metrics.time(phase):
+                    response = self.scheduler.get(
+                        url.format(key=key, **params),
+                        timeout=15,
+                        key=key,
+                        retry_throttled=pool is None
+                    )
+                status_code = response.status_code
+                data = parse(response.content)
+                if data.get("success"):
+                    return data, None
+                cause = error = data.get("cause", "未知API错误")
+                self.metrics.incr("errors", phase=phase)
+            except Exception as e:
+                return None, f"API请求失败: {str(e)}"
+            finally:
+                if pool:
+                    pool.release(key, status_code, cause)
+            if status_code not in (403, 429):
+                break
+        return None, error
+
+    def get_hypixel_data(self, api_key, uuid):
+        """获取Hypixel数据；api_key 可以是单个密钥或 KeyPool"""
+        def fetch():
+            data, error = self.hypixel_get(
+                api_key, PLAYER_URL, lambda body: parse_player_response(body, self.player_spec), uuid=uuid
+            )
+            if error:
+                return None, error
+            return data.get("player"), None
+
+        return self.singleflight.do(uuid_key("player", uuid), fetch)
+
+    def get_status(self, api_key, uuid):
+        """获取玩家在线状态，返回 ({"online": ..., "gameType": ..., "mode": ...}, 错误信息)"""
+        def fetch():
+            data, error = self.hypixel_get(api_key, STATUS_URL, phase="status", uuid=uuid)
+            if error:
+                return None, error
+            return data.get("session") or {"online": False}, None
+
+        return self.singleflight.do(uuid_key("status", uuid), fetch)
+
+    def get_guild(self, api_key, name=None, player_uuid=None):
+        """按公会名称或成员UUID获取公会（含成员列表），返回 (公会数据, 错误信息)"""
+        if name:
+            data, error = self.hypixel_get(api_key, GUILD_NAME_URL, phase="guild", name=quote(name))
+        else:
+            data, error = self.hypixel_get(api_key, GUILD_PLAYER_URL, phase="guild", uuid=player_uuid)
+        if error:
+            return None, error
+        if not data.get("guild"):
+            return None, "公会不存在"
+        return data["guild"], None
+
+    def get_skin_data(self, uuid):
+        """获取皮肤数据"""
+        def fetch():
+            try:
+                with self.metrics.time("skin_profile"):
+                    profile = self.scheduler.get(
+                        PROFILE_URL.format(uuid=uuid),
+                        timeout=10
+                    ).json()
+                return self.parse_textures(profile)
+            except Exception as e:
+                print(f"皮肤数据获取失败: {str(e)}", file=sys.stderr)
+                return {}
+
+        return self.singleflight.do(uuid_key("skin", uuid), fetch)
+
+    @staticmethod
+    def parse_textures(profile):
+        """从 sessionserver 档案中解析皮肤和披风URL，以及皮肤是否为细手臂模型"""
+        for prop in profile.get("properties", []):
+            if prop.get("name") == "textures":
+                decoded = base64.b64decode(prop.get("value", ""))
+                textures = json.loads(decoded).get("textures", {})
+                skin = textures.get("SKIN", {})
+                return {
+                    "skin": skin.get("url"),
+                    "cape": textures.get("CAPE", {}).get("url"),
+                    "slim": skin.get("metadata", {}).get("model") == "slim"
+                }
+        return {}
+
+    # ---------- 数据处理方法 ----------
+    def process_data(self, data, uuid, skin_data):
+        """整合处理所有数据"""
+        return {
+            "UUID": uuid,
+            "最后登录": self.format_timestamp(data.get("lastLogin")),
+            "首次登录": self.format_timestamp(data.get("firstLogin")),
+            "基础信息": {
+                "显示名称": data.get("displayname"),
+                "等级": self.calculate_level(data.get("networkExp", 0)),
+                "社交点数": data.get("karma", 0),
+                "当前披风": "有" if skin_data.get("cape") else "无"
+            },
+            "社交": {
+                "好友数量": len(data.get("friends", [])),
+                "公会": self.get_guild_info(data)
+            },
+            "游戏数据": self.extractor.extract(data.get("stats") or {})
+        }
+
+    def get_guild_info(self, data):
+        """获取公会信息"""
+        if "guild" not in data:
+            return "无"
+        return f"{data['guild'].get('name')} (等级: {data['guild'].get('guildLevel', 0)})"
+
+    # ---------- 辅助方法 ----------
+    @staticmethod
+    def calculate_level(exp):
+        """计算玩家等级"""
+        if exp >= 14609081:
+            return round(200 + (exp - 14609081) / 96000, 2)
+        return round((math.sqrt(exp + 15312.5) - 125/math.sqrt(2)) / (25 * math.sqrt(2)), 2)
+
+    @staticmethod
+    def calculate_kd(kills, deaths):
+        """计算KD值"""
+        return ratio(kills, deaths)
+
+    @staticmethod
+    def format_timestamp(timestamp):
+        """格式化时间戳"""
+        if not timestamp:
+            return "未知"
+        return datetime.datetime.fromtimestamp(timestamp/1000).strftime("%Y-%m-%d %H:%M:%S")
@@ -0,0 +1,106 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from metrics import cache_collector, get_metrics, image_pipeline_collector
+from singleflight import SingleFlight
+
+
+class ImagePipeline:
+    """后台图像流水线：工作线程负责下载、解码和缩放，界面线程只负责最后的显示
+
+    schedule(fn, *args) 用于把回调投递到界面线程，例如 lambda fn, *a: root.after(0, fn, *a)。
+    同一材质URL同时只下载一次；传入客户端的 singleflight 时与查询请求共用统计。
+    """
+    def __init__(self, http, texture_cache, schedule, max_workers=4, metrics=None, singleflight=None):
+        self.http = http
+        self.singleflight = singleflight or SingleFlight()
+        self.metrics = metrics or get_metrics()
+        self.texture_cache = texture_cache
+        self.schedule = schedule
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="image")
+        self._lock = threading.Lock()
+        self._generation = 0
+        self._lookup_stall = 0.0
+        self._stalls = []  # 每次查询在界面线程上花费的时间（秒）
+        self._max_samples = 200
+        self.metrics.register("texture_cache", cache_collector(texture_cache))
+        self.metrics.register("image_pipeline", image_pipeline_collector(self))
+
+    def prepare(self, url, size, is_skin=True, slim=False, head=False):
+        """获取并生成预览图（PIL.Image），在工作线程中执行；head 为 True 时生成皮肤的头像"""
+        from imaging import render_head, render_texture
+
+        # 优先使用缓存的预览图，其次是缓存的原始材质
+        img = self.texture_cache.get_render(url, size, is_skin, slim, head)
+        if img is None:
+            data = self.texture_cache.get_raw(url)
+            if data is None:
+                data = self.singleflight.do(("texture", url), lambda: self._download(url))
+            with self.metrics.time("decode_resize"):
+                img = render_head(data, size) if head else render_texture(data, size, is_skin, slim)
+            self.texture_cache.put_render(url, size, is_skin, img, slim, head)
+        return img
+
+    def _download(self, url):
+        with self.metrics.time("texture_download"):
+            response = self.http.get(url, timeout=10)
+            response.raise_for_status()
+            data = response.content
+        self.texture_cache.put_raw(url, data)
+        return data
+
+    def begin_lookup(self):
+        """开始新的一次查询：之前未完成的图像将被丢弃"""
+        with self._lock:
+            if self._generation and self._lookup_stall:
+                self._record(self._lookup_stall)
+            self._generation += 1
+            self._lookup_stall = 0.0
+            return self._generation
+
+    def submit(self, url, size, is_skin, on_ready, on_error=None, slim=False, head=False):
+        """提交图像任务，完成后在界面线程调用 on_ready(img)"""
+        generation = self._generation
+        future = self._pool.submit(self.prepare, url, size, is_skin, slim, head)
+        future.add_done_callback(
+            lambda f: self.schedule(self._deliver, f, generation, on_ready, on_error)
+        )
+        return future
+
+    def _deliver(self, future, generation, on_ready, on_error):
+        # 在界面线程中执行
+        if generation != self._generation:
+            return
+        error = future.exception()
+        if error is not None:
+            if on_error:
+                on_error(error)
+            return
+        start = time.perf_counter()
+        try:
+            on_ready(future.result())
+        finally:
+            with self._lock:
+                self._lookup_stall += time.perf_counter() - start
+
+    def _record(self, stall):
+        self._stalls.append(stall)
+        if len(self._stalls) > self._max_samples:
+            del self._stalls[0]
+
+    def stats(self):
+        """界面线程卡顿统计（毫秒）"""
+        with self._lock:
+            samples = self._stalls + ([self._lookup_stall] if self._lookup_stall else [])
+            if not samples:
+                return {"查询次数": 0, "最近": 0.0, "平均": 0.0, "最大": 0.0}
+            return {
+                "查询次数": len(samples),
+                "最近": round(samples[-1] * 1000, 2),
+                "平均": round(sum(samples) / len(samples) * 1000, 2),
+                "最大": round(max(samples) * 1000, 2)
+            }
+
+    def shutdown(self):
+        self._pool.shutdown(wait=False, cancel_futures=True)
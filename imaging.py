@@ -0,0 +1,115 @@
+from io import BytesIO
+
+from PIL import Image
+
+# 皮肤图集中各部位正面的位置（64x64 标准尺寸下的 左, 上, 宽, 高）
+# 玩家的右臂/右腿显示在画面左侧
+_HEAD = (8, 8, 8, 8)
+_HAT = (40, 8, 8, 8)
+_BODY = (20, 20, 8, 12)
+_JACKET = (20, 36, 8, 12)
+_RIGHT_ARM = (44, 20, 4, 12)
+_RIGHT_SLEEVE = (44, 36, 4, 12)
+_LEFT_ARM = (36, 52, 4, 12)
+_LEFT_SLEEVE = (52, 52, 4, 12)
+_RIGHT_LEG = (4, 20, 4, 12)
+_RIGHT_PANTS = (4, 36, 4, 12)
+_LEFT_LEG = (20, 52, 4, 12)
+_LEFT_PANTS = (4, 52, 4, 12)
+
+# 正面图（16x32）中各部位的位置：(底层, 外层, 左, 上, 是否为手臂, 旧版图集中镜像使用的部位)
+_FRONT_LAYOUT = [
+    (_HEAD, _HAT, 4, 0, False, None),
+    (_BODY, _JACKET, 4, 8, False, None),
+    (_RIGHT_ARM, _RIGHT_SLEEVE, 0, 8, True, None),
+    (_LEFT_ARM, _LEFT_SLEEVE, 12, 8, True, _RIGHT_ARM),
+    (_RIGHT_LEG, _RIGHT_PANTS, 4, 20, False, None),
+    (_LEFT_LEG, _LEFT_PANTS, 8, 20, False, _RIGHT_LEG),
+]
+
+# 披风图集（64x32）中正面的位置
+_CAPE_FRONT = (1, 1, 10, 16)
+
+
+def _open(data):
+    img = Image.open(BytesIO(data))
+    return img if img.mode == "RGBA" else img.convert("RGBA")
+
+
+def _crop(img, unit, rect, width=None):
+    left, top, w, h = rect
+    w = width or w
+    return img.crop((left * unit, top * unit, (left + w) * unit, (top + h) * unit))
+
+
+def _opaque(part):
+    # 底层像素的透明度在游戏中会被忽略
+    part.putalpha(255)
+    return part
+
+
+def _scale(img, size, base_w, base_h):
+    """按整数倍最近邻放大，不超过 size"""
+    factor = max(1, min(size[0] // base_w, size[1] // base_h))
+    return img.resize((base_w * factor, base_h * factor), Image.Resampling.NEAREST)
+
+
+def _flatten(img, background=(255, 255, 255)):
+    """透明部分填充背景色"""
+    bg = Image.new("RGB", img.size, background)
+    bg.paste(img, mask=img.split()[-1])
+    return bg
+
+
+def render_front(img, slim=False, overlay=True):
+    """由皮肤图集合成正面图（每个像素对应图集中的一个像素，RGBA）
+
+    支持 64x64 和旧版 64x32 图集（旧版没有左臂/左腿，使用右侧镜像，也没有除帽子外的外层）
+    以及高清皮肤；slim 为 True 时手臂宽 3 像素。
+    """
+    unit = max(1, img.width // 64)
+    legacy = img.height * 2 == img.width
+    arm_width = 3 if slim else 4
+    front = Image.new("RGBA", (16 * unit, 32 * unit))
+    for base, layer, x, y, is_arm, mirror in _FRONT_LAYOUT:
+        width = arm_width if is_arm else None
+        if legacy and mirror:
+            part = _crop(img, unit, mirror, width).transpose(Image.Transpose.FLIP_LEFT_RIGHT)
+        else:
+            part = _crop(img, unit, base, width)
+        # 细手臂的右臂贴着身体
+        if slim and is_arm and x == 0:
+            x = 1
+        front.paste(_opaque(part), (x * unit, y * unit))
+        if not overlay or (legacy and layer is not _HAT):
+            continue
+        part = _crop(img, unit, layer, width)
+        # 旧版皮肤的帽子层常被整块填充成不透明色，游戏中此时不显示帽子
+        if legacy and part.getextrema()[3][0] == 255:
+            continue
+        front.alpha_composite(part, (x * unit, y * unit))
+    return front
+
+
+def render_head(data, size=(32, 32), overlay=True):
+    """头像（面部和帽子层），整数倍最近邻放大"""
+    img = _open(data)
+    unit = max(1, img.width // 64)
+    head = _opaque(_crop(img, unit, _HEAD))
+    if overlay:
+        hat = _crop(img, unit, _HAT)
+        if not (img.height * 2 == img.width and hat.getextrema()[3][0] == 255):
+            head.alpha_composite(hat)
+    return _scale(_flatten(head), size, head.width, head.height)
+
+
+def render_texture(data, size, is_skin=True, slim=False):
+    """将材质PNG转换为预览图：皮肤合成正面全身图，披风取正面，按整数倍最近邻放大并去除透明背景"""
+    img = _open(data)
+    if is_skin:
+        front = render_front(img, slim)
+    else:
+        unit = max(1, img.width // 64)
+        front = _crop(img, unit, _CAPE_FRONT)
+    # 先在原始分辨率下填充背景再放大，放大只是复制像素
+    return _scale(_flatten(front), size, front.width, front.height)
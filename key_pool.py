@@ -0,0 +1,97 @@
+import itertools
+import re
+import threading
+import time
+
+
+def parse_api_keys(text):
+    """解析API密钥文本（逗号、空白或换行分隔），去重并保持顺序"""
+    keys = []
+    for key in re.split(r"[\s,;，；]+", text or ""):
+        if key and key not in keys:
+            keys.append(key)
+    return keys
+
+
+class KeyPool:
+    """多API密钥池：在多个密钥之间分配请求，被限流或失效的密钥暂时移出轮换
+
+    strategy 为 "round_robin"（轮询）或 "least_loaded"（优先剩余额度最多的密钥，
+    需要提供 scheduler 以读取各密钥的令牌桶）。
+    """
+    def __init__(self, keys, strategy="least_loaded", scheduler=None,
+                 throttle_cooldown=60.0, invalid_cooldown=3600.0):
+        if not keys:
+            raise ValueError("至少需要一个API密钥")
+        self.keys = list(keys)
+        self.strategy = strategy
+        self.scheduler = scheduler
+        self.throttle_cooldown = throttle_cooldown
+        self.invalid_cooldown = invalid_cooldown
+        self._cycle = itertools.cycle(self.keys)
+        self._suspended = {}  # 密钥 -> 恢复时间
+        self._in_flight = {key: 0 for key in self.keys}
+        self._requests = {key: 0 for key in self.keys}
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.keys)
+
+    def _available(self, now):
+        for key, until in list(self._suspended.items()):
+            if until <= now:
+                del self._suspended[key]
+        return [key for key in self.keys if key not in self._suspended]
+
+    def _load(self, key):
+        # 剩余令牌越多、进行中的请求越少，负载越低
+        tokens = self.scheduler.key_tokens(key) if self.scheduler else 0.0
+        return self._in_flight[key] - tokens
+
+    def acquire(self):
+        """选择一个密钥；所有密钥都被暂停时返回最早恢复的那个"""
+        with self._lock:
+            now = time.monotonic()
+            available = self._available(now)
+            if not available:
+                key = min(self._suspended, key=self._suspended.get)
+                if self._suspended[key] - now > self.throttle_cooldown:
+                    raise Exception("没有可用的API密钥（全部失效）")
+            elif self.strategy == "round_robin":
+                key = next(k for k in self._cycle if k in available)
+            else:
+                key = min(available, key=self._load)
+            self._in_flight[key] += 1
+            self._requests[key] += 1
+            return key
+
+    def release(self, key, status_code=200, cause=None):
+        """归还密钥并根据响应结果决定是否暂停"""
+        with self._lock:
+            self._in_flight[key] -= 1
+            now = time.monotonic()
+            if status_code == 429 or (cause and "throttle" in cause.lower()):
+                self._suspended[key] = max(self._suspended.get(key, 0.0), now + self.throttle_cooldown)
+            elif status_code == 403 or (cause and "invalid api key" in cause.lower()):
+                self._suspended[key] = now + self.invalid_cooldown
+
+    def stats(self):
+        with self._lock:
+            now = time.monotonic()
+            self._available(now)
+            return {
+                key[:8] + "…": {
+                    "请求数": self._requests[key],
+                    "进行中": self._in_flight[key],
+                    "暂停剩余(秒)": round(self._suspended[key] - now, 1) if key in self._suspended else 0
+                }
+                for key in self.keys
+            }
+
+
+def build_api_key(text, scheduler=None):
+    """单个密钥直接返回字符串，多个密钥返回 KeyPool"""
+    keys = parse_api_keys(text)
+    if len(keys) <= 1:
+        return keys[0] if keys else ""
+    return KeyPool(keys, scheduler=scheduler)
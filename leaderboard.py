@@ -0,0 +1,178 @@
+"""本地排行榜：把查询过的玩家数据按列存入 NumPy 数组，支持前K名、分位数和范围筛选
+
+每个数值统计项（stat_schema 中的非文本列，如 "床战争.KD"）对应一个 float64 数组，
+每名玩家占一行，缺失值为 NaN。新的查询结果按UUID覆盖或追加一行，不需要重建索引；
+查询只做向量运算，十万名玩家也在毫秒级完成。
+"""
+import operator
+import re
+import threading
+
+import numpy as np
+
+from hypixel_core import flatten_data
+from stat_schema import get_extractor
+
+# 筛选条件的比较运算符（较长的写在前面，解析时优先匹配）
+_OPS = {">=": operator.ge, "<=": operator.le, "!=": operator.ne, ">": operator.gt, "<": operator.lt,
+        "=": operator.eq}
+_CONDITION = re.compile(r"^\s*(.+?)\s*(>=|<=|!=|>|<|=)\s*(-?[\d.]+)\s*$")
+
+
+def parse_condition(text):
+    """把 "床战争.KD>=3" 解析为 (统计项, 运算符, 数值)"""
+    match = _CONDITION.match(text)
+    if not match:
+        raise ValueError(f"无法识别的筛选条件: {text}（示例: 床战争.KD>=3）")
+    column, op, value = match.groups()
+    return column, op, float(value)
+
+
+def _display(value):
+    """整数值按整数显示（数组中统一存为浮点数）"""
+    return int(value) if value.is_integer() else value
+
+
+def _number(value):
+    if isinstance(value, bool) or not isinstance(value, (int, float)):
+        return np.nan
+    return value
+
+
+class LeaderboardIndex:
+    """按列存储的玩家统计索引，可在查询线程中增量更新、在界面线程中查询"""
+    def __init__(self, extractor=None, capacity=1024):
+        self.columns = (extractor or get_extractor()).columns(numeric=True)
+        self._capacity = capacity
+        self._data = {column: np.full(capacity, np.nan) for column in self.columns}
+        self._rows = {}  # UUID -> 行号
+        self.uuids = []
+        self.names = []
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.uuids)
+
+    def resolve(self, column):
+        """完整列名或唯一的后缀（如 "搭桥决斗.胜场"）-> 完整列名"""
+        if column in self._data:
+            return column
+        matches = [name for name in self.columns if name.endswith("." + column)]
+        if len(matches) == 1:
+            return matches[0]
+        if matches:
+            raise KeyError(f"统计项 {column} 不唯一，可能是: {', '.join(matches[:5])}")
+        raise KeyError(f"未知的统计项: {column}")
+
+    # ---------- 更新 ----------
+    def _grow(self, needed):
+        # 调用方持有 self._lock；容量按倍数增长，摊销后每行 O(1)
+        capacity = self._capacity
+        while capacity < needed:
+            capacity *= 2
+        if capacity == self._capacity:
+            return
+        for column, values in self._data.items():
+            grown = np.full(capacity, np.nan)
+            grown[:self._capacity] = values
+            self._data[column] = grown
+        self._capacity = capacity
+
+    def _row(self, uuid, name):
+        # 调用方持有 self._lock
+        row = self._rows.get(uuid)
+        if row is None:
+            row = self._rows[uuid] = len(self.uuids)
+            self._grow(row + 1)
+            self.uuids.append(uuid)
+            self.names.append(name)
+        elif name:
+            self.names[row] = name
+        return row
+
+    def add_many(self, players):
+        """批量写入 [(UUID, 显示名称, {统计项: 值})]，已存在的玩家覆盖原有数据，返回写入人数"""
+        players = list(players)
+        with self._lock:
+            rows = np.fromiter((self._row(uuid, name) for uuid, name, _ in players), dtype=np.intp,
+                               count=len(players))
+            getters = [stats.get for _, _, stats in players]
+            missing = np.nan
+            for column, values in self._data.items():
+                raw = [get(column, missing) for get in getters]
+                try:
+                    values[rows] = raw
+                except (TypeError, ValueError):
+                    # 含有 None 或文本时逐个转换
+                    values[rows] = [_number(value) for value in raw]
+        return len(players)
+
+    def add(self, data):
+        """写入一次查询结果（HypixelClient.process_data 的输出）"""
+        self.add_many([(data["UUID"], data["基础信息"]["显示名称"], flatten_data(data["游戏数据"]))])
+
+    def load_history(self, history):
+        """从本地历史数据库载入所有玩家的最新数据，返回人数"""
+        return self.add_many(history.latest_all(prefix="游戏数据."))
+
+    # ---------- 查询 ----------
+    def _mask(self, where):
+        # 调用方持有 self._lock；where 为 [(统计项, 运算符, 数值)]
+        count = len(self.uuids)
+        mask = np.ones(count, dtype=bool)
+        for column, op, value in where or ():
+            if op not in _OPS:
+                raise ValueError(f"不支持的运算符: {op}")
+            values = self._data[self.resolve(column)][:count]
+            with np.errstate(invalid="ignore"):
+                mask &= _OPS[op](values, value)
+        return mask
+
+    def select(self, where):
+        """满足所有条件的玩家UUID"""
+        with self._lock:
+            return [self.uuids[row] for row in np.flatnonzero(self._mask(where))]
+
+    def top(self, column, k=50, where=None, ascending=False):
+        """按某统计项排名的前 k 名，返回 [{"名次", "玩家", "UUID", "值"}]"""
+        column = self.resolve(column)
+        with self._lock:
+            values = self._data[column][:len(self.uuids)]
+            rows = np.flatnonzero(self._mask(where) & ~np.isnan(values))
+            keys = values[rows] if ascending else -values[rows]
+            if 0 < k < len(rows):
+                # 先用 argpartition 选出前 k 个（线性时间），只对这 k 个排序
+                part = np.argpartition(keys, k - 1)[:k]
+                rows, keys = rows[part], keys[part]
+            order = rows[np.argsort(keys, kind="stable")]
+            return [{"名次": i + 1, "玩家": self.names[row], "UUID": self.uuids[row], "值": _display(values[row].item())}
+                    for i, row in enumerate(order)]
+
+    def percentiles(self, column, qs=(50, 90, 99), where=None):
+        """某统计项的分位数，返回 {"p50": 值, ...}；没有数据时为空字典"""
+        column = self.resolve(column)
+        with self._lock:
+            values = self._data[column][:len(self.uuids)]
+            values = values[self._mask(where) & ~np.isnan(values)]
+        if not len(values):
+            return {}
+        return {f"p{q:g}": round(float(v), 2) for q, v in zip(qs, np.percentile(values, qs))}
+
+    def rank(self, uuid, column):
+        """玩家在某统计项上的 (名次, 百分位)，没有该玩家或数据时返回 None"""
+        column = self.resolve(column)
+        with self._lock:
+            row = self._rows.get(uuid)
+            if row is None:
+                return None
+            values = self._data[column][:len(self.uuids)]
+            value = values[row]
+            if np.isnan(value):
+                return None
+            valid = values[~np.isnan(values)]
+        better = int(np.count_nonzero(valid > value))
+        return better + 1, round(100.0 * int(np.count_nonzero(valid <= value)) / len(valid), 2)
+
+    def stats(self):
+        with self._lock:
+            return {"玩家数": len(self.uuids), "统计项": len(self.columns), "容量": self._capacity}
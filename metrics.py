@@ -0,0 +1,265 @@
+"""请求级性能统计：各阶段耗时直方图、计数器以及缓存命中率，可导出为 JSON 或 Prometheus 文本"""
+import json
+import sys
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+# 阶段名 -> 显示名称
+PHASES = {
+    "uuid": "UUID解析",
+    "hypixel": "Hypixel数据",
+    "skin_profile": "皮肤档案",
+    "texture_download": "材质下载",
+    "decode_resize": "解码缩放",
+    "process_data": "数据处理",
+    "render": "界面渲染",
+    "status": "在线状态",
+    "guild": "公会",
+}
+
+# 直方图桶上限（秒），与 Prometheus 的 le 标签对应
+BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+PREFIX = "hypixel_finder"
+
+
+def _percentile(sorted_samples, q):
+    if not sorted_samples:
+        return 0.0
+    return sorted_samples[min(len(sorted_samples) - 1, int(len(sorted_samples) * q))]
+
+
+class Histogram:
+    """固定桶直方图；分位数按最近 window 个样本精确计算"""
+    def __init__(self, buckets=BUCKETS, window=2048):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+        self._recent = deque(maxlen=window)
+
+    def observe(self, seconds):
+        index = len(self.buckets)
+        for i, bound in enumerate(self.buckets):
+            if seconds <= bound:
+                index = i
+                break
+        self.counts[index] += 1
+        self.count += 1
+        self.sum += seconds
+        self.max = max(self.max, seconds)
+        self._recent.append(seconds)
+
+    def summary(self):
+        """毫秒为单位的汇总"""
+        samples = sorted(self._recent)
+        return {
+            "次数": self.count,
+            "平均": round(self.sum / self.count * 1000, 2) if self.count else 0.0,
+            "p50": round(_percentile(samples, 0.5) * 1000, 2),
+            "p90": round(_percentile(samples, 0.9) * 1000, 2),
+            "p99": round(_percentile(samples, 0.99) * 1000, 2),
+            "最大": round(self.max * 1000, 2)
+        }
+
+
+def cache_collector(cache):
+    """把缓存的 stats() 转换为命中/未命中计数"""
+    def collect():
+        stats = cache.stats()
+        hits = stats.get("命中", stats.get("新鲜命中", 0) + stats.get("过期命中", 0))
+        misses = stats.get("未命中", 0)
+        total = hits + misses
+        return {"hits": hits, "misses": misses, "hit_rate": round(hits / total, 4) if total else 0.0}
+    return collect
+
+
+def scheduler_collector(scheduler):
+    """限流调度器的请求、排队、限流和重试计数，以及排队等待时间（秒）"""
+    def collect():
+        with scheduler._lock:
+            return {
+                "requests": scheduler.requests,
+                "delayed": scheduler.delayed,
+                "throttled": scheduler.throttled,
+                "retries": scheduler.retries,
+                "queue_depth": scheduler.queue_depth,
+                "max_queue_depth": scheduler.max_queue_depth,
+                "total_wait_seconds": round(scheduler.total_wait, 3),
+                "max_wait_seconds": round(scheduler.max_wait, 3)
+            }
+    return collect
+
+
+def uuid_batch_collector(batcher):
+    """批量UUID解析的请求数和平均批大小"""
+    def collect():
+        stats = batcher.stats()
+        return {
+            "bulk_requests": stats["批量请求"],
+            "bulk_names": stats["批量解析人数"],
+            "fallbacks": stats["逐个查询"],
+            "avg_batch_size": stats["平均每批人数"]
+        }
+    return collect
+
+
+def singleflight_collector(singleflight):
+    """合并的重复请求数"""
+    def collect():
+        stats = singleflight.stats()
+        return {
+            "executed": stats["执行"],
+            "coalesced": stats["合并"],
+            "coalesce_rate": stats["合并率"],
+            **{f"coalesced_{kind}": count for kind, count in stats["按类型合并"].items()}
+        }
+    return collect
+
+
+def image_pipeline_collector(pipeline):
+    """每次查询显示图像时界面线程的卡顿时间（下载和解码耗时见 texture_download / decode_resize 阶段）"""
+    def collect():
+        stats = pipeline.stats()
+        return {
+            "lookups": stats["查询次数"],
+            "ui_stall_last_ms": stats["最近"],
+            "ui_stall_avg_ms": stats["平均"],
+            "ui_stall_max_ms": stats["最大"]
+        }
+    return collect
+
+
+def resilience_collector(resilience):
+    """重试、对冲和熔断计数"""
+    def collect():
+        stats = resilience.stats()
+        return {
+            "retries": stats["重试"],
+            "hedged": stats["对冲请求"],
+            "hedge_wins": stats["对冲胜出"],
+            "short_circuited": stats["熔断拒绝"],
+            "open_circuits": len(stats["熔断中"])
+        }
+    return collect
+
+
+class Metrics:
+    """性能统计注册表（线程安全）
+
+    time(phase) 记录一个阶段的耗时；incr(name, **labels) 累加计数器；
+    register(name, collect) 注册在导出时才读取的外部统计（如缓存命中率）。
+    """
+    def __init__(self):
+        self._histograms = {}
+        self._counters = {}
+        self._collectors = {}
+        self._lock = threading.Lock()
+
+    def observe(self, phase, seconds):
+        with self._lock:
+            histogram = self._histograms.get(phase)
+            if histogram is None:
+                histogram = self._histograms[phase] = Histogram()
+            histogram.observe(seconds)
+
+    @contextmanager
+    def time(self, phase):
+        """记录 with 块的耗时；块内抛出异常时同时计入 errors"""
+        start = time.perf_counter()
+        try:
+            yield
+        except BaseException:
+            self.incr("errors", phase=phase)
+            raise
+        finally:
+            self.observe(phase, time.perf_counter() - start)
+
+    def incr(self, name, amount=1, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + amount
+
+    def register(self, name, collect):
+        """注册外部统计，同名时替换"""
+        with self._lock:
+            self._collectors[name] = collect
+
+    def _collect(self):
+        with self._lock:
+            collectors = list(self._collectors.items())
+        collected = {}
+        for name, collect in collectors:
+            try:
+                collected[name] = collect()
+            except Exception as e:
+                print(f"统计读取失败 ({name}): {str(e)}", file=sys.stderr)
+        return collected
+
+    def snapshot(self):
+        """当前统计（耗时单位为毫秒）"""
+        with self._lock:
+            phases = {PHASES.get(phase, phase): h.summary() for phase, h in self._histograms.items()}
+            counters = {}
+            for (name, labels), value in sorted(self._counters.items()):
+                label = ",".join(f"{k}={v}" for k, v in labels)
+                counters[f"{name}{{{label}}}" if label else name] = value
+        return {"阶段耗时(毫秒)": phases, "计数": counters, "组件": self._collect()}
+
+    def to_json(self):
+        return json.dumps(self.snapshot(), indent=4, ensure_ascii=False)
+
+    def to_prometheus(self):
+        """导出为 Prometheus 文本格式"""
+        lines = []
+        with self._lock:
+            histograms = [(phase, list(h.counts), h.sum, h.count) for phase, h in sorted(self._histograms.items())]
+            counters = sorted(self._counters.items())
+
+        name = f"{PREFIX}_phase_seconds"
+        lines.append(f"# HELP {name} Time spent in each lookup phase.")
+        lines.append(f"# TYPE {name} histogram")
+        for phase, counts, total, count in histograms:
+            cumulative = 0
+            for bound, bucket_count in zip(BUCKETS + ("+Inf",), counts):
+                cumulative += bucket_count
+                lines.append(f'{name}_bucket{{phase="{phase}",le="{bound}"}} {cumulative}')
+            lines.append(f'{name}_sum{{phase="{phase}"}} {total}')
+            lines.append(f'{name}_count{{phase="{phase}"}} {count}')
+
+        for counter in sorted({counter for (counter, _) in counters}):
+            name = f"{PREFIX}_{counter}_total"
+            lines.append(f"# TYPE {name} counter")
+            for (counter_name, labels), value in counters:
+                if counter_name == counter:
+                    label = ",".join(f'{k}="{v}"' for k, v in labels)
+                    lines.append(f"{name}{{{label}}} {value}" if label else f"{name} {value}")
+
+        for component, values in sorted(self._collect().items()):
+            for key, value in values.items():
+                name = f"{PREFIX}_{component}_{key}"
+                lines.append(f"# TYPE {name} gauge")
+                lines.append(f"{name} {value}")
+        return "\n".join(lines) + "\n"
+
+    def export(self, path):
+        """写入文件：.json 结尾为 JSON，否则为 Prometheus 文本"""
+        text = self.to_json() if path.endswith(".json") else self.to_prometheus()
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(text)
+
+
+_default_metrics = None
+_default_lock = threading.Lock()
+
+
+def get_metrics():
+    """进程内共享的统计注册表"""
+    global _default_metrics
+    with _default_lock:
+        if _default_metrics is None:
+            _default_metrics = Metrics()
+        return _default_metrics
@@ -0,0 +1,13 @@
+import os
+
+
+def data_dir():
+    """本地数据目录，可通过环境变量 HYPIXEL_FINDER_HOME 指定"""
+    path = os.environ.get("HYPIXEL_FINDER_HOME") or os.path.join(os.path.expanduser("~"), ".hypixel_finder")
+    os.makedirs(path, exist_ok=True)
+    return path
+
+
+def data_path(*parts):
+    """数据目录下的文件路径"""
+    return os.path.join(data_dir(), *parts)
@@ -0,0 +1,76 @@
+"""只解析 process_data 需要字段的 /player 响应解析器
+
+完整的 /player 文档包含成就、任务以及几十个游戏的统计，而 process_data 只用到其中一小部分。
+这里逐层遍历顶层对象，只为白名单中的字段构建 Python 对象，其余字段用 C 实现的解码器
+跳过后立即丢弃，整棵树不会同时驻留在内存中。
+"""
+import json
+import re
+from json.decoder import scanstring
+
+# 需要保留完整统计数据的游戏（HypixelClient 会按 stat_schema.json 中的游戏生成白名单）
+DEFAULT_GAMES = ("Bedwars", "Duels", "SkyWars")
+
+# 需要保留的玩家字段（True 表示保留整个值）
+PLAYER_FIELDS = ("uuid", "displayname", "lastLogin", "firstLogin", "networkExp", "karma", "friends", "guild")
+
+_WS = re.compile(r"[ \t\n\r]*")
+_decoder = json.JSONDecoder()
+
+
+def build_spec(games=DEFAULT_GAMES):
+    """生成字段白名单"""
+    player = {field: True for field in PLAYER_FIELDS}
+    player["stats"] = {game: True for game in games}
+    return {"success": True, "cause": True, "player": player}
+
+
+DEFAULT_SPEC = build_spec()
+
+
+def _skip_ws(s, idx):
+    return _WS.match(s, idx).end()
+
+
+def _parse_object(s, idx, spec):
+    """从 s[idx] == '{' 开始解析对象，只保留 spec 中的键，返回 (对象, 结束位置)"""
+    result = {}
+    idx = _skip_ws(s, idx + 1)
+    if s[idx] == "}":
+        return result, idx + 1
+    while True:
+        if s[idx] != '"':
+            raise ValueError(f"JSON格式错误: 位置 {idx} 处应为键名")
+        key, idx = scanstring(s, idx + 1)
+        idx = _skip_ws(s, idx)
+        if s[idx] != ":":
+            raise ValueError(f"JSON格式错误: 位置 {idx} 处应为冒号")
+        idx = _skip_ws(s, idx + 1)
+
+        sub_spec = spec.get(key)
+        if sub_spec is None:
+            # 不需要的字段：解码后直接丢弃
+            _, idx = _decoder.raw_decode(s, idx)
+        elif sub_spec is True or s[idx] != "{":
+            result[key], idx = _decoder.raw_decode(s, idx)
+        else:
+            result[key], idx = _parse_object(s, idx, sub_spec)
+
+        idx = _skip_ws(s, idx)
+        if s[idx] == "}":
+            return result, idx + 1
+        if s[idx] != ",":
+            raise ValueError(f"JSON格式错误: 位置 {idx} 处应为逗号")
+        idx = _skip_ws(s, idx + 1)
+
+
+def parse_player_response(data, spec=DEFAULT_SPEC):
+    """解析 /player 响应（bytes 或 str），只保留白名单字段"""
+    if isinstance(data, (bytes, bytearray)):
+        data = data.decode("utf-8")
+    idx = _skip_ws(data, 0)
+    if not data.startswith("{", idx):
+        # 非对象响应交给标准解析器报错
+        return json.loads(data)
+    result, _ = _parse_object(data, idx, spec)
+    return result
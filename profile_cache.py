@@ -0,0 +1,121 @@
+import json
+import os
+import sys
+import threading
+import time
+from collections import OrderedDict
+
+from paths import data_path
+
+
+def format_age(seconds):
+    """把缓存年龄格式化为“x分钟前”之类的文字"""
+    seconds = max(0, int(seconds))
+    if seconds < 10:
+        return "刚刚"
+    if seconds < 60:
+        return f"{seconds}秒前"
+    if seconds < 3600:
+        return f"{seconds // 60}分钟前"
+    if seconds < 86400:
+        return f"{seconds // 3600}小时前"
+    return f"{seconds // 86400}天前"
+
+
+class ProfileCache:
+    """玩家数据缓存（按UUID），支持 stale-while-revalidate
+
+    fresh_ttl 内的数据直接使用；超过 fresh_ttl 但未超过 max_age 的数据先返回，
+    同时由调用方在后台刷新；超过 max_age 视为未命中。
+    每个UUID保存为一个JSON文件，内存中保留最近使用的 memory_size 条。
+    """
+    FRESH = "fresh"
+    STALE = "stale"
+    MISS = "miss"
+
+    def __init__(self, directory=None, fresh_ttl=300, max_age=7 * 24 * 3600, memory_size=500):
+        self.directory = directory or data_path("profiles")
+        self.fresh_ttl = fresh_ttl
+        self.max_age = max_age
+        self.memory_size = memory_size
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self._memory = OrderedDict()
+        self._refreshing = set()
+        self._lock = threading.Lock()
+        os.makedirs(self.directory, exist_ok=True)
+
+    def _path(self, uuid):
+        return os.path.join(self.directory, f"{uuid}.json")
+
+    def _load(self, uuid):
+        try:
+            with open(self._path(uuid), "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def _remember(self, uuid, entry):
+        self._memory[uuid] = entry
+        self._memory.move_to_end(uuid)
+        while len(self._memory) > self.memory_size:
+            self._memory.popitem(last=False)
+
+    def lookup(self, uuid):
+        """返回 (状态, 条目)；条目包含 data / skin / stored_at"""
+        with self._lock:
+            entry = self._memory.get(uuid)
+        if entry is None:
+            entry = self._load(uuid)
+        age = time.time() - entry["stored_at"] if entry else None
+        with self._lock:
+            if entry is None or age > self.max_age:
+                self.misses += 1
+                return self.MISS, None
+            self._remember(uuid, entry)
+            if age <= self.fresh_ttl:
+                self.hits += 1
+                return self.FRESH, entry
+            self.stale_hits += 1
+            return self.STALE, entry
+
+    def put(self, uuid, data, skin):
+        entry = {"data": data, "skin": skin, "stored_at": time.time()}
+        with self._lock:
+            self._remember(uuid, entry)
+        tmp_path = f"{self._path(uuid)}.{threading.get_ident()}.tmp"
+        try:
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(entry, f, ensure_ascii=False)
+            os.replace(tmp_path, self._path(uuid))
+        except OSError as e:
+            print(f"玩家数据缓存保存失败: {str(e)}", file=sys.stderr)
+        return entry
+
+    @staticmethod
+    def age(entry):
+        return time.time() - entry["stored_at"]
+
+    def begin_refresh(self, uuid):
+        """标记开始后台刷新；同一UUID已在刷新时返回 False"""
+        with self._lock:
+            if uuid in self._refreshing:
+                return False
+            self._refreshing.add(uuid)
+            return True
+
+    def end_refresh(self, uuid):
+        with self._lock:
+            self._refreshing.discard(uuid)
+
+    def stats(self):
+        with self._lock:
+            total = self.hits + self.stale_hits + self.misses
+            return {
+                "新鲜命中": self.hits,
+                "过期命中": self.stale_hits,
+                "未命中": self.misses,
+                "后台刷新中": len(self._refreshing),
+                "命中率": round((self.hits + self.stale_hits) / total, 4) if total else 0.0
+            }
@@ -0,0 +1,221 @@
+import threading
+import time
+from urllib.parse import urlsplit
+
+from resilience import Resilience
+
+
+class TokenBucket:
+    """令牌桶：按固定速率补充令牌，不足时返回需要等待的时间"""
+    def __init__(self, rate, capacity):
+        self.rate = rate          # 每秒补充的令牌数
+        self.capacity = capacity
+        self.tokens = capacity
+        self.blocked_until = 0.0  # 服务端要求暂停到的时间点
+        self._updated = time.monotonic()
+
+    def _refill(self, now):
+        self.tokens = min(self.capacity, self.tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def reserve(self, now):
+        """预订一个令牌，返回需要等待的秒数（令牌允许为负，表示已排队的请求）"""
+        self._refill(now)
+        self.tokens -= 1
+        wait = 0.0 if self.tokens >= 0 else -self.tokens / self.rate
+        return max(wait, self.blocked_until - now)
+
+    def sync(self, remaining, reset, now):
+        """根据服务端返回的剩余次数和重置时间校准"""
+        self._refill(now)
+        if remaining is not None:
+            self.tokens = min(self.tokens, remaining)
+        if remaining == 0 and reset:
+            self.block(reset, now)
+
+    def block(self, seconds, now):
+        self.blocked_until = max(self.blocked_until, now + seconds)
+
+
+# 默认限额（次数, 周期秒数）；Hypixel 按密钥限流，不设主机限额
+DEFAULT_HOST_LIMITS = {
+    "api.mojang.com": (600, 600),
+    "sessionserver.mojang.com": (600, 600),
+}
+DEFAULT_KEY_LIMIT = (300, 300)
+
+
+def _header_number(headers, name):
+    try:
+        return float(headers.get(name))
+    except (TypeError, ValueError):
+        return None
+
+
+class RequestScheduler:
+    """限流调度器：按主机和API密钥分别限流，被限流时排队等待而不是直接失败
+
+    会读取 RateLimit-Remaining / RateLimit-Reset / Retry-After 响应头校准令牌桶，
+    遇到 429 时等待重置后自动重试。超时和 5xx 的重试、Mojang 请求的对冲以及熔断由 resilience 负责。
+    """
+    def __init__(self, http, host_limits=None, key_limit=DEFAULT_KEY_LIMIT, max_throttle_retries=3,
+                 resilience=None):
+        self.http = http
+        self.resilience = resilience or Resilience()
+        self.host_limits = dict(DEFAULT_HOST_LIMITS, **(host_limits or {}))
+        self.key_limit = key_limit
+        self.max_throttle_retries = max_throttle_retries
+        self._buckets = {}
+        self._lock = threading.Lock()
+        # 统计
+        self.queue_depth = 0
+        self.max_queue_depth = 0
+        self.requests = 0
+        self.delayed = 0
+        self.throttled = 0
+        self.retries = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+
+    def _bucket(self, kind, name):
+        key = (kind, name)
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            if kind == "key":
+                count, period = self.key_limit
+            else:
+                count, period = self.host_limits.get(name, (None, None))
+                if count is None:
+                    return None
+            bucket = self._buckets[key] = TokenBucket(count / period, count)
+        return bucket
+
+    def _buckets_for(self, host, key):
+        buckets = [self._bucket("host", host)]
+        if key:
+            buckets.append(self._bucket("key", key))
+        return [b for b in buckets if b is not None]
+
+    def _reserve(self, host, key):
+        """预订令牌，返回需要等待的秒数"""
+        with self._lock:
+            now = time.monotonic()
+            wait = max([b.reserve(now) for b in self._buckets_for(host, key)] or [0.0])
+            self.requests += 1
+            if wait > 0:
+                self.delayed += 1
+                self.queue_depth += 1
+                self.max_queue_depth = max(self.max_queue_depth, self.queue_depth)
+        return wait
+
+    def _waited(self, wait):
+        with self._lock:
+            self.queue_depth -= 1
+            self.total_wait += wait
+            self.max_wait = max(self.max_wait, wait)
+
+    def _acquire(self, host, key):
+        wait = self._reserve(host, key)
+        if wait > 0:
+            try:
+                time.sleep(wait)
+            finally:
+                self._waited(wait)
+
+    async def acquire_async(self, url, key=None):
+        """协程版本的限流等待，不占用线程"""
+        import asyncio
+
+        wait = self._reserve(urlsplit(url).netloc, key)
+        if wait > 0:
+            try:
+                await asyncio.sleep(wait)
+            finally:
+                self._waited(wait)
+
+    def has_capacity(self, url, key=None):
+        """主机和密钥都有空闲令牌、没有排队的请求时返回 True（此时才值得发对冲请求）"""
+        with self._lock:
+            now = time.monotonic()
+            for bucket in self._buckets_for(urlsplit(url).netloc, key):
+                bucket._refill(now)
+                if bucket.tokens < 1 or bucket.blocked_until > now:
+                    return False
+            return True
+
+    def observe(self, url, key, status_code, headers):
+        """记录响应的限额头部，返回是否被限流"""
+        return self._observe(urlsplit(url).netloc, key, status_code, headers)
+
+    def _observe(self, host, key, status_code, headers):
+        remaining = _header_number(headers, "RateLimit-Remaining")
+        reset = _header_number(headers, "RateLimit-Reset")
+        retry_after = _header_number(headers, "Retry-After")
+        throttled = status_code == 429
+        with self._lock:
+            now = time.monotonic()
+            buckets = self._buckets_for(host, key)
+            # Hypixel 的限额头部针对密钥，没有密钥时作用于主机
+            target = buckets[-1] if buckets else None
+            if target is not None:
+                target.sync(remaining, reset, now)
+                if throttled:
+                    self.throttled += 1
+                    target.block(retry_after or reset or 1.0, now)
+        return throttled
+
+    def key_tokens(self, key):
+        """密钥当前剩余的令牌数（负数表示已有请求在排队）"""
+        with self._lock:
+            bucket = self._bucket("key", key)
+            bucket._refill(time.monotonic())
+            return bucket.tokens - max(0.0, bucket.blocked_until - time.monotonic()) * bucket.rate
+
+    def get(self, url, timeout=None, key=None, retry_throttled=True, **kwargs):
+        """发送限流后的 GET 请求；key 为该请求使用的 API 密钥
+
+        retry_throttled 为 False 时遇到 429 直接返回，由调用方换用其他密钥。
+        """
+        host = urlsplit(url).netloc
+        retries = self.max_throttle_retries if retry_throttled else 0
+
+        def send():
+            return self.http.get(url, timeout=timeout, **kwargs)
+
+        for attempt in range(retries + 1):
+            response = self.resilience.call(host, send, acquire=lambda: self._acquire(host, key),
+                                            can_hedge=lambda: self.has_capacity(url, key))
+            if not self._observe(host, key, response.status_code, response.headers):
+                break
+            if attempt < retries:
+                self.count_retry()
+        return response
+
+    def count_retry(self):
+        with self._lock:
+            self.retries += 1
+
+    def post(self, url, timeout=None, key=None, **kwargs):
+        """发送限流后的 POST 请求（会重试暂时性故障，但不对冲）"""
+        host = urlsplit(url).netloc
+
+        def send():
+            return self.http.post(url, timeout=timeout, **kwargs)
+
+        response = self.resilience.call(host, send, hedge=False, acquire=lambda: self._acquire(host, key))
+        self._observe(host, key, response.status_code, response.headers)
+        return response
+
+    def stats(self):
+        """排队和等待统计"""
+        with self._lock:
+            return {
+                "请求数": self.requests,
+                "排队请求": self.delayed,
+                "当前队列深度": self.queue_depth,
+                "最大队列深度": self.max_queue_depth,
+                "被限流": self.throttled,
+                "重试": self.retries,
+                "平均等待(秒)": round(self.total_wait / self.delayed, 3) if self.delayed else 0.0,
+                "最大等待(秒)": round(self.max_wait, 3)
+            }
@@ -0,0 +1,251 @@
+"""HTTP 录制与回放：把真实的 Mojang / Hypixel / 材质响应录制到夹具文件，之后离线回放
+
+RecordingHttp 和 ReplayHttp 都实现与 HttpPool 相同的 get / post / request 接口，
+可以直接传给 HypixelClient(http=...)。匹配请求时会去掉 URL 中的 API 密钥，
+录制文件中也不会保存密钥。HostRewriteHttp 把请求转发到本地桩服务器，用于基准测试。
+"""
+import atexit
+import base64
+import hashlib
+import json
+import os
+import threading
+import time
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+# 录制时保留的响应头（限流相关）
+_KEPT_HEADERS = ("Content-Type", "RateLimit-Remaining", "RateLimit-Reset", "Retry-After")
+
+UUID_PREFIX = "GET //api.mojang.com/users/profiles/minecraft/"
+BULK_UUID_PREFIX = "POST //api.mojang.com/profiles/minecraft"
+
+
+class FixtureMissError(LookupError):
+    """回放时请求没有录制（不代表玩家或数据不存在）"""
+
+
+def normalize_url(url):
+    """去掉协议和查询参数中的 key，其余参数排序，作为匹配用的URL"""
+    parts = urlsplit(url)
+    query = sorted((k, v) for k, v in parse_qsl(parts.query, keep_blank_values=True) if k.lower() != "key")
+    return urlunsplit(("", parts.netloc, parts.path, urlencode(query), ""))
+
+
+def request_key(method, url, body=None):
+    """请求的匹配键：方法 + 规范化URL（POST 附加请求体摘要）"""
+    key = f"{method.upper()} {normalize_url(url)}"
+    if body is not None:
+        if not isinstance(body, (bytes, bytearray)):
+            body = json.dumps(body, sort_keys=True).encode("utf-8")
+        key += " #" + hashlib.sha1(body).hexdigest()[:12]
+    return key
+
+
+class ReplayResponse:
+    """回放的响应，提供 requests.Response 中常用的属性"""
+    def __init__(self, status_code, headers, content, url=""):
+        self.status_code = status_code
+        self.headers = headers
+        self.content = content
+        self.url = url
+
+    @property
+    def ok(self):
+        return self.status_code < 400
+
+    @property
+    def text(self):
+        return self.content.decode("utf-8", errors="replace")
+
+    def json(self):
+        return json.loads(self.content)
+
+    def raise_for_status(self):
+        if not self.ok:
+            raise OSError(f"HTTP {self.status_code}: {self.url}")
+
+
+class FixtureStore:
+    """夹具文件：{匹配键: [录制的响应, ...]}，同一请求录制多次时按顺序轮流回放"""
+    def __init__(self, path):
+        self.path = path
+        self.entries = {}
+        self._cursor = {}
+        self._lock = threading.Lock()
+        if os.path.exists(path):
+            with open(path, "r", encoding="utf-8") as f:
+                self.entries = json.load(f)
+
+    def record(self, key, status_code, headers, content, request=None):
+        """request 为 POST 的 JSON 请求体，保存后可以知道批量UUID请求中哪些名字不存在"""
+        try:
+            body = {"text": content.decode("utf-8")}
+        except UnicodeDecodeError:
+            body = {"base64": base64.b64encode(content).decode("ascii")}
+        entry = {"status": status_code,
+                 "headers": {name: headers[name] for name in _KEPT_HEADERS if name in headers},
+                 **body}
+        if request is not None and not isinstance(request, (bytes, bytearray, str)):
+            entry["request"] = request
+        with self._lock:
+            self.entries.setdefault(key, []).append(entry)
+
+    def match(self, key):
+        """返回 (状态码, 响应头, 正文)，没有录制时返回 None"""
+        with self._lock:
+            recorded = self.entries.get(key)
+            if not recorded:
+                return None
+            index = self._cursor.get(key, 0)
+            self._cursor[key] = index + 1
+            entry = recorded[index % len(recorded)]
+        content = base64.b64decode(entry["base64"]) if "base64" in entry else entry["text"].encode("utf-8")
+        return entry["status"], dict(entry["headers"]), content
+
+    def known_uuids(self):
+        """从录制的单个和批量UUID响应中整理出 {小写玩家名: UUID}，录制时不存在的玩家对应 None"""
+        known, missing = {}, set()
+        with self._lock:
+            items = list(self.entries.items())
+        for key, recorded in items:
+            for entry in recorded:
+                if key.startswith(UUID_PREFIX) and entry["status"] == 204:
+                    missing.add(key[len(UUID_PREFIX):].lower())
+                if entry["status"] != 200 or "text" not in entry:
+                    continue
+                if key.startswith(UUID_PREFIX):
+                    profiles = [json.loads(entry["text"])]
+                elif key.startswith(BULK_UUID_PREFIX):
+                    profiles = json.loads(entry["text"])
+                    missing.update(name.lower() for name in entry.get("request") or ())
+                else:
+                    continue
+                for profile in profiles:
+                    known[profile["name"].lower()] = profile["id"]
+        for name in missing:
+            known.setdefault(name, None)
+        return known
+
+    def save(self):
+        with self._lock:
+            data = json.dumps(self.entries, ensure_ascii=False, indent=1)
+        directory = os.path.dirname(os.path.abspath(self.path))
+        os.makedirs(directory, exist_ok=True)
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write(data)
+        os.replace(tmp_path, self.path)
+
+
+class _HttpWrapper:
+    # 异步后端检测到该标记时不使用 aiohttp，所有请求都经过这里
+    intercepts = True
+
+    def get(self, url, timeout=None, **kwargs):
+        return self.request("GET", url, timeout=timeout, **kwargs)
+
+    def post(self, url, timeout=None, **kwargs):
+        return self.request("POST", url, timeout=timeout, **kwargs)
+
+
+class RecordingHttp(_HttpWrapper):
+    """转发请求并把响应录制到夹具文件（退出、close 或 save 时写入）"""
+    def __init__(self, http, path):
+        self.http = http
+        self.store = FixtureStore(path)
+        atexit.register(self.save)
+
+    def request(self, method, url, timeout=None, **kwargs):
+        response = self.http.request(method, url, timeout=timeout, **kwargs)
+        body = kwargs.get("json", kwargs.get("data"))
+        self.store.record(request_key(method, url, body),
+                          response.status_code, response.headers, response.content, body)
+        return response
+
+    def save(self):
+        self.store.save()
+
+    def close(self):
+        self.save()
+        self.http.close()
+
+
+class ReplayHttp(_HttpWrapper):
+    """只从夹具文件回放响应，不访问网络；没有录制的请求抛出 FixtureMissError
+
+    UUID请求按玩家名回答（与桩服务器相同），批量请求的分组方式不必与录制时一致。
+    """
+    def __init__(self, path, latency=0.0):
+        self.store = FixtureStore(path)
+        self.latency = latency
+        self.misses = 0
+        self._known_uuids = None
+
+    def request(self, method, url, timeout=None, **kwargs):
+        if self.latency:
+            time.sleep(self.latency)
+        body = kwargs.get("json", kwargs.get("data"))
+        key = request_key(method, url, body)
+        matched = self.store.match(key)
+        if matched is None:
+            matched = self._answer_uuid(key, body)
+        if matched is None:
+            self.misses += 1
+            raise FixtureMissError(f"回放夹具中没有录制该请求: {key}")
+        status_code, headers, content = matched
+        return ReplayResponse(status_code, headers, content, url)
+
+    def _answer_uuid(self, key, body):
+        """按录制中出现过的玩家名回答单个或批量UUID请求，没有录制该玩家时返回 None"""
+        if self._known_uuids is None:
+            self._known_uuids = self.store.known_uuids()
+        known = self._known_uuids
+        headers = {"Content-Type": "application/json"}
+        if key.startswith(UUID_PREFIX):
+            name = key[len(UUID_PREFIX):]
+            if name.lower() not in known:
+                return None
+            uuid = known[name.lower()]
+            if uuid is None:
+                return 204, headers, b""
+            return 200, headers, json.dumps({"id": uuid, "name": name}).encode("utf-8")
+        if key.startswith(BULK_UUID_PREFIX) and isinstance(body, list):
+            # 没有录制的名字不出现在响应中，批量解析会对它们逐个查询，从而得到明确的错误
+            profiles = [{"id": known[name.lower()], "name": name} for name in body if known.get(name.lower())]
+            return 200, headers, json.dumps(profiles).encode("utf-8")
+        return None
+
+    def close(self):
+        pass
+
+
+class HostRewriteHttp(_HttpWrapper):
+    """把 https://host/path 改写为 base_url/host/path 后发送，用于把所有请求导向本地桩服务器"""
+    def __init__(self, http, base_url):
+        self.http = http
+        self.base_url = base_url.rstrip("/")
+
+    def rewrite(self, url):
+        parts = urlsplit(url)
+        query = f"?{parts.query}" if parts.query else ""
+        return f"{self.base_url}/{parts.netloc}{parts.path}{query}"
+
+    def request(self, method, url, timeout=None, **kwargs):
+        return self.http.request(method, self.rewrite(url), timeout=timeout, **kwargs)
+
+    def close(self):
+        self.http.close()
+
+
+def http_from_env(http=None):
+    """根据环境变量 HYPIXEL_FINDER_RECORD / HYPIXEL_FINDER_REPLAY 返回录制或回放用的 http，都未设置时返回 None"""
+    replay_path = os.environ.get("HYPIXEL_FINDER_REPLAY")
+    if replay_path:
+        return ReplayHttp(replay_path)
+    record_path = os.environ.get("HYPIXEL_FINDER_RECORD")
+    if record_path:
+        if http is None:
+            from http_pool import get_pool
+            http = get_pool()
+        return RecordingHttp(http, record_path)
+    return None
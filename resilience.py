@@ -0,0 +1,281 @@
+"""请求容错：有限次数的抖动指数退避重试、Mojang 请求的对冲重发以及按主机熔断
+
+- 超时、连接错误和 5xx 视为暂时性故障，按 full jitter 指数退避重试；
+- 幂等的 Mojang GET 在耗时超过该主机近期延迟的某个分位数后再发出第二个请求，取先返回者；
+- 某主机连续失败达到阈值后熔断，冷却期内直接失败，冷却后放行一个探测请求。
+"""
+import asyncio
+import random
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+# 视为暂时性故障的状态码（429 由限流调度器处理）
+TRANSIENT_STATUS = frozenset({500, 502, 503, 504})
+
+# 可以对冲重发的主机：只读、幂等且不消耗 Hypixel 密钥额度
+DEFAULT_HEDGE_HOSTS = frozenset({"api.mojang.com", "sessionserver.mojang.com"})
+
+
+class CircuitOpenError(Exception):
+    """主机处于熔断状态，请求未发出"""
+
+
+def is_transient_error(error):
+    """超时和连接类错误可以重试（requests 的异常都继承自 OSError）"""
+    if isinstance(error, (OSError, asyncio.TimeoutError)):
+        return True
+    return type(error).__module__.startswith("aiohttp")
+
+
+def _acquire_then(acquire, send):
+    if acquire is not None:
+        acquire()
+    return send()
+
+
+async def _acquire_then_async(acquire, send):
+    if acquire is not None:
+        await acquire()
+    return await send()
+
+
+class CircuitBreaker:
+    """单个主机的熔断器：closed -> open -> half_open -> closed"""
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, failure_threshold=5, reset_timeout=30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = self.CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self._probing = False
+        self._lock = threading.Lock()
+
+    def allow(self):
+        """是否放行请求；冷却结束后只放行一个探测请求"""
+        with self._lock:
+            if self.state == self.CLOSED:
+                return True
+            if self.state == self.OPEN and time.monotonic() - self.opened_at >= self.reset_timeout:
+                self.state = self.HALF_OPEN
+                self._probing = False
+            if self.state == self.HALF_OPEN and not self._probing:
+                self._probing = True
+                return True
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self.state = self.CLOSED
+            self.failures = 0
+            self._probing = False
+
+    def release(self):
+        """请求因与主机状态无关的原因失败：不改变状态，只允许再次探测"""
+        with self._lock:
+            self._probing = False
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self.state == self.HALF_OPEN or self.failures >= self.failure_threshold:
+                self.state = self.OPEN
+                self.opened_at = time.monotonic()
+                self._probing = False
+
+
+class Resilience:
+    """按主机的重试、对冲和熔断策略，由 RequestScheduler 在每次 GET 时调用
+
+    send 为发出一次请求的函数（异步版本为返回协程的函数），status_of 从其结果中取出状态码；
+    hedge 为 False 时不发对冲请求（用于 POST）。acquire 在每次发出请求前等待限流令牌，
+    等待时间不计入对冲计时和延迟样本；can_hedge 返回 False（限流队列中有请求在等待）时不发对冲请求。
+    """
+    def __init__(self, max_retries=2, base_delay=0.2, max_delay=3.0, hedge_hosts=DEFAULT_HEDGE_HOSTS,
+                 hedge_percentile=0.9, hedge_min_samples=20, hedge_min_delay=0.05,
+                 failure_threshold=5, reset_timeout=30.0, latency_window=256):
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.hedge_hosts = frozenset(hedge_hosts)
+        self.hedge_percentile = hedge_percentile
+        self.hedge_min_samples = hedge_min_samples
+        self.hedge_min_delay = hedge_min_delay
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.latency_window = latency_window
+        self._breakers = {}
+        self._latencies = {}
+        self._executor = None
+        self._lock = threading.Lock()
+        # 统计
+        self.retries = 0
+        self.hedged = 0
+        self.hedge_wins = 0
+        self.short_circuited = 0
+
+    # ---------- 策略 ----------
+    def backoff(self, attempt):
+        """第 attempt 次重试前的等待时间（full jitter）"""
+        return random.uniform(0, min(self.max_delay, self.base_delay * 2 ** attempt))
+
+    def breaker(self, host):
+        with self._lock:
+            breaker = self._breakers.get(host)
+            if breaker is None:
+                breaker = self._breakers[host] = CircuitBreaker(self.failure_threshold, self.reset_timeout)
+            return breaker
+
+    def _record_latency(self, host, seconds):
+        with self._lock:
+            samples = self._latencies.get(host)
+            if samples is None:
+                samples = self._latencies[host] = deque(maxlen=self.latency_window)
+            samples.append(seconds)
+
+    def hedge_delay(self, host):
+        """发出对冲请求前的等待时间；样本不足或该主机不允许对冲时返回 None"""
+        if host not in self.hedge_hosts:
+            return None
+        with self._lock:
+            samples = sorted(self._latencies.get(host, ()))
+        if len(samples) < self.hedge_min_samples:
+            return None
+        index = min(len(samples) - 1, int(len(samples) * self.hedge_percentile))
+        return max(self.hedge_min_delay, samples[index])
+
+    def _count(self, name):
+        with self._lock:
+            setattr(self, name, getattr(self, name) + 1)
+
+    def _before(self, host, breaker):
+        if not breaker.allow():
+            self._count("short_circuited")
+            raise CircuitOpenError(f"{host} 暂时不可用（已熔断）")
+
+    # ---------- 同步 ----------
+    def call(self, host, send, status_of=lambda response: response.status_code, hedge=True,
+             acquire=None, can_hedge=None):
+        breaker = self.breaker(host)
+        for attempt in range(self.max_retries + 1):
+            self._before(host, breaker)
+            if acquire is not None:
+                acquire()
+            start = time.monotonic()
+            try:
+                response = self._hedged(host, send, acquire, can_hedge) if hedge else send()
+            except Exception as e:
+                if not is_transient_error(e):
+                    breaker.release()
+                    raise
+                breaker.record_failure()
+                if attempt == self.max_retries:
+                    raise
+            else:
+                if status_of(response) not in TRANSIENT_STATUS:
+                    breaker.record_success()
+                    self._record_latency(host, time.monotonic() - start)
+                    return response
+                breaker.record_failure()
+                if attempt == self.max_retries:
+                    return response
+            self._count("retries")
+            time.sleep(self.backoff(attempt))
+
+    def _hedged(self, host, send, acquire=None, can_hedge=None):
+        delay = self.hedge_delay(host)
+        if delay is None:
+            return send()
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=16, thread_name_prefix="hedge")
+        first = self._executor.submit(send)
+        done, _ = wait([first], timeout=delay)
+        if done:
+            return first.result()
+        if can_hedge is not None and not can_hedge():
+            # 限流中，对冲请求只会排队并多消耗一个令牌
+            return first.result()
+        # 第一个请求过慢，再发一个，取先成功返回者（慢的那个无法中止，结果直接丢弃）
+        self._count("hedged")
+        second = self._executor.submit(_acquire_then, acquire, send)
+        done, pending = wait([first, second], return_when=FIRST_COMPLETED)
+        winner = done.pop()
+        if winner.exception() is not None and pending:
+            winner = pending.pop()
+        if winner is second:
+            self._count("hedge_wins")
+        return winner.result()
+
+    # ---------- 异步 ----------
+    async def call_async(self, host, send, status_of=lambda result: result[0], acquire=None, can_hedge=None):
+        breaker = self.breaker(host)
+        for attempt in range(self.max_retries + 1):
+            self._before(host, breaker)
+            if acquire is not None:
+                await acquire()
+            start = time.monotonic()
+            try:
+                result = await self._hedged_async(host, send, acquire, can_hedge)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                if not is_transient_error(e):
+                    breaker.release()
+                    raise
+                breaker.record_failure()
+                if attempt == self.max_retries:
+                    raise
+            else:
+                if status_of(result) not in TRANSIENT_STATUS:
+                    breaker.record_success()
+                    self._record_latency(host, time.monotonic() - start)
+                    return result
+                breaker.record_failure()
+                if attempt == self.max_retries:
+                    return result
+            self._count("retries")
+            await asyncio.sleep(self.backoff(attempt))
+
+    async def _hedged_async(self, host, send, acquire=None, can_hedge=None):
+        delay = self.hedge_delay(host)
+        if delay is None:
+            return await send()
+        first = asyncio.ensure_future(send())
+        done, _ = await asyncio.wait({first}, timeout=delay)
+        if done:
+            return first.result()
+        if can_hedge is not None and not can_hedge():
+            return await first
+        self._count("hedged")
+        second = asyncio.ensure_future(_acquire_then_async(acquire, send))
+        tasks = {first, second}
+        try:
+            done, pending = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+            winner = done.pop()
+            if winner.exception() is not None and pending:
+                winner = pending.pop()
+                await asyncio.wait({winner})
+            if winner is second:
+                self._count("hedge_wins")
+            return winner.result()
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    def stats(self):
+        with self._lock:
+            breakers = dict(self._breakers)
+            stats = {
+                "重试": self.retries,
+                "对冲请求": self.hedged,
+                "对冲胜出": self.hedge_wins,
+                "熔断拒绝": self.short_circuited,
+            }
+        stats["熔断中"] = sorted(host for host, b in breakers.items() if b.state != CircuitBreaker.CLOSED)
+        return stats
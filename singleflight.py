@@ -0,0 +1,86 @@
+"""合并同时进行的相同请求（single-flight）
+
+同一个键（如 ("uuid", 小写玩家名)、("profile", UUID)）同时只执行一次，期间到达的调用方
+等待并共享这次执行的结果或异常。线程和 asyncio 协程可以共享同一次执行。
+"""
+import asyncio
+import threading
+from concurrent.futures import Future
+
+
+def name_key(kind, player_name):
+    """按玩家名合并的键（忽略大小写和首尾空白）"""
+    return kind, player_name.strip().lower()
+
+
+def uuid_key(kind, uuid):
+    """按UUID合并的键（忽略连字符和大小写）"""
+    return kind, uuid.replace("-", "").lower()
+
+
+class SingleFlight:
+    def __init__(self):
+        self._in_flight = {}  # 键 -> Future
+        self._lock = threading.Lock()
+        # 统计：按键的第一项（请求类型）分别计数
+        self.executed = {}
+        self.coalesced = {}
+
+    def _join(self, key):
+        """返回 (Future, 是否由调用方执行)"""
+        with self._lock:
+            future = self._in_flight.get(key)
+            counts = self.coalesced if future is not None else self.executed
+            counts[key[0]] = counts.get(key[0], 0) + 1
+            if future is not None:
+                return future, False
+            future = self._in_flight[key] = Future()
+            return future, True
+
+    def _finish(self, key, future, result=None, error=None):
+        with self._lock:
+            self._in_flight.pop(key, None)
+        if error is not None:
+            # 执行方被取消或中断时，等待方收到普通异常
+            future.set_exception(error if isinstance(error, Exception) else Exception("请求已取消"))
+        else:
+            future.set_result(result)
+
+    def do(self, key, fn):
+        """执行 fn() 或等待同一个键正在进行的执行，返回其结果（或抛出其异常）"""
+        future, leader = self._join(key)
+        if not leader:
+            return future.result()
+        try:
+            result = fn()
+        except BaseException as e:
+            self._finish(key, future, error=e)
+            raise
+        self._finish(key, future, result)
+        return result
+
+    async def do_async(self, key, coro_fn):
+        """do 的协程版本，coro_fn 为返回协程的函数"""
+        future, leader = self._join(key)
+        if not leader:
+            # 等待方被取消时不能连带取消共享的 Future
+            return await asyncio.shield(asyncio.wrap_future(future))
+        try:
+            result = await coro_fn()
+        except BaseException as e:
+            self._finish(key, future, error=e)
+            raise
+        self._finish(key, future, result)
+        return result
+
+    def stats(self):
+        with self._lock:
+            executed = sum(self.executed.values())
+            coalesced = sum(self.coalesced.values())
+            return {
+                "执行": executed,
+                "合并": coalesced,
+                "合并率": round(coalesced / (executed + coalesced), 4) if executed + coalesced else 0.0,
+                "按类型合并": dict(self.coalesced),
+                "进行中": len(self._in_flight),
+            }
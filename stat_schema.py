@@ -0,0 +1,119 @@
+"""声明式的游戏统计提取规则
+
+规则保存在 stat_schema.json 中：每个游戏对应 Hypixel stats 下的一个键，字段可以是原始键名、
+比值（KD、胜率等）或带格式的值；决斗这类按模式划分的游戏用模板描述，加载时一次性展开。
+新增游戏只需修改 JSON，无需改动代码。
+"""
+import json
+import os
+
+SCHEMA_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "stat_schema.json")
+
+# 编译后的字段类型
+_KEY = 0
+_RATIO = 1
+_FORMAT = 2
+
+
+def ratio(numerator, denominator):
+    """计算比值（KD、胜率等），分母为0时返回分子"""
+    return round(numerator / denominator, 2) if denominator > 0 else numerator
+
+
+def load_schema(path=SCHEMA_PATH):
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def _compile_field(spec, mode=None):
+    """把字段定义编译为 (类型, 参数1, 参数2)"""
+    def key(name):
+        return name.format(mode=mode) if mode else name
+
+    if isinstance(spec, str):
+        return (_KEY, key(spec), 0)
+    if "ratio" in spec:
+        numerator, denominator = spec["ratio"]
+        return (_RATIO, key(numerator), key(denominator))
+    if "format" in spec:
+        return (_FORMAT, key(spec["key"]), spec["format"])
+    if "key" in spec:
+        return (_KEY, key(spec["key"]), spec.get("default", 0))
+    raise ValueError(f"无法识别的字段定义: {spec}")
+
+
+def _compile_fields(fields, mode=None):
+    return [(name, *_compile_field(spec, mode)) for name, spec in fields.items()]
+
+
+class StatExtractor:
+    """由规则编译而成的统计提取器，对每名玩家只做字典查找和简单计算"""
+    def __init__(self, schema):
+        # [(显示名, stats键, 是否单层, [(分节名, 字段列表)])]
+        self._games = []
+        for display_name, game_spec in schema.items():
+            sections = []
+            if "fields" in game_spec:
+                sections.append((None, _compile_fields(game_spec["fields"])))
+            for section_name, fields in game_spec.get("sections", {}).items():
+                sections.append((section_name, _compile_fields(fields)))
+            modes = game_spec.get("modes")
+            if modes:
+                extra = modes.get("extra", {})
+                for mode_key, mode_name in modes["list"].items():
+                    fields = _compile_fields(modes["fields"], mode_key)
+                    fields += _compile_fields(extra.get(mode_key, {}))
+                    sections.append((mode_name, fields))
+            flat = len(sections) == 1 and sections[0][0] is None
+            self._games.append((display_name, game_spec["game"], flat, sections))
+
+    @property
+    def games(self):
+        """需要的 Hypixel stats 键"""
+        return tuple(game for _, game, _, _ in self._games)
+
+    @staticmethod
+    def _extract_fields(stats, fields):
+        out = {}
+        for name, kind, a, b in fields:
+            if kind == _KEY:
+                out[name] = stats.get(a, b)
+            elif kind == _RATIO:
+                out[name] = ratio(stats.get(a, 0), stats.get(b, 0))
+            else:
+                out[name] = b.format(stats.get(a, 0))
+        return out
+
+    def extract(self, all_stats):
+        """提取一名玩家的所有游戏数据；all_stats 为玩家的 stats 字典"""
+        result = {}
+        for display_name, game, flat, sections in self._games:
+            stats = all_stats.get(game) or {}
+            if flat:
+                result[display_name] = self._extract_fields(stats, sections[0][1])
+            else:
+                result[display_name] = {
+                    section_name: self._extract_fields(stats, fields)
+                    for section_name, fields in sections
+                }
+        return result
+
+    def columns(self, numeric=False):
+        """所有输出列名，例如 "床战争.KD"、"决斗模式.搭桥决斗.胜场"；numeric 为 True 时不含格式化的文本列"""
+        names = []
+        for display_name, _, _, sections in self._games:
+            for section_name, fields in sections:
+                prefix = f"{display_name}.{section_name}." if section_name else f"{display_name}."
+                names.extend(prefix + name for name, kind, _, _ in fields if not (numeric and kind == _FORMAT))
+        return names
+
+
+_default_extractor = None
+
+
+def get_extractor():
+    """加载并编译默认规则（只编译一次）"""
+    global _default_extractor
+    if _default_extractor is None:
+        _default_extractor = StatExtractor(load_schema())
+    return _default_extractor
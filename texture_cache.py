@@ -0,0 +1,143 @@
+import hashlib
+import os
+import sys
+import threading
+import time
+from io import BytesIO
+
+from paths import data_path
+
+
+class TextureCache:
+    """皮肤/披风材质的磁盘缓存
+
+    材质URL内容不可变，以URL的哈希为键，同时保存原始PNG和缩放后的预览图。
+    总大小超过上限时按最近访问时间淘汰。
+    """
+    def __init__(self, directory=None, max_bytes=64 * 1024 * 1024):
+        self.directory = directory or data_path("textures")
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+        self._index = {}  # 文件名 -> [大小, 最后访问时间]
+        self._total = 0
+        os.makedirs(self.directory, exist_ok=True)
+        self._scan()
+
+    def _scan(self):
+        for entry in os.scandir(self.directory):
+            if entry.is_file() and not entry.name.endswith(".tmp"):
+                st = entry.stat()
+                self._index[entry.name] = [st.st_size, st.st_mtime]
+                self._total += st.st_size
+
+    @staticmethod
+    def _digest(url):
+        return hashlib.sha1(url.encode("utf-8")).hexdigest()
+
+    def _raw_name(self, url):
+        return f"{self._digest(url)}.raw"
+
+    def _render_name(self, url, size, is_skin, slim=False, head=False):
+        # 名称中的 front 表示正面合成图，与旧版整图缩放的缓存区分
+        if head:
+            kind = "head"
+        else:
+            kind = ("front_slim" if slim else "front") if is_skin else "cape_front"
+        return f"{self._digest(url)}_{kind}_{size[0]}x{size[1]}.png"
+
+    def _read(self, name):
+        path = os.path.join(self.directory, name)
+        with self._lock:
+            if name not in self._index:
+                self.misses += 1
+                return None
+        try:
+            with open(path, "rb") as f:
+                data = f.read()
+        except OSError:
+            with self._lock:
+                entry = self._index.pop(name, None)
+                if entry:
+                    self._total -= entry[0]
+                self.misses += 1
+            return None
+        now = time.time()
+        with self._lock:
+            if name in self._index:
+                self._index[name][1] = now
+            self.hits += 1
+        try:
+            # 用修改时间记录访问时间，重启后仍可按LRU淘汰
+            os.utime(path, (now, now))
+        except OSError:
+            pass
+        return data
+
+    def _write(self, name, data):
+        path = os.path.join(self.directory, name)
+        tmp_path = f"{path}.{threading.get_ident()}.tmp"
+        try:
+            with open(tmp_path, "wb") as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            print(f"材质缓存写入失败: {str(e)}", file=sys.stderr)
+            return
+        with self._lock:
+            old = self._index.get(name)
+            if old:
+                self._total -= old[0]
+            self._index[name] = [len(data), time.time()]
+            self._total += len(data)
+            self._evict()
+
+    def _evict(self):
+        if self._total <= self.max_bytes:
+            return
+        for name, (size, _) in sorted(self._index.items(), key=lambda item: item[1][1]):
+            if self._total <= self.max_bytes:
+                break
+            try:
+                os.remove(os.path.join(self.directory, name))
+            except OSError:
+                pass
+            del self._index[name]
+            self._total -= size
+            self.evictions += 1
+
+    def get_raw(self, url):
+        """读取原始材质PNG，未缓存时返回 None"""
+        return self._read(self._raw_name(url))
+
+    def put_raw(self, url, data):
+        self._write(self._raw_name(url), data)
+
+    def get_render(self, url, size, is_skin=True, slim=False, head=False):
+        """读取已缩放的预览图（PIL.Image），未缓存时返回 None；head 为 True 时为头像"""
+        data = self._read(self._render_name(url, size, is_skin, slim, head))
+        if data is None:
+            return None
+        from PIL import Image
+        img = Image.open(BytesIO(data))
+        img.load()
+        return img
+
+    def put_render(self, url, size, is_skin, img, slim=False, head=False):
+        buffer = BytesIO()
+        img.save(buffer, format="PNG")
+        self._write(self._render_name(url, size, is_skin, slim, head), buffer.getvalue())
+
+    def stats(self):
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "文件数": len(self._index),
+                "总大小": self._total,
+                "命中": self.hits,
+                "未命中": self.misses,
+                "淘汰": self.evictions,
+                "命中率": round(self.hits / total, 4) if total else 0.0
+            }
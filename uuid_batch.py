@@ -0,0 +1,208 @@
+"""批量UUID解析：把各处同时等待解析的玩家名合并为 Mojang 批量接口请求（每次最多10个）
+
+调用方通过 submit 提交玩家名后立即得到 Future；没有进行中的请求时立即发出，否则凑满
+batch_size 个或等待 window 秒后由后台线程发出一次批量请求。结果写入UUID缓存；批量请求失败或响应中缺少的名字
+退回到逐个查询，确保不存在的玩家和暂时失败能被正确区分。
+
+批量查询通过 prefetch_ahead 只提前解析即将查询的若干名字；单独的查询优先于提前解析，
+在各自的线程池中执行，不会排在提前解析的请求之后。
+"""
+import sys
+import threading
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from itertools import islice
+
+BULK_UUID_URL = "https://api.mojang.com/profiles/minecraft"
+BULK_LIMIT = 10
+
+
+class UUIDBatcher:
+    """合并UUID查询；Future 的结果为UUID，玩家不存在时为 None，请求失败时抛出异常"""
+    def __init__(self, client, window=0.02, batch_size=BULK_LIMIT, max_workers=4):
+        self.client = client
+        self.window = window
+        self.batch_size = min(batch_size, BULK_LIMIT)
+        self._pending = {}    # 小写玩家名 -> (玩家名, Future, 是否优先)
+        self._in_flight = {}  # 小写玩家名 -> Future
+        self._urgent_in_flight = 0  # 进行中的优先批次数
+        self._prefetched = set()  # prefetch 已计入缓存统计、尚未被 get_uuid 查询的小写玩家名
+        self._timer = None
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="uuid-batch")
+        self._prefetch_executor = ThreadPoolExecutor(max_workers=max(1, max_workers // 2),
+                                                     thread_name_prefix="uuid-prefetch")
+        # 统计
+        self.bulk_requests = 0
+        self.bulk_names = 0
+        self.fallbacks = 0
+
+    def submit(self, player_name, prefetch=False):
+        """提交一个玩家名，返回 Future；同一名字同时只会查询一次
+
+        prefetch 为 True 表示提前解析，优先级低于其他查询。
+        """
+        # 缓存统计由 get_uuid 或 prefetch 负责，这里不重复计入
+        hit, uuid = self.client.uuid_cache.get(player_name, count=False)
+        if hit:
+            future = Future()
+            future.set_result(uuid)
+            return future
+        key = player_name.lower()
+        urgent = not prefetch
+        with self._lock:
+            future = self._in_flight.get(key)
+            if future is None:
+                pending = self._pending.get(key)
+                if pending is not None:
+                    if urgent and not pending[2]:
+                        self._pending[key] = (pending[0], pending[1], True)
+                        if not self._urgent_in_flight:
+                            self._dispatch()
+                    return pending[1]
+                # 提前解析的名字总是攒批发出，也不影响单独查询立即发出
+                idle = urgent and not self._urgent_in_flight and not any(p[2] for p in self._pending.values())
+                future = Future()
+                self._pending[key] = (player_name, future, urgent)
+                # 空闲时立即发出，不让单次查询等待窗口；忙碌时再攒批
+                if idle or len(self._pending) >= self.batch_size:
+                    self._dispatch()
+                elif self._timer is None:
+                    self._timer = threading.Timer(self.window, self._on_timer)
+                    self._timer.daemon = True
+                    self._timer.start()
+            return future
+
+    def prefetch(self, player_names):
+        """提前提交一批玩家名（不等待结果），之后的 resolve 会直接复用
+
+        缓存命中情况在这里计入统计，之后 get_uuid 查询这些名字时不再重复计入。
+        """
+        for name in player_names:
+            hit, _ = self.client.uuid_cache.get(name)
+            with self._lock:
+                self._prefetched.add(name.lower())
+            if not hit:
+                self.submit(name, prefetch=True)
+
+    def prefetch_ahead(self, player_names, lookahead):
+        """逐个产出玩家名，同时提前解析其后最多 lookahead 个名字
+
+        只提前解析即将查询的名字，名单再长也不会让UUID缓存淘汰尚未查询的名字，
+        也不会在线程池中积压大量批量请求。
+        """
+        names = iter(player_names)
+        ahead = deque()
+        while True:
+            # 每次补充一整批，使批量请求尽量凑满
+            if len(ahead) <= lookahead - self.batch_size or not ahead:
+                following = list(islice(names, lookahead - len(ahead)))
+                self.prefetch(following)
+                ahead.extend(following)
+            if not ahead:
+                return
+            yield ahead.popleft()
+
+    def take_prefetched(self, player_name):
+        """该名字是否由 prefetch 提交过（只返回一次 True）"""
+        with self._lock:
+            key = player_name.lower()
+            if key in self._prefetched:
+                self._prefetched.discard(key)
+                return True
+            return False
+
+    def resolve(self, player_name):
+        """阻塞解析一个玩家名，返回 (UUID, 错误信息)，与 HypixelClient.get_uuid 一致"""
+        try:
+            uuid = self.submit(player_name).result()
+        except Exception as e:
+            message = str(e)
+            return None, message if message.startswith("获取UUID失败") else f"获取UUID失败: {message}"
+        return (uuid, None) if uuid else (None, "玩家不存在")
+
+    # ---------- 批量请求 ----------
+    def _dispatch(self):
+        # 调用方持有 self._lock
+        while self._pending:
+            # 优先发出单独查询的名字
+            keys = sorted(self._pending, key=lambda key: not self._pending[key][2])[:self.batch_size]
+            batch = [self._pending.pop(key) for key in keys]
+            for key, (_, future, _) in zip(keys, batch):
+                self._in_flight[key] = future
+            urgent = any(item[2] for item in batch)
+            if urgent:
+                self._urgent_in_flight += 1
+            executor = self._executor if urgent else self._prefetch_executor
+            executor.submit(self._flush, [(name, future) for name, future, _ in batch], urgent)
+            if len(self._pending) < self.batch_size:
+                break
+        if self._pending and self._timer is None:
+            self._timer = threading.Timer(self.window, self._on_timer)
+            self._timer.daemon = True
+            self._timer.start()
+
+    def _on_timer(self):
+        with self._lock:
+            self._timer = None
+            if self._pending:
+                self._dispatch()
+
+    def _flush(self, batch, urgent=False):
+        try:
+            self._resolve_batch(batch)
+        finally:
+            if urgent:
+                with self._lock:
+                    self._urgent_in_flight -= 1
+
+    def _resolve_batch(self, batch):
+        found = {}
+        try:
+            with self.client.metrics.time("uuid"):
+                response = self.client.scheduler.post(
+                    BULK_UUID_URL, json=[name for name, _ in batch], timeout=10
+                )
+            response.raise_for_status()
+            found = {profile["name"].lower(): profile["id"] for profile in response.json()}
+            with self._lock:
+                self.bulk_requests += 1
+                self.bulk_names += len(batch)
+        except Exception as e:
+            print(f"批量获取UUID失败，改为逐个查询: {str(e)}", file=sys.stderr)
+
+        for name, future in batch:
+            try:
+                uuid = found.get(name.lower())
+                if uuid:
+                    self.client.uuid_cache.put(name, uuid)
+                else:
+                    # 响应中缺少的名字可能不存在，也可能是部分失败，逐个确认
+                    with self._lock:
+                        self.fallbacks += 1
+                    uuid, error = self.client.fetch_uuid(name)
+                    if error and error != "玩家不存在":
+                        raise Exception(error)
+                future.set_result(uuid)
+            except Exception as e:
+                future.set_exception(e)
+            finally:
+                with self._lock:
+                    self._in_flight.pop(name.lower(), None)
+
+    def stats(self):
+        with self._lock:
+            return {
+                "批量请求": self.bulk_requests,
+                "批量解析人数": self.bulk_names,
+                "逐个查询": self.fallbacks,
+                "平均每批人数": round(self.bulk_names / self.bulk_requests, 2) if self.bulk_requests else 0.0
+            }
+
+    def close(self):
+        with self._lock:
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+        self._executor.shutdown(wait=False, cancel_futures=True)
+        self._prefetch_executor.shutdown(wait=False, cancel_futures=True)
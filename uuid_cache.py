@@ -0,0 +1,132 @@
+import atexit
+import json
+import os
+import sys
+import threading
+import time
+from collections import OrderedDict
+
+from paths import data_path
+
+
+class UUIDCache:
+    """玩家名 -> UUID 的本地持久化缓存（TTL + LRU 淘汰，名称不区分大小写）
+
+    玩家不存在时也会记录一个负缓存条目（uuid 为 None）。
+    """
+    def __init__(self, path=None, ttl=7 * 24 * 3600, negative_ttl=3600, max_size=10000, save_interval=5.0):
+        self.path = path or data_path("uuid_cache.json")
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self.max_size = max_size
+        self.save_interval = save_interval
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries = OrderedDict()  # 键: 小写名称, 值: (uuid, 写入时间)
+        self._lock = threading.Lock()
+        self._dirty = False
+        self._last_save = 0.0
+        self._load()
+        atexit.register(self.flush)
+
+    @staticmethod
+    def _key(name):
+        return name.strip().lower()
+
+    def _load(self):
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                raw = json.load(f)
+        except (OSError, ValueError):
+            return
+        now = time.time()
+        # 文件中按最近使用顺序保存
+        for key, (uuid, stored_at) in raw.items():
+            if not self._expired(uuid, stored_at, now):
+                self._entries[key] = (uuid, stored_at)
+        self._trim()
+
+    def _expired(self, uuid, stored_at, now):
+        ttl = self.ttl if uuid else self.negative_ttl
+        return now - stored_at > ttl
+
+    def _trim(self):
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def get(self, name, count=True):
+        """查询缓存，返回 (是否命中, uuid)；命中负缓存时 uuid 为 None
+
+        count 为 False 时不计入命中统计（同一次查询在多处检查缓存时使用）。
+        """
+        key = self._key(name)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and self._expired(entry[0], entry[1], time.time()):
+                del self._entries[key]
+                self._dirty = True
+                entry = None
+            if entry is None:
+                if count:
+                    self.misses += 1
+                return False, None
+            self._entries.move_to_end(key)
+            if count:
+                self.hits += 1
+            return True, entry[0]
+
+    def put(self, name, uuid):
+        """写入缓存，uuid 为 None 表示玩家不存在"""
+        with self._lock:
+            key = self._key(name)
+            self._entries[key] = (uuid, time.time())
+            self._entries.move_to_end(key)
+            self._trim()
+            self._dirty = True
+        self._maybe_save()
+
+    def invalidate(self, name):
+        with self._lock:
+            if self._entries.pop(self._key(name), None) is not None:
+                self._dirty = True
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._dirty = True
+        self.flush()
+
+    def stats(self):
+        """命中统计"""
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "条目数": len(self._entries),
+                "命中": self.hits,
+                "未命中": self.misses,
+                "淘汰": self.evictions,
+                "命中率": round(self.hits / total, 4) if total else 0.0
+            }
+
+    def _maybe_save(self):
+        # 批量查询时避免每次写入都落盘
+        if time.time() - self._last_save >= self.save_interval:
+            self.flush()
+
+    def flush(self):
+        """将缓存写入磁盘"""
+        with self._lock:
+            if not self._dirty:
+                return
+            snapshot = {key: [uuid, stored_at] for key, (uuid, stored_at) in self._entries.items()}
+            self._dirty = False
+            self._last_save = time.time()
+        tmp_path = f"{self.path}.{os.getpid()}.tmp"
+        try:
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(snapshot, f, ensure_ascii=False)
+            os.replace(tmp_path, self.path)
+        except OSError as e:
+            print(f"UUID缓存保存失败: {str(e)}", file=sys.stderr)
@@ -0,0 +1,378 @@
+"""关注列表监控：定期轮询玩家的 /status，上线、下线、进入指定游戏或数据变化时发出通知
+
+每名玩家有自己的轮询间隔：在线玩家按最短间隔轮询，离线玩家每次未变化后逐步退避，
+状态一变化立即恢复最短间隔。轮询失败时同样退避，同一错误连续出现只通知一次；
+玩家不存在时停止轮询，直到重新添加。所有轮询共用一个全局请求预算（令牌桶），预算不足时
+按比例拉长离线玩家的间隔，因此关注上千名玩家也不会超出密钥限额，并给手动查询留出余量。
+"""
+import heapq
+import json
+import os
+import sys
+import threading
+import time
+from collections import deque
+
+from hypixel_core import flatten_data
+from key_pool import KeyPool
+from paths import data_path
+from rate_limit import DEFAULT_KEY_LIMIT, TokenBucket
+
+# 事件类型
+ONLINE = "上线"
+OFFLINE = "下线"
+JOINED_GAME = "进入游戏"
+STATS_CHANGED = "数据变化"
+ERROR = "错误"
+
+
+class WatchEntry:
+    """关注列表中的一名玩家"""
+    def __init__(self, name, games=None):
+        self.name = name
+        self.games = {game.upper() for game in games} if games else None
+        self.uuid = None
+        self.online = None       # None 表示尚未轮询
+        self.game_type = None
+        self.mode = None
+        self.interval = 0.0
+        self.next_poll = 0.0
+        self.last_poll = None
+        self.last_stats = None   # 上次检查数据变化的时间
+        self.polls = 0
+        self.error = None        # 最近一次轮询的错误，成功后清除
+        self.invalid = False     # 玩家不存在，不再轮询
+
+    def to_dict(self):
+        return {"player": self.name, "games": sorted(self.games) if self.games else None}
+
+
+class WatchlistMonitor:
+    """关注列表监控器
+
+    budget 为每分钟最多发出的 Hypixel 请求数，默认取密钥限额的 budget_share；
+    on_event(event) 在监控线程中调用，界面需要自行投递到界面线程。
+    """
+    def __init__(self, client, api_key, on_event=None, path=None, budget=None, budget_share=0.5,
+                 min_interval=60.0, max_interval=1800.0, backoff=1.5, stats_interval=600.0):
+        self.client = client
+        self.api_key = api_key
+        self.on_event = on_event
+        self.path = path or data_path("watchlist.json")
+        if budget is None:
+            count, period = DEFAULT_KEY_LIMIT
+            keys = len(api_key) if isinstance(api_key, KeyPool) else 1
+            budget = count / period * 60 * keys * budget_share
+        self.budget = budget
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.backoff = backoff
+        self.stats_interval = stats_interval
+        self._bucket = TokenBucket(budget / 60, max(1.0, budget / 60 * 5))
+        self._entries = {}   # 小写玩家名 -> WatchEntry
+        self._heap = []      # (下次轮询时间, 序号, 小写玩家名)
+        self._seq = 0
+        self._demand = 0.0   # 按当前间隔估算的每秒请求数
+        self._cond = threading.Condition()
+        self._stopped = threading.Event()
+        self._thread = None
+        # 统计
+        self.status_requests = 0
+        self.profile_requests = 0
+        self.errors = 0
+        self.events = 0
+        self.total_lag = 0.0
+        self.max_lag = 0.0
+        self._recent = deque()
+
+    # ---------- 关注列表 ----------
+    def add(self, name, games=None):
+        """添加玩家；games 为需要通知的游戏类型（如 BEDWARS），为空表示任何游戏"""
+        key = name.lower()
+        with self._cond:
+            if key in self._entries:
+                entry = self._entries[key]
+                entry.games = WatchEntry(name, games).games
+                if entry.invalid:
+                    # 重新添加之前不存在的玩家（例如改正了拼写）时恢复轮询
+                    entry.name, entry.invalid, entry.error = name, False, None
+                    self._demand += 1 / entry.interval
+                    self._schedule(key, time.monotonic())
+                    self._cond.notify()
+                return False
+            entry = self._entries[key] = WatchEntry(name, games)
+            entry.interval = self.min_interval
+            self._demand += 1 / entry.interval
+            self._schedule(key, time.monotonic())
+            self._cond.notify()
+        return True
+
+    def remove(self, name):
+        with self._cond:
+            entry = self._entries.pop(name.lower(), None)
+            if entry is None:
+                return False
+            if not entry.invalid:
+                self._demand -= 1 / entry.interval
+        return True
+
+    def names(self):
+        with self._cond:
+            return [entry.name for entry in self._entries.values()]
+
+    def __len__(self):
+        return len(self._entries)
+
+    def load(self):
+        """从文件加载关注列表，返回加载的人数"""
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                items = json.load(f)
+        except (OSError, ValueError):
+            return 0
+        for item in items:
+            self.add(item["player"], item.get("games"))
+        return len(items)
+
+    def save(self):
+        with self._cond:
+            items = [entry.to_dict() for entry in self._entries.values()]
+        tmp_path = f"{self.path}.tmp"
+        try:
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(items, f, ensure_ascii=False, indent=1)
+            os.replace(tmp_path, self.path)
+        except OSError as e:
+            print(f"关注列表保存失败: {str(e)}", file=sys.stderr)
+
+    # ---------- 调度 ----------
+    def _schedule(self, key, when):
+        self._entries[key].next_poll = when
+        self._seq += 1
+        heapq.heappush(self._heap, (when, self._seq, key))
+
+    def _pressure(self):
+        """预计需求超过预算时离线玩家间隔的放大倍数"""
+        return max(1.0, self._demand * 60 / self.budget)
+
+    def _set_interval(self, entry, interval):
+        self._demand += 1 / interval - 1 / entry.interval
+        entry.interval = interval
+
+    def _next_due(self):
+        """等待并取出下一名到期的玩家，停止时返回 None"""
+        with self._cond:
+            while not self._stopped.is_set():
+                while self._heap:
+                    when, _, key = self._heap[0]
+                    entry = self._entries.get(key)
+                    if entry is not None and entry.next_poll == when:
+                        break
+                    heapq.heappop(self._heap)  # 已移除或已重新调度
+                if not self._heap:
+                    self._cond.wait()
+                    continue
+                delay = self._heap[0][0] - time.monotonic()
+                if delay > 0:
+                    self._cond.wait(delay)
+                    continue
+                when, _, key = heapq.heappop(self._heap)
+                return self._entries[key], when
+        return None
+
+    def _wait_budget(self):
+        wait = self._bucket.reserve(time.monotonic())
+        if wait > 0:
+            self._stopped.wait(wait)
+
+    # ---------- 轮询 ----------
+    def poll(self, entry):
+        """轮询一名玩家，返回产生的事件列表"""
+        events = []
+        if entry.uuid is None:
+            uuid, error = self.client.get_uuid(entry.name)
+            if error:
+                entry.invalid = error == "玩家不存在"
+                return self._error(entry, error)
+            entry.uuid = uuid
+
+        self._wait_budget()
+        session, error = self.client.get_status(self.api_key, entry.uuid)
+        self._count("status_requests")
+        if error:
+            return self._error(entry, error)
+        entry.error = None
+
+        now = time.monotonic()
+        was_online, old_game = entry.online, entry.game_type
+        entry.online = bool(session.get("online"))
+        entry.game_type = session.get("gameType") if entry.online else None
+        entry.mode = session.get("mode") if entry.online else None
+        entry.last_poll = time.time()
+        entry.polls += 1
+
+        if entry.online and was_online is False:
+            events.append(self._event(ONLINE, entry, entry.game_type))
+        elif was_online and not entry.online:
+            events.append(self._event(OFFLINE, entry))
+        if entry.online and entry.game_type and entry.game_type != old_game and was_online is not None:
+            if entry.games is None or entry.game_type.upper() in entry.games:
+                events.append(self._event(JOINED_GAME, entry, f"{entry.game_type} {entry.mode or ''}".strip()))
+
+        # 刚下线或在线超过 stats_interval 时检查一次数据变化
+        if (was_online and not entry.online) or (
+                entry.online and (entry.last_stats is None or now - entry.last_stats >= self.stats_interval)):
+            changes = self.check_stats(entry)
+            entry.last_stats = now
+            if changes:
+                events.append(self._event(STATS_CHANGED, entry, changes))
+        return events
+
+    def check_stats(self, entry):
+        """重新获取玩家数据，返回与上次相比变化的数值字段 {字段: 差值}"""
+        state, cached = self.client.profile_cache.lookup(entry.uuid)
+        self._wait_budget()
+        self._count("profile_requests")
+        try:
+            processed_data, _ = self.client.fetch_profile(self.api_key, entry.uuid)
+        except Exception as e:
+            self._count("errors")
+            print(f"监控数据获取失败: {str(e)}", file=sys.stderr)
+            return {}
+        if cached is None:
+            return {}
+        old = flatten_data(cached["data"])
+        changes = {}
+        for field, value in flatten_data(processed_data).items():
+            before = old.get(field)
+            if (isinstance(value, (int, float)) and isinstance(before, (int, float))
+                    and not isinstance(value, bool) and value != before):
+                changes[field] = round(value - before, 2)
+        return changes
+
+    def _reschedule(self, entry, changed):
+        """根据轮询结果调整间隔：在线或状态变化时恢复最短间隔，否则（包括出错时）退避"""
+        with self._cond:
+            key = entry.name.lower()
+            if self._entries.get(key) is not entry:
+                return
+            if entry.invalid:
+                # 玩家不存在：不再轮询，也不再占用请求预算
+                self._demand -= 1 / entry.interval
+                return
+            if entry.online or changed:
+                interval = self.min_interval
+            else:
+                interval = min(self.max_interval, entry.interval * self.backoff)
+            self._set_interval(entry, interval)
+            if not entry.online:
+                interval *= self._pressure()
+            self._schedule(key, time.monotonic() + interval)
+
+    def _error(self, entry, error):
+        """记录轮询错误；与上次相同的错误只计数，不再通知"""
+        repeated = entry.error == error
+        entry.error = error
+        if not repeated:
+            return [self._event(ERROR, entry, error)]
+        with self._cond:
+            self.errors += 1
+        return []
+
+    def _event(self, kind, entry, detail=None):
+        return {"type": kind, "player": entry.name, "uuid": entry.uuid, "time": time.time(), "detail": detail}
+
+    def _count(self, name):
+        with self._cond:
+            setattr(self, name, getattr(self, name) + 1)
+            if name != "errors":
+                now = time.monotonic()
+                self._recent.append(now)
+                while self._recent and now - self._recent[0] > 60:
+                    self._recent.popleft()
+
+    def _emit(self, event):
+        with self._cond:
+            self.events += 1
+            if event["type"] == ERROR:
+                self.errors += 1
+        if self.on_event:
+            try:
+                self.on_event(event)
+            except Exception as e:
+                print(f"监控通知处理失败: {str(e)}", file=sys.stderr)
+
+    # ---------- 运行 ----------
+    def run(self):
+        """在当前线程中运行，直到调用 stop()"""
+        self._stopped.clear()
+        while True:
+            due = self._next_due()
+            if due is None:
+                break
+            entry, when = due
+            lag = time.monotonic() - when
+            with self._cond:
+                self.total_lag += lag
+                self.max_lag = max(self.max_lag, lag)
+            try:
+                events = self.poll(entry)
+            except Exception as e:
+                events = self._error(entry, str(e))
+            for event in events:
+                self._emit(event)
+            self._reschedule(entry, any(e["type"] != ERROR for e in events))
+
+    def start(self):
+        """在后台线程中运行"""
+        if self._thread is None or not self._thread.is_alive():
+            self._stopped.clear()
+            self._thread = threading.Thread(target=self.run, name="watchlist", daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        self._stopped.set()
+        with self._cond:
+            self._cond.notify_all()
+
+    @property
+    def running(self):
+        return self._thread is not None and self._thread.is_alive() and not self._stopped.is_set()
+
+    def snapshot(self):
+        """当前关注列表状态，按在线优先、玩家名排序"""
+        with self._cond:
+            rows = [{
+                "player": entry.name,
+                "uuid": entry.uuid,
+                "online": entry.online,
+                "game": entry.game_type,
+                "mode": entry.mode,
+                "interval": round(entry.interval, 1),
+                "last_poll": entry.last_poll,
+                "error": entry.error
+            } for entry in self._entries.values()]
+        rows.sort(key=lambda row: (not row["online"], row["player"].lower()))
+        return rows
+
+    def stats(self):
+        """轮询开销统计"""
+        with self._cond:
+            polls = self.status_requests
+            now = time.monotonic()
+            while self._recent and now - self._recent[0] > 60:
+                self._recent.popleft()
+            return {
+                "关注人数": len(self._entries),
+                "在线人数": sum(1 for entry in self._entries.values() if entry.online),
+                "状态请求": self.status_requests,
+                "数据请求": self.profile_requests,
+                "事件数": self.events,
+                "错误": self.errors,
+                "最近一分钟请求": len(self._recent),
+                "每分钟预算": round(self.budget, 1),
+                "预计每分钟需求": round(self._demand * 60, 1),
+                "离线间隔倍数": round(self._pressure(), 2),
+                "平均延迟(秒)": round(self.total_lag / polls, 2) if polls else 0.0,
+                "最大延迟(秒)": round(self.max_lag, 2)
+            }